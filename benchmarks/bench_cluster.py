@@ -0,0 +1,78 @@
+import argparse
+import random
+import time
+from loguru import logger
+from dx.cluster import (PaperClusterer, paper_text, tokenize_all, tfidf_matrix, kmeans,
+                        minhash_signatures, near_duplicates)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Benchmark clustering and near-duplicate detection')
+    parser.add_argument('-n', '--num_papers', type=int, default=10000,
+                        help='about a week of cs')
+    parser.add_argument('--num_topics', type=int, default=40)
+    parser.add_argument('--duplicate_ratio', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    return args
+
+
+def make_papers(rng, num_papers, num_topics, duplicate_ratio):
+    '''
+    Papers drawing most of their words from one of `num_topics` topics, and
+    near-duplicates of some of them with a few words changed. Returns the
+    papers and the set of (original, duplicate) index pairs.
+    '''
+    common = [f'common{i}' for i in range(2000)]
+    topics = [[f't{t}w{i}' for i in range(300)] for t in range(num_topics)]
+    papers = []
+    pairs = set([])
+    while len(papers) < num_papers:
+        if papers and rng.random() < duplicate_ratio:
+            original = rng.randrange(len(papers))
+            words = papers[original]['summary'].split()
+            for _ in range(len(words) // 50):
+                words[rng.randrange(len(words))] = rng.choice(common)
+            summary = ' '.join(words)
+            title = papers[original]['title']
+            pairs.add((original, len(papers)))
+        else:
+            topic = topics[rng.randrange(num_topics)]
+            summary = ' '.join([rng.choice(topic) if rng.random() < 0.4 else rng.choice(common)
+                                for _ in range(rng.randint(100, 250))])
+            title = ' '.join(rng.sample(topic, 6))
+        papers.append({'id': f'2102.{len(papers):05d}', 'title': title, 'summary': summary,
+                       'links': {'Abstract': f'https://arxiv.org/abs/2102.{len(papers):05d}'}})
+    return papers, pairs
+
+
+def timed(name, f, *args, **kwargs):
+    start = time.perf_counter()
+    result = f(*args, **kwargs)
+    print(f'{name:>12}: {time.perf_counter() - start:6.2f}s')
+    return result
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    papers, pairs = make_papers(rng, args.num_papers, args.num_topics, args.duplicate_ratio)
+    texts = [paper_text(paper) for paper in papers]
+
+    docs, tokens = timed('tokenize', tokenize_all, texts)
+    matrix, _ = timed('tf-idf', tfidf_matrix, docs, tokens)
+    timed('k-means', kmeans, matrix, round(len(papers) / 30))
+    signatures = timed('minhash', minhash_signatures, docs, len(tokens))
+    groups = timed('lsh', near_duplicates, signatures)
+    clusters = timed('total', PaperClusterer().cluster, papers)
+
+    found = set([(group[0], i) for group in map(sorted, groups) for i in group[1:]])
+    recall = len(found & pairs) / max(1, len(pairs))
+    print(f'{len(papers)} papers, {len(clusters)} clusters, {len(pairs)} near-duplicates '
+          f'injected, {len(found)} found (recall {recall:.1%})')
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    main(args)
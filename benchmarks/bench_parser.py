@@ -0,0 +1,49 @@
+import argparse
+import time
+from pathlib import Path
+from loguru import logger
+from dx.listing import PARSERS, parse_listing
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Benchmark listing page parsers')
+    parser.add_argument('pages', nargs='+', type=Path,
+                        help='saved listing pages (/list/{cat}/pastweek?show=...)')
+    parser.add_argument('--parsers', nargs='+', choices=PARSERS,
+                        default=list(PARSERS))
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+    return args
+
+
+def run(text, parser):
+    return [(header, list(entries))
+            for header, entries in parse_listing(text, parser=parser)]
+
+
+def main(args):
+    texts = [page.read_text() for page in args.pages]
+    num_bytes = sum([len(text) for text in texts])
+    results = {}
+    for parser in args.parsers:
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = [run(text, parser) for text in texts]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[parser] = result
+        num_entries = sum([len(entries) for page in result
+                           for _, entries in page])
+        print(f'{parser:>8}: {best:.3f}s  {num_entries / best:10.1f} entries/s  '
+              f'{num_bytes / best / 1e6:6.2f} MB/s')
+    outputs = list(results.values())
+    if any([output != outputs[0] for output in outputs[1:]]):
+        logger.warning('parsers disagree on the parsed entries')
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    main(args)
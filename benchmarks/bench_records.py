@@ -0,0 +1,121 @@
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from loguru import logger
+from dx.records import Paper
+
+
+SUBJECTS = ['Machine Learning (cs.LG)', 'Computer Vision and Pattern Recognition (cs.CV)',
+            'Computation and Language (cs.CL)', 'Machine Learning (stat.ML)',
+            'Robotics (cs.RO)', 'Cryptography and Security (cs.CR)']
+
+# fields of twint.tweet.tweet that end up in the crawl results
+TWINT_FIELDS = ['conversation_id', 'datetime', 'timezone', 'user_id', 'place', 'language',
+                'mentions', 'urls', 'photos', 'replies_count', 'hashtags', 'cashtags',
+                'video', 'thumbnail', 'quote_url', 'near', 'geo', 'source', 'user_rt_id',
+                'user_rt', 'retweet_id', 'reply_to', 'retweet_date', 'translate',
+                'trans_src', 'trans_dest']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Compare the memory of dict and Paper/Tweet records')
+    parser.add_argument('-i', '--input_file', type=str, default=None,
+                        help='crawl result to measure (default: a synthetic corpus)')
+    parser.add_argument('-n', '--num_papers', type=int, default=10000)
+    parser.add_argument('--tweets_per_paper', type=float, default=3.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    return args
+
+
+def make_tweet(rng, i, arxiv_id):
+    tweet = {'id': 1300000000000000000 + i,
+             'name': f'user {rng.randrange(5000)}',
+             'username': f'user{rng.randrange(5000)}',
+             'datestamp': f'2020-09-{rng.randint(1, 28):02d}',
+             'timestamp': f'{rng.randrange(24):02d}:{rng.randrange(60):02d}:00',
+             'link': f'https://twitter.com/user/status/{1300000000000000000 + i}',
+             'tweet': f'Check out our new paper https://arxiv.org/abs/{arxiv_id} ' + 'x' * 120,
+             'retweets_count': rng.randrange(100),
+             'likes_count': rng.randrange(500)}
+    tweet.update({field: '' for field in TWINT_FIELDS})
+    tweet['mentions'] = []
+    tweet['urls'] = [f'https://arxiv.org/abs/{arxiv_id}']
+    return tweet
+
+
+def make_corpus(num_papers, tweets_per_paper, seed=0):
+    rng = random.Random(seed)
+    papers = []
+    num_tweets = 0
+    for i in range(num_papers):
+        arxiv_id = f'2009.{i:05d}'
+        abs_url = f'https://arxiv.org/abs/{arxiv_id}'
+        authors = [f'Author {rng.randrange(20000)}' for _ in range(rng.randint(1, 8))]
+        summary = ' '.join(['lorem'] * rng.randint(100, 250))
+        subjects = rng.sample(SUBJECTS, rng.randint(1, 3))
+        detail = {'id': abs_url + 'v1', 'guidislink': True, 'updated': '2020-09-01T00:00:00Z',
+                  'published': '2020-09-01T00:00:00Z', 'title': f'Paper {i}',
+                  'summary': summary, 'authors': [{'name': _} for _ in authors],
+                  'author': authors[-1], 'arxiv_comment': '10 pages',
+                  'links': [{'href': abs_url + 'v1', 'rel': 'alternate', 'type': 'text/html'},
+                            {'title': 'pdf', 'href': f'https://arxiv.org/pdf/{arxiv_id}v1',
+                             'rel': 'related', 'type': 'application/pdf'}],
+                  'arxiv_primary_category': {'term': 'cs.LG'},
+                  'tags': [{'term': 'cs.LG', 'scheme': 'http://arxiv.org/schemas/atom'}],
+                  'pdf_url': f'http://arxiv.org/pdf/{arxiv_id}v1', 'affiliation': 'None',
+                  'arxiv_url': abs_url + 'v1', 'journal_reference': None, 'doi': None}
+        tweets = []
+        for _ in range(int(rng.expovariate(1 / tweets_per_paper))):
+            tweets.append(make_tweet(rng, num_tweets, arxiv_id))
+            num_tweets += 1
+        papers.append({'date': 'Tue, 1 Sep 2020',
+                       'links': {'Abstract': abs_url,
+                                 'Download PDF': f'https://arxiv.org/pdf/{arxiv_id}',
+                                 'Other formats': f'https://arxiv.org/format/{arxiv_id}'},
+                       'id': arxiv_id,
+                       'title': f'Paper {i}',
+                       'authors': authors,
+                       'comments': '10 pages, 3 figures',
+                       'subjects': subjects,
+                       'summary': summary,
+                       'detail': detail,
+                       'tweets': tweets})
+    return papers
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def main(args):
+    # both are built from the serialized corpus so that they share no strings
+    if args.input_file is not None:
+        with open(args.input_file) as fin:
+            text = json.dumps(json.load(fin)['papers'])
+    else:
+        text = json.dumps(make_corpus(args.num_papers, args.tweets_per_paper, seed=args.seed))
+
+    papers, dict_size, _ = measure(lambda: json.loads(text))
+    num_tweets = sum([len(paper['tweets']) for paper in papers])
+    del papers
+    records, record_size, record_peak = measure(
+        lambda: [Paper.from_dict(paper) for paper in json.loads(text)])
+    print(f'{len(records)} papers, {num_tweets} tweets')
+    print(f'   dicts: {dict_size / 1e6:8.1f} MB')
+    print(f' records: {record_size / 1e6:8.1f} MB  ({record_size / dict_size:.1%}, '
+          f'peak while converting {record_peak / 1e6:.1f} MB)')
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    main(args)
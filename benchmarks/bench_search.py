@@ -0,0 +1,86 @@
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from loguru import logger
+from dx.search import SearchIndex, update_index
+
+
+WORDS = ['learning', 'neural', 'network', 'diffusion', 'model', 'robotics', 'robot',
+         'policy', 'language', 'vision', 'graph', 'attention', 'transformer', 'privacy',
+         'reinforcement', 'optimization', 'generative', 'adversarial', 'federated',
+         'causal', 'inference', 'benchmark', 'dataset', 'segmentation', 'detection']
+
+SUBJECTS = ['Machine Learning (cs.LG)', 'Computer Vision and Pattern Recognition (cs.CV)',
+            'Computation and Language (cs.CL)', 'Robotics (cs.RO)',
+            'Machine Learning (stat.ML)', 'Cryptography and Security (cs.CR)']
+
+QUERIES = ['diffusion robotics', '"neural network"', 'title:transformer subject:cs.CV',
+           'author:"author 42"', 'federated privacy benchmark', 'zzzunknownzzz']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Benchmark building and querying the search index')
+    parser.add_argument('-n', '--num_papers', type=int, default=100000)
+    parser.add_argument('--batch_size', type=int, default=10000,
+                        help='papers added per incremental update')
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    return args
+
+
+def make_papers(rng, first, num_papers):
+    # word frequencies follow a Zipf law, plus a long tail of rare words
+    weights = [1 / (i + 1) for i in range(len(WORDS))]
+    papers = []
+    for i in range(first, first + num_papers):
+        words = rng.choices(WORDS, weights, k=rng.randint(80, 200))
+        words += [f'w{rng.randrange(50000)}' for _ in range(20)]
+        papers.append({'id': f'{2000 + i // 20000}.{i % 20000:05d}',
+                       'date': f'Mon, {1 + i * 28 // 100000:02d} Feb 2021',
+                       'title': ' '.join(rng.choices(WORDS, weights, k=8)).title(),
+                       'authors': [f'Author {rng.randrange(20000)}'
+                                   for _ in range(rng.randint(1, 6))],
+                       'subjects': rng.sample(SUBJECTS, rng.randint(1, 3)),
+                       'summary': ' '.join(words)})
+    return papers
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    path = Path(tempfile.mkdtemp()) / 'index'
+    try:
+        build_time = 0.0
+        for first in range(0, args.num_papers, args.batch_size):
+            papers = make_papers(rng, first, min(args.batch_size, args.num_papers - first))
+            start = time.perf_counter()
+            update_index(path, papers)
+            build_time += time.perf_counter() - start
+        size = sum([_.stat().st_size for _ in path.iterdir()])
+        print(f'indexed {args.num_papers} papers in {build_time:.1f}s '
+              f'({size / 1e6:.1f} MB on disk)')
+
+        start = time.perf_counter()
+        index = SearchIndex(path)
+        print(f'{"open":>32}: {(time.perf_counter() - start) * 1e3:8.2f} ms')
+        for query in QUERIES:
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = index.search(query, k=20, since='2021/02/10')
+                times.append(time.perf_counter() - start)
+            times.sort()
+            print(f'{query:>32}: {times[len(times) // 2] * 1e3:8.2f} ms median, '
+                  f'{times[-1] * 1e3:8.2f} ms max, {len(results)} results')
+    finally:
+        shutil.rmtree(path.parent)
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    main(args)
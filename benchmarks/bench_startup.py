@@ -0,0 +1,175 @@
+'''
+Startup time of the `dx` commands.
+
+Every case runs `python -m dx ...` in a fresh interpreter, `--repeat`
+times, and records the best wall time and the modules it imported. A case
+fails if it imports one of the modules it should not need (e.g. twitter
+for daily_arxiv), or if it is more than `--tolerance` slower than in the
+`--baseline` result; the exit status is then 1.
+'''
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from loguru import logger
+from dx.dataio import dump
+import synthetic
+
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+
+# runs the command, then saves the names of the imported modules
+RUNNER = '''
+import sys, json
+from dx.cli import main
+modules_file = sys.argv[1]
+try:
+    main(sys.argv[2:])
+except SystemExit:
+    pass
+json.dump(sorted(sys.modules), open(modules_file, 'w'))
+'''
+
+HEAVY = ('twitter', 'dotenv', 'tqdm', 'click', 'numpy', 'scipy', 'bs4', 'requests', 'feedparser')
+
+# (name, arguments ({workdir} and {corpus} are filled in), modules it must not import)
+CASES = [
+    ('help', ['-h'], HEAVY),
+    ('crawl', ['crawl', '-h'],
+     ('twitter', 'dotenv', 'tqdm', 'click', 'numpy', 'scipy', 'bs4', 'feedparser')),
+    ('search', ['search', '-h'], ('twitter', 'dotenv', 'tqdm', 'click', 'numpy', 'scipy', 'bs4')),
+    ('papers', ['papers', '--index', '{workdir}/index', 'search', 'neural', 'network'],
+     ('twitter', 'dotenv', 'tqdm', 'click', 'scipy', 'bs4', 'requests', 'feedparser')),
+    ('render-daily_arxiv', ['render', 'daily_arxiv', '-i', '{corpus}',
+                            '-o', '{workdir}/daily_arxiv.md'],
+     ('twitter', 'dotenv', 'tqdm', 'numpy', 'scipy', 'bs4', 'requests', 'feedparser')),
+    ('render-twitter_highlight', ['render', 'twitter_highlight', '-i', '{corpus}',
+                                  '-o', '{workdir}/twitter_highlights.md',
+                                  '--oembed_cache', '{workdir}/oembed.db',
+                                  '--fragment_cache', '{workdir}/fragments.db'],
+     ('twitter', 'tqdm', 'scipy', 'bs4', 'requests', 'feedparser')),
+    ('pipeline', ['pipeline', '-h'], ('twitter', 'dotenv', 'tqdm', 'click', 'scipy', 'bs4')),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Startup time of the dx commands')
+    parser.add_argument('-s', '--cases', nargs='+', choices=[_[0] for _ in CASES],
+                        default=[_[0] for _ in CASES])
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-n', '--num_papers', type=int, default=300,
+                        help='size of the synthetic corpus the render cases load')
+    parser.add_argument('-o', '--output_file', type=Path, default=None,
+                        help='default: result/benchmarks/startup-{time}.json')
+    parser.add_argument('--baseline', type=Path, default=None,
+                        help='previous output file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown over the baseline')
+    args = parser.parse_args()
+    return args
+
+
+def prepare(workdir, num_papers):
+    today = datetime.datetime(2020, 11, 6)
+    papers = synthetic.make_papers(num_papers, today=today, tweets_per_paper=3.0)
+    corpus = workdir / 'papers.json'
+    dump({'meta': {'since': '2020/11/02', 'until': '2020/11/07'}, 'papers': papers}, corpus)
+    # an index for the papers case
+    subprocess.run([sys.executable, '-m', 'dx', 'papers', '--index', str(workdir / 'index'),
+                    'index', '-i', str(corpus)], env=environment(), cwd=workdir,
+                   capture_output=True, check=True)
+    return corpus
+
+
+def environment():
+    # no twitter credentials: the oEmbed client must not even be made
+    env = {name: value for name, value in os.environ.items() if not name.startswith('TWITTER_')}
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get('PYTHONPATH')]))
+    return env
+
+
+def run_case(argv, repeat, workdir):
+    modules_file = workdir / 'modules.json'
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', RUNNER, str(modules_file)] + argv,
+                       env=environment(), cwd=workdir, capture_output=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, json.load(open(modules_file))
+
+
+def interpreter_time(repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(args):
+    workdir = Path(tempfile.mkdtemp())
+    results = []
+    failures = []
+    try:
+        corpus = prepare(workdir, args.num_papers)
+        python = interpreter_time(args.repeat)
+        print(f'{"python":>26}: {python * 1e3:7.1f} ms')
+        for name, argv, forbidden in CASES:
+            if name not in args.cases:
+                continue
+            argv = [_.format(workdir=workdir, corpus=corpus) for _ in argv]
+            seconds, modules = run_case(argv, args.repeat, workdir)
+            imported = [_ for _ in forbidden if _ in modules]
+            results.append({'case': name, 'args': argv, 'seconds': seconds,
+                            'num_modules': len(modules), 'unexpected_imports': imported})
+            print(f'{name:>26}: {seconds * 1e3:7.1f} ms  {len(modules):5d} modules'
+                  + (f'  imports {", ".join(imported)}' if imported else ''), flush=True)
+            if imported:
+                failures.append(f'{name} imports {", ".join(imported)}')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output_file = args.output_file
+    if output_file is None:
+        output_file = (Path('result/benchmarks')
+                       / ('startup-' + time.strftime('%Y%m%d-%H%M%S') + '.json'))
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    meta = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+            'platform': platform.platform(), 'repeat': args.repeat,
+            'interpreter_seconds': python}
+    json.dump({'meta': meta, 'results': results}, open(output_file, 'w'), indent=1)
+    logger.info(f'saved {output_file}')
+
+    if args.baseline is not None:
+        previous = {_['case']: _ for _ in json.load(open(args.baseline))['results']}
+        print(f'\ncompared with {args.baseline}:')
+        for result in results:
+            before = previous.get(result['case'])
+            if before is None:
+                continue
+            ratio = result['seconds'] / before['seconds']
+            print(f'{result["case"]:>26}: {ratio:5.2f}x time')
+            if ratio > 1 + args.tolerance:
+                failures.append(f'{result["case"]} is {ratio:.2f}x slower')
+    for failure in failures:
+        logger.error(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    sys.exit(main(args))
@@ -0,0 +1,332 @@
+'''
+End-to-end benchmarks on synthetic corpora, offline.
+
+Every scenario is run on corpora of each of the given sizes, against the
+stand-ins of standins.py. The best of `--repeat` runs is timed, then one
+more run is traced for its peak memory (Python allocations). The results
+are written as JSON, and compared with a previous result file if given.
+'''
+
+import argparse
+import datetime
+import gc
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from loguru import logger
+from dx.listing import parse_listing
+from dx.crawler import Crawler
+from dx.oai import OAICrawler
+from dx.enrich import Enricher
+from dx.tweets import TweetSearcher
+from dx.ratelimit import AdaptiveRateController
+from dx.scoring import ScoreEngine
+from dx.records import load
+from dx.dataio import dump
+from dx.oembed import OEmbedResolver
+from dx.cluster import PaperClusterer
+from dx.writers import DailyArxivWriter, TwitterHighlightWriter, HotPaperBlogWriter
+from dx.search import update_index, SearchIndex
+import synthetic
+from standins import ArxivStandIn, TweetStandIn, TwitterApiStandIn
+
+
+TODAY = datetime.datetime(2020, 11, 6)
+NUM_DAYS = 5
+
+SCENARIOS = {}
+
+
+def scenario(name, unit):
+    '''
+    Registers a scenario: a function of (size, args, workdir) which sets
+    things up and returns the function to time, itself returning the
+    number of `unit` it processed.
+    '''
+    def register(setup):
+        SCENARIOS[name] = (setup, unit)
+        return setup
+    return register
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('End-to-end benchmarks on synthetic corpora')
+    parser.add_argument('-n', '--sizes', nargs='+', type=int, default=[100, 1000, 10000],
+                        help='numbers of papers (up to 100k)')
+    parser.add_argument('-s', '--scenarios', nargs='+', choices=list(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every stand-in request')
+    parser.add_argument('--tweets_per_paper', type=float, default=3.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no_memory', action='store_true',
+                        help="don't trace the peak memory (saves one run per scenario)")
+    parser.add_argument('-o', '--output_file', type=Path, default=None,
+                        help='default: result/benchmarks/{time}.json')
+    parser.add_argument('--baseline', type=Path, default=None,
+                        help='previous output file to compare with')
+    args = parser.parse_args()
+    return args
+
+
+def corpus(size, args):
+    return synthetic.make_papers(size, seed=args.seed, today=TODAY, num_days=NUM_DAYS,
+                                 tweets_per_paper=args.tweets_per_paper)
+
+
+@scenario('parse-bs4', 'entries')
+def parse_bs4(size, args, workdir):
+    return parse_pages(size, args, 'bs4')
+
+
+@scenario('parse-stream', 'entries')
+def parse_stream(size, args, workdir):
+    return parse_pages(size, args, 'stream')
+
+
+def parse_pages(size, args, parser):
+    papers = corpus(size, args)
+    pages = [synthetic.listing_page(papers, skip, 512) for skip in range(0, size, 512)]
+
+    def run():
+        return sum([len(list(entries)) for text in pages
+                    for _, entries in parse_listing(text, parser=parser)])
+    return run
+
+
+@scenario('crawl', 'papers')
+def crawl(size, args, workdir):
+    standin = ArxivStandIn(synthetic.strip_tweets(corpus(size, args)), latency=args.latency)
+
+    def run():
+        enricher = Enricher(interval=0, fetcher=standin)
+        crawler = Crawler(enricher=enricher, fetcher=standin)
+        data = crawler.crawl_recent(targets=['cs', 'stat.ML'], since=NUM_DAYS - 1,
+                                    today=TODAY)
+        return len(data['papers'])
+    return run
+
+
+@scenario('enrich', 'papers')
+def enrich(size, args, workdir):
+    papers = synthetic.strip_tweets(corpus(size, args))
+    standin = ArxivStandIn(papers, latency=args.latency)
+
+    def run():
+        stubs = [{'id': paper['id']} for paper in papers]
+        Enricher(interval=0, fetcher=standin).enrich(stubs)
+        return len(stubs)
+    return run
+
+
+@scenario('oai', 'papers')
+def oai(size, args, workdir):
+    standin = ArxivStandIn(synthetic.strip_tweets(corpus(size, args)), latency=args.latency)
+
+    def run():
+        crawler = OAICrawler(interval=0, fetcher=standin)
+        data = crawler.crawl_recent(targets=['cs', 'stat.ML'], since=NUM_DAYS - 1,
+                                    today=TODAY)
+        return len(data['papers'])
+    return run
+
+
+@scenario('tweet-search', 'papers')
+def tweet_search(size, args, workdir):
+    return search_tweets(size, args, None)
+
+
+@scenario('tweet-search-batched', 'papers')
+def tweet_search_batched(size, args, workdir):
+    return search_tweets(size, args, 512)
+
+
+def search_tweets(size, args, max_query_length):
+    papers = corpus(size, args)
+    backend = TweetStandIn(synthetic.all_tweets(papers), latency=args.latency)
+    papers = synthetic.strip_tweets(papers)
+
+    def run():
+        controller = AdaptiveRateController(interval=0, min_interval=0)
+        searcher = TweetSearcher(controller=controller, backend=backend,
+                                 max_query_length=max_query_length)
+        return len(searcher.search_all([dict(paper) for paper in papers]))
+    return run
+
+
+@scenario('scoring', 'papers')
+def scoring(size, args, workdir):
+    path = write_corpus(size, args, workdir)
+    papers = load(path)['papers']
+
+    def run():
+        engine = ScoreEngine(papers)
+        for index in engine.top_papers(0):
+            engine.top_tweets(index, 10)
+        return len(papers)
+    return run
+
+
+@scenario('daily_arxiv', 'papers')
+def daily_arxiv(size, args, workdir):
+    path = write_corpus(size, args, workdir)
+
+    def run():
+        data = load(path)
+        DailyArxivWriter().save_markdown(data, workdir / 'daily_arxiv.md')
+        return len(data['papers'])
+    return run
+
+
+@scenario('daily_arxiv-cluster', 'papers')
+def daily_arxiv_cluster(size, args, workdir):
+    path = write_corpus(size, args, workdir)
+
+    def run():
+        data = load(path)
+        writer = DailyArxivWriter(clusterer=PaperClusterer())
+        writer.save_markdown(data, workdir / 'daily_arxiv.md')
+        return len(data['papers'])
+    return run
+
+
+@scenario('twitter_highlight', 'papers')
+def twitter_highlight(size, args, workdir):
+    path = write_corpus(size, args, workdir)
+
+    def run():
+        data = load(path)
+        writer = TwitterHighlightWriter(resolver=make_resolver(args))
+        writer.save_markdown(data, workdir / 'twitter_highlights.md')
+        return len(data['papers'])
+    return run
+
+
+@scenario('blog', 'papers')
+def blog(size, args, workdir):
+    path = write_corpus(size, args, workdir)
+
+    def run():
+        data = load(path)
+        writer = HotPaperBlogWriter(resolver=make_resolver(args))
+        writer.save_markdown(data, workdir / 'blog.md')
+        return len(data['papers'])
+    return run
+
+
+@scenario('search', 'papers')
+def search(size, args, workdir):
+    papers = synthetic.strip_tweets(corpus(size, args))
+    path = workdir / 'index'
+    queries = ['diffusion robotics', '"neural network"', 'title:transformer subject:cs.CV',
+               'author:"author 42"', 'federated privacy benchmark']
+
+    def run():
+        shutil.rmtree(path, ignore_errors=True)
+        update_index(path, papers)
+        index = SearchIndex(path)
+        for query in queries:
+            index.search(query, k=20)
+        return len(papers)
+    return run
+
+
+def make_resolver(args):
+    return OEmbedResolver(TwitterApiStandIn(latency=args.latency), interval=0)
+
+
+def write_corpus(size, args, workdir):
+    path = workdir / f'papers_{size}.json'
+    if not path.exists():
+        papers = corpus(size, args)
+        until = TODAY + datetime.timedelta(days=1)
+        since = until - datetime.timedelta(days=NUM_DAYS)
+        dump({'meta': {'since': since.strftime('%Y/%m/%d'), 'until': until.strftime('%Y/%m/%d')},
+              'papers': papers}, path)
+    return path
+
+
+def measure(run, repeat, trace):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        items = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if trace:
+        gc.collect()
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return items, best, peak
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline):
+    previous = {(_['scenario'], _['size']): _ for _ in json.load(open(baseline))['results']}
+    print(f'\ncompared with {baseline}:')
+    for result in results:
+        before = previous.get((result['scenario'], result['size']))
+        if before is None:
+            continue
+        print(f'{result["scenario"]:>22} {result["size"]:>7}: '
+              f'{before["seconds"] / result["seconds"]:5.2f}x speed')
+
+
+def main(args):
+    # the per-paper log lines would dominate the timings
+    logger.disable('dx')
+    workdir = Path(tempfile.mkdtemp())
+    results = []
+    try:
+        for name in args.scenarios:
+            setup, unit = SCENARIOS[name]
+            for size in args.sizes:
+                run = setup(size, args, workdir)
+                items, seconds, peak = measure(run, args.repeat, not args.no_memory)
+                result = {'scenario': name, 'size': size, 'items': items, 'unit': unit,
+                          'seconds': seconds, 'throughput': items / seconds,
+                          'peak_memory': peak}
+                results.append(result)
+                memory = f'{peak / 1e6:8.1f} MB' if peak is not None else ''
+                print(f'{name:>22} {size:>7}: {seconds:8.3f}s  '
+                      f'{items / seconds:10.1f} {unit}/s  {memory}', flush=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output_file = args.output_file
+    if output_file is None:
+        output_file = Path('result/benchmarks') / (time.strftime('%Y%m%d-%H%M%S') + '.json')
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    meta = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': git_commit(),
+            'python': sys.version.split()[0], 'platform': platform.platform(),
+            'repeat': args.repeat, 'latency': args.latency,
+            'tweets_per_paper': args.tweets_per_paper, 'seed': args.seed}
+    json.dump({'meta': meta, 'results': results}, open(output_file, 'w'), indent=1)
+    logger.info(f'saved {output_file}')
+    if args.baseline is not None:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    main(args)
@@ -0,0 +1,114 @@
+'''
+In-process stand-ins for the remote services, serving a synthetic corpus
+(see synthetic.py) with an optional fixed latency per request:
+
+- ArxivStandIn: a fetcher (dx.fetch) for the listing pages, the arXiv API
+  and OAI-PMH, to plug into Crawler, OAICrawler and Enricher
+- TweetStandIn: a TweetSearcher backend for the tweets of the corpus
+- TwitterApiStandIn: the oEmbed endpoint of twitter.Api
+'''
+
+import datetime
+import re
+import time
+from urllib.parse import urlparse, parse_qs
+from dx.fetch import Response
+from dx.listing import in_category
+from dx.tweets import LocalBackend
+import synthetic
+
+
+class ArxivStandIn:
+
+    def __init__(self, papers, latency=0.0, oai_page_size=1000):
+        # papers of every category, newest first as in the listing pages
+        self.papers = papers
+        self.papers_by_id = {paper['id']: paper for paper in papers}
+        self.latency = latency
+        self.oai_page_size = oai_page_size
+        self._categories = {}
+        self.num_requests = 0
+        self.num_bytes = 0
+
+    def category(self, cat):
+        if cat not in self._categories:
+            self._categories[cat] = [
+                paper for paper in self.papers
+                if any([in_category(_.rsplit('(', 1)[1][:-1], cat) for _ in paper['subjects']])]
+        return self._categories[cat]
+
+    def get(self, url, headers=None):
+        if self.latency:
+            time.sleep(self.latency)
+        u = urlparse(url)
+        query = {key: values[0] for key, values in parse_qs(u.query).items()}
+        if u.path.startswith('/list/'):
+            papers = self.category(u.path.split('/')[2])
+            text = synthetic.listing_page(papers, int(query.get('skip', 0)),
+                                          int(query['show']))
+        elif u.path.startswith('/api/query'):
+            ids = query['id_list'].split(',')
+            text = synthetic.atom_feed([self.papers_by_id[_] for _ in ids
+                                        if _ in self.papers_by_id])
+        elif u.path.startswith('/oai2'):
+            text = self.list_records(query)
+        else:
+            return Response(url, 404, {}, b'')
+        content = text.encode('utf-8')
+        self.num_requests += 1
+        self.num_bytes += len(content)
+        return Response(url, 200, {'content-type': 'text/html; charset=utf-8'}, content)
+
+    def list_records(self, query):
+        # the resumption token is '{set}|{from}|{until}|{offset}'
+        if 'resumptionToken' in query:
+            set_spec, start, end, offset = query['resumptionToken'].split('|')
+            offset = int(offset)
+        else:
+            set_spec, start, end, offset = query['set'], query['from'], query['until'], 0
+        papers = [paper for paper in self.category(set_spec)
+                  if start <= announced(paper) <= end]
+        page = papers[offset:offset + self.oai_page_size]
+        offset += len(page)
+        token = f'{set_spec}|{start}|{end}|{offset}' if offset < len(papers) else None
+        return synthetic.oai_page(page, token)
+
+
+def announced(paper):
+    return datetime.datetime.strptime(paper['date'], synthetic.DATE_FORMAT).strftime('%Y-%m-%d')
+
+
+class TweetStandIn(LocalBackend):
+    '''
+    LocalBackend with the tweets indexed by the arXiv id they cite, so that
+    a search costs as much as the tweets it returns.
+    '''
+
+    r_id = re.compile(r'arxiv\.org/abs/(\S+)')
+
+    def __init__(self, tweets, latency=0.0):
+        super().__init__(tweets)
+        self.latency = latency
+        self.tweets_by_id = {}
+        for tweet in tweets:
+            for arxiv_id in self.r_id.findall(tweet['tweet']):
+                self.tweets_by_id.setdefault(arxiv_id, []).append(tweet)
+
+    def search(self, query, limit=100, since=None):
+        if self.latency:
+            time.sleep(self.latency)
+        result = []
+        for arxiv_id in self.r_url.findall(query)[1:]:
+            result.extend(self.tweets_by_id.get(arxiv_id, []))
+        return result[:limit]
+
+
+class TwitterApiStandIn:
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def GetStatusOembed(self, url):
+        if self.latency:
+            time.sleep(self.latency)
+        return {'html': f'<blockquote class="twitter-tweet"><a href="{url}"></a></blockquote>\n'}
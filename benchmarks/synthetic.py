@@ -0,0 +1,187 @@
+'''
+Synthetic corpora for the benchmarks: crawled papers (optionally with
+tweets), and the listing pages, arXiv API feeds and OAI-PMH responses they
+would be crawled from. Everything is drawn from a seeded random.Random, so
+a given size and seed always give the same corpus.
+'''
+
+import datetime
+import random
+from html import escape
+
+
+SUBJECTS = [('Machine Learning', 'cs.LG'), ('Computer Vision and Pattern Recognition', 'cs.CV'),
+            ('Computation and Language', 'cs.CL'), ('Robotics', 'cs.RO'),
+            ('Cryptography and Security', 'cs.CR'), ('Information Retrieval', 'cs.IR'),
+            ('Hardware Architecture', 'cs.AR'), ('Machine Learning', 'stat.ML')]
+
+WORDS = ['learning', 'neural', 'network', 'diffusion', 'model', 'robotics', 'robot',
+         'policy', 'language', 'vision', 'graph', 'attention', 'transformer', 'privacy',
+         'reinforcement', 'optimization', 'generative', 'adversarial', 'federated',
+         'causal', 'inference', 'benchmark', 'dataset', 'segmentation', 'detection']
+
+# the 'date' of a paper, as in the listing pages
+DATE_FORMAT = '%a, %d %b %Y'
+
+
+def make_papers(num_papers, seed=0, today=datetime.datetime(2020, 11, 6), num_days=5,
+                tweets_per_paper=0.0):
+    '''
+    `num_papers` crawled papers announced over the `num_days` days up to
+    `today`, newest first, with about `tweets_per_paper` tweets each.
+    '''
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) for i in range(len(WORDS))]
+    papers = []
+    num_tweets = 0
+    for i in range(num_papers):
+        arxiv_id = f'2011.{i:05d}'
+        date = today - datetime.timedelta(days=i * num_days // num_papers)
+        subjects = rng.sample(SUBJECTS, rng.randint(1, 3))
+        paper = {'date': date.strftime(DATE_FORMAT),
+                 'links': {'Abstract': f'https://arxiv.org/abs/{arxiv_id}',
+                           'Download PDF': f'https://arxiv.org/pdf/{arxiv_id}',
+                           'Other formats': f'https://arxiv.org/format/{arxiv_id}'},
+                 'id': arxiv_id,
+                 'title': ' '.join(rng.choices(WORDS, weights, k=8)).title(),
+                 'authors': [f'Author {rng.randrange(20000)}' for _ in range(rng.randint(1, 8))],
+                 'comments': '10 pages, 3 figures' if rng.random() < 0.5 else None,
+                 'subjects': [f'{name} ({code})' for name, code in subjects],
+                 'summary': ' '.join(rng.choices(WORDS, weights, k=rng.randint(100, 250)))}
+        if tweets_per_paper:
+            tweets = []
+            for _ in range(int(rng.expovariate(1 / tweets_per_paper))):
+                tweets.append(make_tweet(rng, num_tweets, arxiv_id, date))
+                num_tweets += 1
+            paper['tweets'] = tweets
+        papers.append(paper)
+    return papers
+
+
+def make_tweet(rng, i, arxiv_id, date):
+    created = date + datetime.timedelta(seconds=rng.randrange(3 * 86400))
+    tweet_id = 1300000000000000000 + i
+    return {'id': tweet_id,
+            'name': f'user {rng.randrange(5000)}',
+            'username': f'user{rng.randrange(5000)}',
+            'datestamp': created.strftime('%Y-%m-%d'),
+            'timestamp': created.strftime('%H:%M:%S'),
+            'link': f'https://twitter.com/user/status/{tweet_id}',
+            'tweet': f'Check out our new paper https://arxiv.org/abs/{arxiv_id} ' + 'x' * 120,
+            'retweets_count': int(rng.paretovariate(1.2)) - 1,
+            'likes_count': int(rng.paretovariate(1.0)) - 1}
+
+
+def all_tweets(papers):
+    return [tweet for paper in papers for tweet in paper.get('tweets', [])]
+
+
+def strip_tweets(papers):
+    return [{key: value for key, value in paper.items() if key != 'tweets'}
+            for paper in papers]
+
+
+def listing_page(papers, skip, show):
+    '''
+    /list/{cat}/pastweek?skip={skip}&show={show} of `papers` (newest first).
+    '''
+    out = ['<html><body><div id="dlpage">',
+           f'<small>[ total of {len(papers)} entries: ... ]</small>\n']
+    date = None
+    for paper in papers[skip:skip + show]:
+        if paper['date'] != date:
+            if date is not None:
+                out.append('</dl>\n')
+            date = paper['date']
+            day = datetime.datetime.strptime(date, DATE_FORMAT)
+            out.append(f'<h3>{day.strftime("%a")}, {day.day} {day.strftime("%b %Y")} '
+                       f'(showing {show} entries)</h3>\n<dl>\n')
+        arxiv_id = paper['id']
+        out.append('<dt><a name="item1">[1]</a>&nbsp; <span class="list-identifier">'
+                   f'<a href="/abs/{arxiv_id}" title="Abstract">arXiv:{arxiv_id}</a> '
+                   f'[<a href="/pdf/{arxiv_id}" title="Download PDF">pdf</a>, '
+                   f'<a href="/format/{arxiv_id}" title="Other formats">other</a>]</span></dt>\n')
+        authors = ', \n'.join([f'<a href="/a/{i}">{escape(_)}</a>'
+                               for i, _ in enumerate(paper['authors'])])
+        comments = ''
+        if paper['comments'] is not None:
+            comments = ('<div class="list-comments mathjax"><span class="descriptor">'
+                        f'Comments:</span> {escape(paper["comments"])}</div>\n')
+        out.append('<dd><div class="meta">\n'
+                   '<div class="list-title mathjax"><span class="descriptor">Title:</span> '
+                   f'{escape(paper["title"])}\n</div>\n'
+                   '<div class="list-authors"><span class="descriptor">Authors:</span> '
+                   f'{authors}</div>\n{comments}'
+                   '<div class="list-subjects"><span class="descriptor">Subjects:</span> '
+                   f'<span class="primary-subject">{escape(paper["subjects"][0])}</span>'
+                   + ''.join(['; ' + escape(_) for _ in paper['subjects'][1:]])
+                   + '</div>\n</div>\n</dd>\n')
+    if date is not None:
+        out.append('</dl>\n')
+    out.append('</div></body></html>')
+    return ''.join(out)
+
+
+def atom_feed(papers):
+    '''
+    arXiv API (export.arxiv.org/api/query) response with `papers`.
+    '''
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<feed xmlns="http://www.w3.org/2005/Atom" '
+           'xmlns:arxiv="http://arxiv.org/schemas/atom">\n']
+    for paper in papers:
+        arxiv_id = paper['id']
+        primary = paper['subjects'][0].rsplit('(', 1)[1][:-1]
+        out.append('<entry>\n'
+                   f'<id>http://arxiv.org/abs/{arxiv_id}v1</id>\n'
+                   '<updated>2020-11-01T00:00:00Z</updated>\n'
+                   '<published>2020-11-01T00:00:00Z</published>\n'
+                   f'<title>{escape(paper["title"])}</title>\n'
+                   f'<summary>  {escape(paper["summary"])}\n</summary>\n'
+                   + ''.join([f'<author><name>{escape(_)}</name></author>\n'
+                              for _ in paper['authors']])
+                   + f'<link href="http://arxiv.org/abs/{arxiv_id}v1" rel="alternate" '
+                   'type="text/html"/>\n'
+                   f'<link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}v1" '
+                   'rel="related" type="application/pdf"/>\n'
+                   f'<arxiv:primary_category term="{primary}" '
+                   'scheme="http://arxiv.org/schemas/atom"/>\n'
+                   '</entry>\n')
+    out.append('</feed>\n')
+    return ''.join(out)
+
+
+def oai_page(papers, token=None):
+    '''
+    OAI-PMH ListRecords response (arXiv metadata format) with `papers`,
+    followed by resumption token `token`.
+    '''
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">\n'
+           '<responseDate>2020-11-06T00:00:00Z</responseDate>\n<ListRecords>\n']
+    for paper in papers:
+        arxiv_id = paper['id']
+        date = datetime.datetime.strptime(paper['date'], DATE_FORMAT)
+        day = date.strftime('%Y-%m-%d')
+        # submitted on the weekday before it was announced
+        submitted = date - datetime.timedelta(days=1)
+        while submitted.weekday() >= 5:
+            submitted -= datetime.timedelta(days=1)
+        categories = ' '.join([_.rsplit('(', 1)[1][:-1] for _ in paper['subjects']])
+        authors = ''.join([f'<author><keyname>{escape(_.split()[-1])}</keyname>'
+                           f'<forenames>{escape(" ".join(_.split()[:-1]))}</forenames></author>'
+                           for _ in paper['authors']])
+        comments = (f'<comments>{escape(paper["comments"])}</comments>'
+                    if paper['comments'] is not None else '')
+        out.append(f'<record><header><identifier>oai:arXiv.org:{arxiv_id}</identifier>'
+                   f'<datestamp>{day}</datestamp><setSpec>cs</setSpec></header>'
+                   '<metadata><arXiv xmlns="http://arxiv.org/OAI/arXiv/">'
+                   f'<id>{arxiv_id}</id><created>{submitted:%Y-%m-%d}</created>'
+                   f'<authors>{authors}</authors><title>{escape(paper["title"])}</title>'
+                   f'<categories>{categories}</categories>{comments}'
+                   f'<abstract>{escape(paper["summary"])}</abstract>'
+                   '</arXiv></metadata></record>\n')
+    if token is not None:
+        out.append(f'<resumptionToken>{token}</resumptionToken>\n')
+    out.append('</ListRecords>\n</OAI-PMH>\n')
+    return ''.join(out)
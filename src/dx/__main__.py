@@ -0,0 +1,4 @@
+from dx.cli import main
+
+
+main()
@@ -0,0 +1,146 @@
+import json
+import datetime
+import threading
+from pathlib import Path
+from dx.dates import announced_date
+
+
+class CrawlCheckpoint:
+    '''
+    Persistent state of incremental crawls.
+
+    For every category it keeps the range of announcement dates already
+    crawled ('oldest' ~ 'newest') and the ids seen in that range. The
+    progress of the running crawl is appended to a log next to it (e.g.
+    checkpoint.pending.jsonl) after every listing page, with the papers of
+    that page only, so that an interrupted crawl resumes from the last
+    completed page. Pending progress is merged into the per-category state
+    only by commit(), once the crawl has finished.
+    '''
+
+    def __init__(self, path, keep_days=14):
+        self.path = Path(path)
+        self.log_path = self.path.with_suffix('.pending.jsonl')
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self.state = json.load(open(self.path))
+        else:
+            self.state = {'categories': {}, 'pending': None}
+        # progress of the pending crawl per category
+        self._progress = {}
+        if self.state['pending'] is not None:
+            self._progress = self.state['pending'].pop('categories', {})
+            self._replay()
+
+    def _replay(self):
+        if not self.log_path.exists():
+            return
+        size = 0
+        with open(self.log_path, 'rb+') as f:
+            for line in f:
+                try:
+                    record = json.loads(line) if line.endswith(b'\n') else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    # the last line of an interrupted write, cut off
+                    f.truncate(size)
+                    break
+                size += len(line)
+                progress = self._progress.setdefault(record['cat'], {'skip': 0, 'papers': [],
+                                                                     'done': False})
+                progress['skip'] = record['skip']
+                progress['papers'].extend(record['papers'])
+                progress['done'] = record['done']
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        json.dump(self.state, open(tmp_path, 'w'))
+        tmp_path.replace(self.path)
+
+    def begin(self, metadata, num_shows):
+        window = [metadata['since'], metadata['until'], num_shows]
+        with self._lock:
+            pending = self.state['pending']
+            if pending is None or pending['window'] != window:
+                self.state['pending'] = {'window': window}
+                self._progress = {}
+                self.log_path.unlink(missing_ok=True)
+                self.save()
+                return False
+            return True
+
+    def category(self, cat):
+        return self.state['categories'].get(cat, {'oldest': None,
+                                                  'newest': None,
+                                                  'seen': {}})
+
+    def seen(self, cat):
+        return set(self.category(cat)['seen'])
+
+    def seen_between(self, cat, start_date, end_date):
+        # ids seen in [start_date, end_date), newest first, in listing order
+        start = start_date.strftime('%Y-%m-%d')
+        end = end_date.strftime('%Y-%m-%d')
+        seen = self.category(cat)['seen']
+        ids = [arxiv_id for arxiv_id, date in seen.items() if start <= date < end]
+        return sorted(ids, key=lambda arxiv_id: seen[arxiv_id], reverse=True)
+
+    def covers(self, cat, start_date):
+        oldest = self.category(cat)['oldest']
+        return oldest is not None and oldest <= start_date.strftime('%Y-%m-%d')
+
+    def progress(self, cat):
+        with self._lock:
+            progress = self._progress.get(cat, {'skip': 0, 'papers': [], 'done': False})
+            return {**progress, 'papers': list(progress['papers'])}
+
+    def page_done(self, cat, skip, papers, done=False):
+        # `papers` are all the papers of cat so far, only the ones added
+        # since the last call are written
+        with self._lock:
+            progress = self._progress.setdefault(cat, {'skip': 0, 'papers': [], 'done': False})
+            new_papers = papers[len(progress['papers']):]
+            progress['skip'] = skip
+            progress['papers'].extend(new_papers)
+            progress['done'] = done
+            with open(self.log_path, 'a') as fout:
+                fout.write(json.dumps({'cat': cat, 'skip': skip, 'papers': new_papers,
+                                       'done': done}) + '\n')
+
+    def commit(self, start_date, end_date):
+        start = start_date.strftime('%Y-%m-%d')
+        last = (end_date - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        with self._lock:
+            for cat, progress in self._progress.items():
+                state = self.category(cat)
+                oldest, newest = state['oldest'], state['newest']
+                if oldest is not None and self._adjoins(start, last, oldest, newest):
+                    state['oldest'] = min(oldest, start)
+                    state['newest'] = max(newest, last)
+                else:
+                    state['oldest'], state['newest'] = start, last
+                for paper in progress['papers']:
+                    state['seen'][paper['id']] = announced_date(paper)
+                self._prune(state)
+                self.state['categories'][cat] = state
+            self.state['pending'] = None
+            self._progress = {}
+            self.save()
+            self.log_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _adjoins(start, last, oldest, newest):
+        def day(s):
+            return datetime.datetime.strptime(s, '%Y-%m-%d')
+        one_day = datetime.timedelta(days=1)
+        return day(start) <= day(newest) + one_day and day(last) + one_day >= day(oldest)
+
+    def _prune(self, state):
+        # the listing pages only go back a week, older ids are never met again
+        limit = (datetime.datetime.strptime(state['newest'], '%Y-%m-%d')
+                 - datetime.timedelta(days=self.keep_days)).strftime('%Y-%m-%d')
+        state['seen'] = {arxiv_id: date for arxiv_id, date in state['seen'].items()
+                         if date >= limit}
@@ -0,0 +1,83 @@
+import re
+import json
+from functools import lru_cache
+
+
+r_subject = re.compile(r'.+ \((?P<subject>.+)\)')
+
+
+@lru_cache(maxsize=None)
+def parse_subject(subject):
+    # 'Machine Learning (cs.LG)' -> 'cs.LG'
+    return r_subject.search(subject).group('subject')
+
+
+def subject_tags(paper):
+    return [parse_subject(_) for _ in paper['subjects']]
+
+
+class Tier:
+    '''
+    A section of the digest. Papers whose primary subject is in `tags`
+    belong to it; a tier with `tags=None` takes the papers no other tier
+    claims.
+    '''
+
+    def __init__(self, name, tags=None, show_tags=False):
+        self.name = name
+        self.tags = None if tags is None else list(tags)
+        self.show_tags = show_tags
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['name'], d.get('tags'), d.get('show_tags', False))
+
+
+def default_tiers(favorite_tags, unfavorite_tags):
+    return [Tier('High-Priority', favorite_tags, show_tags=True),
+            Tier('Middle-Priority'),
+            Tier('Low-Priority', unfavorite_tags)]
+
+
+def load_tiers(path):
+    '''
+    Tiers from a JSON list such as
+    [{"name": "Vision", "tags": ["cs.CV"], "show_tags": true}, {"name": "Other"}]
+    '''
+    return [Tier.from_dict(d) for d in json.load(open(path))]
+
+
+class Classifier:
+    '''
+    Assigns papers to tiers in a single pass, with a dict lookup of the
+    primary subject, and sorts every tier by primary subject.
+    '''
+
+    def __init__(self, tiers, require_pdf=True):
+        self.tiers = tiers
+        self.require_pdf = require_pdf
+        self.tier_of_tag = {}
+        self.default = None
+        for i, tier in enumerate(tiers):
+            if tier.tags is None:
+                assert(self.default is None)
+                self.default = i
+                continue
+            for tag in tier.tags:
+                assert(tag not in self.tier_of_tag)
+                self.tier_of_tag[tag] = i
+
+    def classify(self, papers):
+        '''
+        Returns [(tier, [(paper, tags), ...]), ...] in the order of the tiers.
+        '''
+        buckets = [[] for _ in self.tiers]
+        for paper in papers:
+            if self.require_pdf and 'Download PDF' not in paper['links']:
+                continue
+            tags = subject_tags(paper)
+            i = self.tier_of_tag.get(tags[0], self.default)
+            if i is not None:
+                buckets[i].append((paper, tags))
+        return [(tier, sorted(bucket, key=lambda _: _[0]['subjects'][0]))
+                for tier, bucket in zip(self.tiers, buckets)]
@@ -0,0 +1,45 @@
+'''
+Single entry point of the tools, installed as the `dx` command:
+
+    $ dx crawl --since 1 --until 1
+    $ PYTHONPATH=src python -m dx render daily_arxiv
+
+Every command runs the module of dx.tools with the remaining arguments,
+so only the modules (and clients) of that command are imported.
+'''
+
+import sys
+import argparse
+import runpy
+
+
+COMMANDS = {
+    'crawl': ('crawl_arxiv', 'crawl arXiv papers (listing pages or OAI-PMH)'),
+    'search': ('search_twitter', 'search tweets about the crawled papers'),
+    'render': ('create_markdown', 'write the markdown files (daily_arxiv, twitter_highlight, '
+               'blog, render-all)'),
+    'pipeline': ('pipeline', 'crawl, search and render in a single process'),
+    'papers': ('search_papers', 'full-text index and search of the crawled papers'),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        'dx', description='\n'.join([f'  {name:<10}{help}' for name, (_, help) in COMMANDS.items()]),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=list(COMMANDS), metavar='command',
+                        help='one of the above, then its own options (dx COMMAND -h)')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tool, _ = COMMANDS[args.command]
+    sys.argv = [f'dx {args.command}'] + args.args
+    runpy.run_module(f'dx.tools.{tool}', run_name='__main__')
+
+
+if __name__ == '__main__':
+
+    main()
@@ -0,0 +1,257 @@
+'''
+Topical clusters and near-duplicates of a set of papers.
+
+Titles and abstracts are turned into L2-normalized TF-IDF vectors (a sparse
+matrix, built in one pass) which are grouped by spherical k-means.
+Near-duplicates (replacements, the same work submitted twice) are found
+with MinHash signatures of word shingles and LSH banding, and confirmed by
+the fraction of agreeing signature values.
+'''
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from dx.search import tokenize
+from dx.metrics import metrics
+
+
+STOP_WORDS = frozenset('''
+a an and are as at be by can for from has have in is it its of on or our that
+the their these this to we which with via using based show also than such not
+been into more new two over both while however paper propose proposed results
+method methods approach work
+'''.split())
+
+
+def paper_text(paper):
+    return paper['title'] + ' ' + (paper.get('summary') or '')
+
+
+def is_word(token):
+    return len(token) > 2 and token not in STOP_WORDS and not token[0].isdigit()
+
+
+def tokenize_all(texts):
+    '''
+    The tokens of every text as arrays of token ids, and the tokens.
+    '''
+    vocab = {}
+    docs = [np.array([vocab.setdefault(token, len(vocab)) for token in tokenize(text)],
+                     dtype=np.int64)
+            for text in texts]
+    return docs, list(vocab)
+
+
+def tfidf_matrix(docs, tokens, min_df=2, max_df=0.5):
+    '''
+    (documents x terms) CSR matrix of L2-normalized, sublinear TF-IDF of
+    the words of `docs` (arrays of ids into `tokens`), and the terms of its
+    columns.
+    '''
+    words = np.array([is_word(_) for _ in tokens], dtype=bool)
+    docs = [doc[words[doc]] for doc in docs]
+    indptr = np.zeros(len(docs) + 1, dtype=np.int64)
+    np.cumsum([len(_) for _ in docs], out=indptr[1:])
+    indices = np.concatenate(docs) if docs else np.zeros(0, dtype=np.int64)
+    counts = sp.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                           shape=(len(docs), len(tokens)))
+    counts.sum_duplicates()
+
+    df = np.bincount(counts.indices, minlength=len(tokens))
+    keep = words & (df >= min(min_df, len(docs))) & (df <= max(1, max_df * len(docs)))
+    columns = np.flatnonzero(keep)
+    counts = counts[:, columns]
+    terms = [tokens[_] for _ in columns]
+
+    idf = np.log((1 + len(docs)) / (1 + df[columns])) + 1
+    matrix = counts.copy()
+    matrix.data = 1 + np.log(matrix.data)
+    matrix = matrix @ sp.diags(idf.astype(np.float32))
+    return normalize_rows(matrix.tocsr()), terms
+
+
+def normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.diags(1 / norms) @ matrix
+
+
+def kmeans(matrix, num_clusters, num_iters=10, num_rounds=10, seed=0):
+    '''
+    Spherical k-means: returns the cluster of every row and the normalized
+    centroids. The initial centroids are drawn like k-means++, but a batch
+    at a time so that there are only `num_rounds` passes over the rows.
+    '''
+    rng = np.random.RandomState(seed)
+    num_rows = matrix.shape[0]
+    num_clusters = max(1, min(num_clusters, num_rows))
+    batch_size = -(-num_clusters // num_rounds)
+    chosen = []
+    distance = np.ones(num_rows)
+    while len(chosen) < num_clusters:
+        candidates = np.flatnonzero(distance > 1e-6)
+        if len(candidates) == 0:
+            break
+        p = distance[candidates] / distance[candidates].sum()
+        size = min(batch_size, num_clusters - len(chosen), len(candidates))
+        batch = rng.choice(candidates, size=size, replace=False, p=p)
+        chosen.extend(batch.tolist())
+        similarity = (matrix @ matrix[batch].T).toarray().max(axis=1)
+        distance = np.minimum(distance, 1 - similarity).clip(min=0)
+    centroids = matrix[chosen].toarray()
+
+    labels = np.full(num_rows, -1)
+    for _ in range(num_iters):
+        new_labels = np.asarray((matrix @ centroids.T).argmax(axis=1)).ravel()
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        assignment = sp.csr_matrix((np.ones(num_rows), (labels, np.arange(num_rows))),
+                                   shape=(len(centroids), num_rows))
+        sums = np.asarray((assignment @ matrix).todense())
+        norms = np.linalg.norm(sums, axis=1)
+        # an emptied cluster keeps its previous centroid
+        nonempty = norms > 0
+        centroids[nonempty] = sums[nonempty] / norms[nonempty, None]
+    return labels, centroids
+
+
+def minhash_signatures(docs, num_tokens, num_perm=64, seed=0, batch_size=8):
+    '''
+    (documents x num_perm) MinHash signatures of the 3-shingles of `docs`
+    (arrays of token ids below `num_tokens`), with multiply-shift hashing.
+    '''
+    rng = np.random.RandomState(seed)
+    a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    num_tokens = np.uint64(max(1, num_tokens))
+    shingles = []
+    for i, doc in enumerate(docs):
+        doc = doc.astype(np.uint64)
+        if len(doc) < 3:
+            # padded with a sentinel of its own, so that short documents
+            # (e.g. titles without an abstract) are not all alike
+            sentinel = num_tokens + np.uint64(i)
+            doc = np.concatenate([doc, np.full(3 - len(doc), sentinel, dtype=np.uint64)])
+        # wraps around for huge vocabularies, which is fine for a hash
+        shingles.append((doc[:-2] * num_tokens + doc[1:-1]) * num_tokens + doc[2:])
+    keys = np.concatenate(shingles)
+    starts = np.zeros(len(docs), dtype=np.int64)
+    np.cumsum([len(_) for _ in shingles[:-1]], out=starts[1:])
+    signatures = np.empty((len(docs), num_perm), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        for i in range(0, num_perm, batch_size):
+            hashed = (a[i:i + batch_size, None] * keys[None, :]
+                      + b[i:i + batch_size, None]) >> np.uint64(32)
+            signatures[:, i:i + batch_size] = np.minimum.reduceat(hashed, starts, axis=1).T
+    return signatures
+
+
+def near_duplicates(signatures, threshold=0.8, num_bands=16):
+    '''
+    Groups (lists of row indices, size > 1) of rows whose signatures agree
+    on at least `threshold` of their values. Candidates are the rows
+    sharing a band of the signature (LSH).
+    '''
+    num_rows, num_perm = signatures.shape
+    rows_per_band = num_perm // num_bands
+    if num_rows < 2:
+        return []
+
+    # every row is paired with the first row of each of its buckets
+    firsts = []
+    others = []
+    with np.errstate(over='ignore'):
+        for band in range(num_bands):
+            values = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+            keys = np.zeros(num_rows, dtype=np.uint64)
+            for column in values.T:
+                keys = keys * np.uint64(0x100000001b3) + column.astype(np.uint64)
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            leaders = first[inverse.ravel()]
+            candidates = leaders != np.arange(num_rows)
+            firsts.append(leaders[candidates])
+            others.append(np.flatnonzero(candidates))
+    pairs = np.unique(np.stack([np.concatenate(firsts), np.concatenate(others)], axis=1),
+                      axis=0)
+    # a band hash collision only adds a candidate, which is checked here
+    agree = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1) >= threshold
+    pairs = pairs[agree]
+
+    graph = sp.csr_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])),
+                          shape=(num_rows, num_rows))
+    _, components = connected_components(graph, directed=False)
+    order = np.argsort(components, kind='stable')
+    groups = np.split(order, np.flatnonzero(np.diff(components[order])) + 1)
+    groups = [group.tolist() for group in groups if len(group) > 1]
+    return sorted(groups)
+
+
+class Cluster:
+
+    def __init__(self, label, papers, duplicates):
+        self.label = label
+        # papers, most central first; duplicates maps a paper's id to the
+        # papers folded into it
+        self.papers = papers
+        self.duplicates = duplicates
+
+
+class PaperClusterer:
+    '''
+    Groups papers by topic, folding near-duplicates into their first
+    occurrence. With num_clusters=None there is about one cluster per
+    `papers_per_cluster` papers.
+    '''
+
+    def __init__(self, num_clusters=None, papers_per_cluster=30, duplicate_threshold=0.8,
+                 num_label_terms=3, seed=0):
+        self.num_clusters = num_clusters
+        self.papers_per_cluster = papers_per_cluster
+        self.duplicate_threshold = duplicate_threshold
+        self.num_label_terms = num_label_terms
+        self.seed = seed
+
+    @metrics.timed('cluster')
+    def cluster(self, papers):
+        '''
+        Returns the clusters of `papers`, largest first.
+        '''
+        if not papers:
+            return []
+        docs, tokens = tokenize_all([paper_text(paper) for paper in papers])
+
+        duplicates = {}
+        folded = np.zeros(len(papers), dtype=bool)
+        groups = near_duplicates(minhash_signatures(docs, len(tokens), seed=self.seed),
+                                 threshold=self.duplicate_threshold)
+        for group in groups:
+            group = sorted(group)
+            duplicates[papers[group[0]]['id']] = [papers[i] for i in group[1:]]
+            folded[group[1:]] = True
+        rows = np.flatnonzero(~folded)
+
+        matrix, terms = tfidf_matrix([docs[i] for i in rows], tokens)
+        num_clusters = self.num_clusters
+        if num_clusters is None:
+            num_clusters = max(1, round(len(rows) / self.papers_per_cluster))
+        if matrix.shape[1] == 0:
+            labels, centroids = np.zeros(len(rows), dtype=int), np.zeros((1, 0))
+        else:
+            labels, centroids = kmeans(matrix, num_clusters, seed=self.seed)
+        similarity = np.asarray(matrix @ centroids.T)[np.arange(len(rows)), labels]
+
+        clusters = []
+        for c in range(len(centroids)):
+            members = np.flatnonzero(labels == c)
+            if len(members) == 0:
+                continue
+            members = members[np.argsort(-similarity[members], kind='stable')]
+            top_terms = np.argsort(-centroids[c], kind='stable')[:self.num_label_terms]
+            label = ', '.join([terms[t] for t in top_terms if centroids[c, t] > 0]) or 'misc'
+            cluster_papers = [papers[rows[i]] for i in members]
+            clusters.append(Cluster(label, cluster_papers,
+                                    {p['id']: duplicates[p['id']] for p in cluster_papers
+                                     if p['id'] in duplicates}))
+        clusters.sort(key=lambda cluster: -len(cluster.papers))
+        return clusters
@@ -1,150 +1,283 @@
-import time
 import re
-import locale
+import time
 import datetime
-import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
-from bs4 import BeautifulSoup
-import arxiv
-
-
-locale.setlocale(locale.LC_TIME, 'en_US.UTF-8')
+from dx.fetch import HttpFetcher
+from dx.listing import parse_listing, listing_total, primary_subject, in_category
+from dx.dates import announced_date, listing_date, parse_listing_date
+from dx.metrics import metrics
 
 
 class Crawler:
 
     date_format = re.compile(r'^(?P<date>\S+, \d+ \S+ \d+)')
+    r_header = re.compile(r'<h3>([^<]*)</h3>')
 
-    def crawl_recent(self,
-                     targets=['cs', 'stat.ML'],
-                     since=0,
-                     until=0,
-                     num_shows=512):
-        assert(since >= until)
-        target_urls = {target: f'https://arxiv.org/list/{target}/pastweek'
-                       for target in targets}
-        cur_locale = locale.getlocale(locale.LC_TIME)
-        locale.setlocale(locale.LC_TIME, 'en_US.UTF-8')
+    def __init__(self, num_workers=4, max_per_host=4, enricher=None, store=None,
+                 checkpoint=None, dedup=None, keep_known=False, fetcher=None):
+        # the papers of previous incremental crawls are read back from the store
+        assert(checkpoint is None or store is not None)
+        self.num_workers = num_workers
+        self.enricher = enricher if enricher is not None else self.default_enricher()
+        self.store = store
+        self.checkpoint = checkpoint
+        # dx.dedup.DedupIndex of the papers of previous crawls; papers first
+        # seen before the crawled window are skipped unless keep_known
+        self.dedup = dedup
+        self.keep_known = keep_known
+        # anything with get(url) -> dx.fetch.Response, e.g. a CachingFetcher
+        self.fetcher = (fetcher if fetcher is not None
+                        else HttpFetcher(num_workers=num_workers, max_per_host=max_per_host))
 
-        # list papers
+    def default_enricher(self):
+        # the arXiv API client is only imported when it is used
+        from dx.enrich import Enricher
+        return Enricher()
+
+    def get(self, url):
+        return self.fetcher.get(url)
+
+    def target_url(self, target):
+        return f'https://arxiv.org/list/{target}/pastweek'
+
+    def enrich(self, papers, callback=None):
+        self.enricher.enrich(papers, callback=callback)
+
+    def parse_date(self, text):
+        s = self.date_format.search(text)
+        return parse_listing_date(s.group('date'))
+
+    def first_seen_before(self, arxiv_id, start):
+        # start is 'YYYY-MM-DD'
+        if self.dedup is None:
+            return False
+        seen = self.dedup.lookup(arxiv_id)
+        return seen is not None and seen[0] < start
+
+    def status(self, info, cat, start):
+        '''
+        'replacement' for a paper announced before the crawled window,
+        'cross-list' for a paper whose primary subject is not in `cat`,
+        'new' otherwise.
+        '''
+        if self.first_seen_before(info['id'], start):
+            return 'replacement'
+        if not in_category(primary_subject(info), cat):
+            return 'cross-list'
+        return 'new'
+
+    def iter_pages(self, url, num_shows=512, prefetch=1, skip=0, more=None):
+        # while a page is being parsed, up to `prefetch` following pages
+        # are already being downloaded in the background, as long as the
+        # last page received may be followed by more: the listing has more
+        # entries ('total of N entries'), and more(text) (e.g. the page does
+        # not reach the window start) holds
+        def fetch(skip):
+            if skip == 0:
+                page_url = url + f'?show={num_shows}'
+            else:
+                page_url = url + f'?skip={skip}&show={num_shows}'
+            logger.info(f'processing from {page_url}')
+            return skip, self.get(page_url).text
+
+        executor = ThreadPoolExecutor(max_workers=max(1, prefetch))
+        pending = deque([executor.submit(fetch, skip)])
+        next_skip = skip + num_shows
         try:
-            now = datetime.datetime.now()
-            today = datetime.datetime(now.year, now.month, now.day)
-            start_date = today - datetime.timedelta(since)
-            end_date = today - datetime.timedelta(days=until - 1)
-            metadata = {'since': start_date.strftime('%Y/%m/%d'),
-                        'until': end_date.strftime('%Y/%m/%d')}
-            logger.info(metadata)
-            papers = []
-            all_titles = set([])
-            for cat, url in target_urls.items():
-                logger.info(f'new target {cat} ({url})')
-                next_url = url + f'?show={num_shows}'
-                logger.info(f'processing from {next_url}')
-                res = requests.get(next_url)
-                soup = BeautifulSoup(res.text, 'lxml')
-                h3s = soup.find_all('h3')
-                dls = soup.find_all('dl')
-                num_processed = 0
-                while h3s:
-                    h3 = h3s.pop(0)
-                    dl = dls.pop(0)
-                    s = self.date_format.search(h3.text)
-                    logger.info(f'{h3.text}')
-                    date_str = s.group('date')
-                    print(date_str)
-                    elms = date_str.split()
-                    if len(elms[1]) == 1:
-                        elms[1] = '0' + elms[1]  # strptime
-                    elms[2] = {'Jun': 'June'}.get(elms[2], elms[2])
-                    date_str = ' '.join(elms)
-                    try:
-                        date = datetime.datetime.strptime(date_str,
-                                                          '%a, %d %B %Y')
-                    except ValueError:
-                        date = datetime.datetime.strptime(date_str,
-                                                          '%a, %d %b %Y')
+            while pending:
+                skip, text = pending.popleft().result()
+                total = listing_total(text)
+                if total is None:
+                    # no header (a layout change?): go on until a page is empty
+                    logger.warning(f'no entry count in {url}, skip={skip}')
+                    has_more = '<dt>' in text
+                else:
+                    has_more = skip + num_shows < total
+                has_more = has_more and (more is None or more(text))
+                if not has_more:
+                    for future in pending:
+                        future.cancel()
+                    pending.clear()
+                while has_more and len(pending) < prefetch:
+                    pending.append(executor.submit(fetch, next_skip))
+                    next_skip += num_shows
+                yield skip, text
+                # without prefetch, the next page is requested once this one is parsed
+                if has_more and not pending:
+                    pending.append(executor.submit(fetch, next_skip))
+                    next_skip += num_shows
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def crawl_category(self, cat, url, start_date, end_date,
+                       num_shows=512, prefetch=1, parser='stream'):
+        logger.info(f'new target {cat} ({url})')
+        checkpoint = self.checkpoint
+        skip = 0
+        papers = []
+        known = set([])
+        stop_at_known = False
+        if checkpoint is not None:
+            progress = checkpoint.progress(cat)
+            if progress['done']:
+                logger.info(f'[{cat}] already crawled, {len(progress["papers"])} entries')
+                return progress['papers']
+            skip = progress['skip']
+            papers = progress['papers']
+            if skip > 0:
+                logger.info(f'[{cat}] resuming from entry {skip}')
+            # the listing is ordered from newest to oldest, so once a known id
+            # is reached all the older entries of the window are known as well
+            known = checkpoint.seen(cat)
+            stop_at_known = checkpoint.covers(cat, start_date)
+        start = start_date.strftime('%Y-%m-%d')
+        skip_known = self.dedup is not None and not self.keep_known
+
+        # known entries are recognized from their id, before the rest of
+        # the entry is parsed
+        def is_known(arxiv_id):
+            return arxiv_id in known or (skip_known and self.first_seen_before(arxiv_id, start))
+
+        # pages older than the window are not requested
+        def more(text):
+            headers = self.r_header.findall(text)
+            return not headers or self.parse_date(headers[-1]) >= start_date
+
+        num_known = 0
+        pages = self.iter_pages(url, num_shows=num_shows, prefetch=prefetch,
+                                skip=skip, more=more)
+        try:
+            for skip, text in pages:
+                num_sections = 0
+                finished = False
+                page_start = time.perf_counter()
+                for header, entries in parse_listing(text, parser=parser, skip=is_known):
+                    num_sections += 1
+                    logger.info(f'[{cat}] {header}')
+                    date = self.parse_date(header)
                     if date >= end_date:
                         continue
                     if date < start_date:
+                        finished = True
                         break
-                    dts = dl.find_all('dt')
-                    dds = dl.find_all('dd')
-                    assert(len(dts) == len(dds))
-                    for dt, dd in zip(dts, dds):
-                        info = {}
-
-                        info['date'] = datetime.datetime.strftime(date,
-                                                                  '%a, %d %b %Y')
-
-                        # links
-                        links = {}
-                        for a in dt.span.find_all('a'):
-                            title = a['title']
-                            href = 'https://arxiv.org' + a['href']
-                            links[title] = href
-                        info['links'] = links
-
-                        info['id'] = info['links']['Abstract'].split('/')[-1]
-
-                        # title
-                        div = dd.div.find('div', class_='list-title')
-                        div.find('span', class_='descriptor').extract()
-                        title = div.text.strip()
-                        info['title'] = title
-                        if title in all_titles:
-                            logger.info(f'already processed: {title}')
+                    date_str = listing_date(date)
+                    for info in entries:
+                        if info['id'] in known:
+                            if stop_at_known:
+                                logger.info(f'[{cat}] reached known entry {info["id"]}')
+                                finished = True
+                                break
                             continue
-                        all_titles.add(title)
-                        logger.info(f'[{len(papers) + 1}] {title}')
-
-                        # authors
-                        div = dd.div.find('div', class_='list-authors')
-                        div.find('span', class_='descriptor').extract()
-                        authors = []
-                        for a in div.find_all('a'):
-                            authors.append(a.text)
-                        info['authors'] = authors
-
-                        # comments
-                        div = dd.div.find('div', class_='list-comments')
-                        if div is not None:
-                            div.find('span', class_='descriptor').extract()
-                            comments = ''.join([str(_).strip() for _ in div.contents
-                                                if str(_).strip()])
-                            info['comments'] = comments
-                        else:
-                            info['comments'] = None
-
-                        # handling href
-
-                        # subjects
-                        div = dd.div.find('div', class_='list-subjects')
-                        div.find('span', class_='descriptor').extract()
-                        subjects = [_.strip() for _
-                                    in div.text.strip().split(';')]
-                        info['subjects'] = subjects
-                        print(title, div.text.strip())
-
-                        papers.append(info)
-
-                    num_processed += len(dds)
-                    if len(h3s) == 0:
-                        num_skip = num_processed  # 5 is magic number margin
-                        next_url = url + f'?skip={num_skip}&show={num_shows}'
-                        time.sleep(0.1)
-                        res = requests.get(next_url)
-                        soup = BeautifulSoup(res.text, 'lxml')
-                        h3s = soup.find_all('h3')
-                        dls = soup.find_all('dl')
-                        if len(h3s) == 0:
-                            break
+                        if info.get('skipped'):
+                            num_known += 1
+                            continue
+                        info['status'] = self.status(info, cat, start)
+                        papers.append({'date': date_str, **info})
+                    if finished:
+                        break
+                metrics.observe('listing_page_seconds', time.perf_counter() - page_start,
+                                category=cat, parser=parser)
+                if finished or num_sections == 0:
+                    break
+                if checkpoint is not None:
+                    checkpoint.page_done(cat, skip + num_shows, papers)
         finally:
-            locale.setlocale(locale.LC_TIME, '.'.join(cur_locale))
+            pages.close()
+        if checkpoint is not None:
+            checkpoint.page_done(cat, skip, papers, done=True)
+        metrics.incr('papers_listed', len(papers), category=cat)
+        if num_known:
+            metrics.incr('papers_skipped', num_known, category=cat)
+            logger.info(f'[{cat}] skipped {num_known} entries of previous crawls')
+        logger.info(f'[{cat}] {len(papers)} entries')
+        return papers
+
+    def known_papers(self, cat, start_date, end_date):
+        # the papers of cat in the window found by previous incremental crawls
+        if self.checkpoint is None:
+            return []
+        ids = self.checkpoint.seen_between(cat, start_date, end_date)
+        if not ids:
+            return []
+        papers = [self.store.get(arxiv_id) for arxiv_id in ids]
+        papers = [paper for paper in papers if paper is not None]
+        if len(papers) < len(ids):
+            logger.warning(f'[{cat}] {len(ids) - len(papers)} entries of previous crawls '
+                           f'are missing from {self.store.path}')
+        logger.info(f'[{cat}] {len(papers)} entries of previous crawls')
+        return papers
+
+    def crawl_recent(self,
+                     targets=['cs', 'stat.ML'],
+                     since=0,
+                     until=0,
+                     num_shows=512,
+                     prefetch=1,
+                     parser='stream',
+                     on_papers=None,
+                     today=None):
+        # `today` (default: the current date) fixes the window, e.g. to
+        # replay a recorded crawl
+        assert(since >= until)
+        target_urls = {target: self.target_url(target) for target in targets}
+
+        # list papers
+        now = today if today is not None else datetime.datetime.now()
+        today = datetime.datetime(now.year, now.month, now.day)
+        start_date = today - datetime.timedelta(since)
+        end_date = today - datetime.timedelta(days=until - 1)
+        metadata = {'since': start_date.strftime('%Y/%m/%d'),
+                    'until': end_date.strftime('%Y/%m/%d')}
+        logger.info(metadata)
+        if self.checkpoint is not None:
+            if self.checkpoint.begin(metadata, num_shows):
+                logger.info('resuming the interrupted crawl')
+
+        # categories are crawled concurrently, but merged in target order
+        # so that the output (and the dedup by id below) is deterministic.
+        # The papers of a category are enriched (and handed to on_papers)
+        # while the following categories are still being crawled.
+        num_workers = max(1, min(self.num_workers, len(target_urls)))
+        papers = []
+        known = []
+        all_ids = set([])
+        first_seen = []
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(self.crawl_category, cat, url,
+                                       start_date, end_date,
+                                       num_shows, prefetch, parser)
+                       for cat, url in target_urls.items()]
+            for cat, future in zip(target_urls, futures):
+                cat_papers = []
+                for info in future.result():
+                    title = info['title']
+                    if info['id'] in all_ids:
+                        logger.info(f'already processed: {info["id"]} {title}')
+                        continue
+                    all_ids.add(info['id'])
+                    first_seen.append((info['id'], announced_date(info), cat))
+                    logger.info(f'[{len(papers) + len(cat_papers) + 1}] {title}')
+                    cat_papers.append(info)
+                papers.extend(cat_papers)
+                self.enrich(cat_papers, callback=on_papers)
+                # the entries of previous crawls are not listed again, but
+                # read back from the store, as they were enriched then
+                cat_known = [paper for paper in self.known_papers(cat, start_date, end_date)
+                             if paper['id'] not in all_ids]
+                all_ids.update([paper['id'] for paper in cat_known])
+                known.extend(cat_known)
+                if on_papers is not None and cat_known:
+                    on_papers(cat_known)
 
-        arxiv_infos = arxiv.query(id_list=[paper['id'] for paper in papers])
-        for paper, arxiv_info in zip(papers, arxiv_infos):
-            paper['summary'] = arxiv_info['summary'].strip()
-            paper['detail'] = arxiv_info
+        if self.store is not None:
+            logger.info(f'upserted {self.store.upsert(papers)} papers to {self.store.path}')
+        papers.extend(known)
+        if self.dedup is not None:
+            self.dedup.add_many(first_seen)
+            logger.info(f'{len(self.dedup)} papers in {self.dedup.path}')
+        if self.checkpoint is not None:
+            self.checkpoint.commit(start_date, end_date)
 
         return {'meta': metadata, 'papers': papers}
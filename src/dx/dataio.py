@@ -0,0 +1,103 @@
+'''
+Reading and writing crawl results.
+
+Two formats are supported, chosen by file name:
+
+- `.json`: a single {'meta': ..., 'papers': [...]} document (the original format)
+- `.jsonl`: a {'meta': ...} header line followed by one paper per line
+
+Either can be compressed by appending `.gz` or `.zst` (zstd needs the
+`zstandard` module).
+'''
+
+import io
+import gzip
+import json
+from pathlib import Path
+
+
+def is_jsonl(path):
+    return '.jsonl' in Path(path).suffixes
+
+
+def open_file(path, mode='rt'):
+    path = Path(path)
+    if 'w' in mode:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == '.gz':
+        return gzip.open(path, mode, encoding='utf-8' if 't' in mode else None)
+    if path.suffix == '.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(f'zstandard is required to read and write {path}')
+        binary_mode = mode.replace('t', '') + ('b' if 'b' not in mode else '')
+        fp = zstandard.open(path, binary_mode)
+        return io.TextIOWrapper(fp, encoding='utf-8') if 't' in mode else fp
+    return open(path, mode, encoding='utf-8' if 't' in mode else None)
+
+
+def iter_records(path):
+    '''
+    Returns (meta, papers) where papers iterates over the papers of the
+    file; for `.jsonl` files they are read one line at a time.
+    '''
+    if not is_jsonl(path):
+        with open_file(path) as fin:
+            data = json.load(fin)
+        return data['meta'], iter(data['papers'])
+
+    fin = open_file(path)
+    header = json.loads(fin.readline())
+
+    def papers():
+        with fin:
+            for line in fin:
+                if line.strip():
+                    yield json.loads(line)
+    return header['meta'], papers()
+
+
+def load(path):
+    meta, papers = iter_records(path)
+    return {'meta': meta, 'papers': list(papers)}
+
+
+class RecordWriter:
+    '''
+    Writes papers one at a time in the format given by the file name.
+    '''
+
+    def __init__(self, path, meta):
+        self.path = Path(path)
+        self.jsonl = is_jsonl(path)
+        self.fout = open_file(path, 'wt')
+        self.count = 0
+        if self.jsonl:
+            self.fout.write(json.dumps({'meta': meta}) + '\n')
+        else:
+            self.fout.write('{"meta": ' + json.dumps(meta) + ', "papers": [')
+
+    def write(self, paper):
+        if self.jsonl:
+            self.fout.write(json.dumps(paper) + '\n')
+        else:
+            self.fout.write((', ' if self.count else '') + json.dumps(paper))
+        self.count += 1
+
+    def close(self):
+        if not self.jsonl:
+            self.fout.write(']}')
+        self.fout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def dump(data, path):
+    with RecordWriter(path, data['meta']) as writer:
+        for paper in data['papers']:
+            writer.write(paper)
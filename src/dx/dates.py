@@ -0,0 +1,30 @@
+import datetime
+
+
+# the names of the listing dates, independent of the locale
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def listing_date(date):
+    # datetime -> 'Fri, 06 Nov 2020'
+    return f'{WEEKDAYS[date.weekday()]}, {date.day:02d} {MONTHS[date.month - 1]} {date.year}'
+
+
+def parse_listing_date(date_str):
+    # 'Fri, 06 Nov 2020' or 'Fri, 6 November 2020' -> datetime
+    _, day, month, year = date_str.replace(',', ' ').split()
+    return datetime.datetime(int(year), MONTHS.index(month[:3].title()) + 1, int(day))
+
+
+def announced_date(paper):
+    # 'Fri, 06 Nov 2020' -> '2020-11-06'
+    return parse_listing_date(paper['date']).strftime('%Y-%m-%d')
+
+
+def to_iso(date):
+    # accepts 'YYYY/MM/DD' (as in the crawl metadata), 'YYYY-MM-DD' or datetime
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        return date.strftime('%Y-%m-%d')
+    return date.replace('/', '-')
@@ -0,0 +1,136 @@
+import math
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+import numpy as np
+
+
+class BloomFilter:
+    '''
+    Set of strings with no false negatives and about `error_rate` false
+    positives while it holds at most `capacity` items.
+    '''
+
+    def __init__(self, capacity, error_rate=0.001, bits=None):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        num_bits = int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_bits = (num_bits + 7) // 8 * 8
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        if bits is None:
+            bits = np.zeros(self.num_bits // 8, dtype=np.uint8)
+        assert(len(bits) * 8 == self.num_bits)
+        self.bits = bits
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return np.array([(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)],
+                        dtype=np.int64)
+
+    def add(self, key):
+        positions = self._positions(key)
+        np.bitwise_or.at(self.bits, positions >> 3,
+                         (1 << (positions & 7)).astype(np.uint8))
+
+    def __contains__(self, key):
+        positions = self._positions(key)
+        return bool(np.all(self.bits[positions >> 3] & (1 << (positions & 7))))
+
+
+class DedupIndex:
+    '''
+    Persistent index of the arXiv ids met in previous crawls, with the date
+    and category each paper was first seen in.
+
+    Lookups go through an in-memory Bloom filter, so that the SQLite table
+    is only queried for ids which are (most likely) known. The filter is
+    saved along with the table by add_many() and rebuilt from the table if
+    it is missing, out of date or full.
+    '''
+
+    def __init__(self, path, capacity=1000000, error_rate=0.001):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS seen (
+                id TEXT PRIMARY KEY,
+                first_date TEXT NOT NULL,
+                category TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bloom (
+                capacity INTEGER NOT NULL,
+                error_rate REAL NOT NULL,
+                count INTEGER NOT NULL,
+                bits BLOB NOT NULL
+            );
+        ''')
+        self.error_rate = error_rate
+        self.bloom = self._load_bloom(capacity)
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def _load_bloom(self, capacity):
+        count = len(self)
+        row = self.conn.execute(
+            'SELECT capacity, error_rate, count, bits FROM bloom').fetchone()
+        if row is not None and row[1] == self.error_rate and row[2] == count and count < row[0]:
+            bits = np.frombuffer(row[3], dtype=np.uint8).copy()
+            return BloomFilter(row[0], row[1], bits=bits)
+        return self._rebuild(max(capacity, 2 * count))
+
+    def _rebuild(self, capacity):
+        bloom = BloomFilter(capacity, self.error_rate)
+        for (arxiv_id,) in self.conn.execute('SELECT id FROM seen'):
+            bloom.add(arxiv_id)
+        return bloom
+
+    def lookup(self, arxiv_id):
+        '''
+        (first_date, category) of a known paper, or None.
+        '''
+        if arxiv_id not in self.bloom:
+            return None
+        with self._lock:
+            row = self.conn.execute('SELECT first_date, category FROM seen WHERE id = ?',
+                                    (arxiv_id,)).fetchone()
+        return tuple(row) if row is not None else None
+
+    def __contains__(self, arxiv_id):
+        return self.lookup(arxiv_id) is not None
+
+    def add_many(self, entries):
+        '''
+        Records (id, first_date, category) of papers; ids already known
+        keep their first date and category.
+        '''
+        entries = list(entries)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO seen (id, first_date, category) VALUES (?, ?, ?)',
+                entries)
+            count = self.conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+            if count >= self.bloom.capacity:
+                self.bloom = self._rebuild(2 * count)
+            else:
+                for arxiv_id, _, _ in entries:
+                    self.bloom.add(arxiv_id)
+            self.conn.execute('DELETE FROM bloom')
+            self.conn.execute(
+                'INSERT INTO bloom (capacity, error_rate, count, bits) VALUES (?, ?, ?, ?)',
+                (self.bloom.capacity, self.bloom.error_rate, count, self.bloom.bits.tobytes()))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
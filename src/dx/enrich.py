@@ -0,0 +1,193 @@
+import re
+import json
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from loguru import logger
+import feedparser
+from dx.ratelimit import RateLimiter
+from dx.fetch import HttpFetcher, ReplayMiss
+from dx.metrics import metrics
+
+
+r_arxiv_id = re.compile(r'^(?:.*arxiv\.org/abs/)?(?P<id>.+?)(?:v\d+)?$')
+
+
+def normalize_id(arxiv_id):
+    return r_arxiv_id.match(arxiv_id.strip()).group('id')
+
+
+API_URL = 'http://export.arxiv.org/api/query'
+
+
+def query_url(id_list):
+    return API_URL + '?' + urlencode({'search_query': '',
+                                      'id_list': ','.join(id_list),
+                                      'start': 0,
+                                      'max_results': len(id_list),
+                                      'sortBy': 'relevance',
+                                      'sortOrder': 'descending'})
+
+
+def to_info(entry):
+    '''
+    API metadata of a feed entry, in the format of arxiv.query (0.5),
+    which older metadata caches and 'detail' fields were written with.
+    '''
+    info = dict(entry)
+    info['pdf_url'] = None
+    for link in info['links']:
+        if link.get('title') == 'pdf':
+            info['pdf_url'] = link['href']
+    info['affiliation'] = info.pop('arxiv_affiliation', 'None')
+    info['arxiv_url'] = info.pop('link')
+    info['title'] = info['title'].rstrip('\n')
+    info['summary'] = info['summary'].rstrip('\n')
+    info['authors'] = [author['name'] for author in info['authors']]
+    info['arxiv_comment'] = info['arxiv_comment'].rstrip() if 'arxiv_comment' in info else None
+    info['journal_reference'] = info.pop('arxiv_journal_ref', None)
+    info['doi'] = info.pop('arxiv_doi', None)
+    return info
+
+
+def parse_feed(content):
+    # the API answers an unknown id with an entry without title
+    return [to_info(entry) for entry in feedparser.parse(content)['entries']
+            if entry.get('title')]
+
+
+class MetadataCache:
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, arxiv_id):
+        return self.cache_dir / (arxiv_id.replace('/', '_') + '.json')
+
+    def get(self, arxiv_id):
+        path = self.path(arxiv_id)
+        if not path.exists():
+            return None
+        return json.load(open(path))
+
+    def put(self, arxiv_id, info):
+        path = self.path(arxiv_id)
+        tmp_path = path.with_suffix('.tmp')
+        json.dump(info, open(tmp_path, 'w'))
+        tmp_path.replace(path)
+
+
+class Enricher:
+    '''
+    Attaches the arXiv API metadata ('summary' and 'detail') to crawled papers.
+
+    Ids are queried in chunks of `chunk_size`, `num_workers` chunks at a time,
+    with at least `interval` seconds between two requests. Results are matched
+    back to papers by arXiv id, and are kept in `cache_dir` (if given) so that
+    a paper is never queried twice.
+
+    The API is queried through `fetcher` (see dx.fetch), an HttpFetcher
+    by default.
+    '''
+
+    def __init__(self,
+                 chunk_size=100,
+                 num_workers=2,
+                 interval=3.0,
+                 num_retries=3,
+                 cache_dir=None,
+                 fetcher=None):
+        self.chunk_size = chunk_size
+        self.fetcher = fetcher if fetcher is not None else HttpFetcher(num_workers=num_workers)
+        self.num_workers = num_workers
+        self.num_retries = num_retries
+        self.rate_limiter = RateLimiter(interval)
+        self.cache = MetadataCache(cache_dir) if cache_dir is not None else None
+
+    def _query(self, id_list):
+        response = self.fetcher.get(query_url(id_list))
+        if response.status_code != 200:
+            raise IOError(f'HTTP {response.status_code}')
+        return parse_feed(response.content)
+
+    def query(self, id_list):
+        # every attempt is rate-limited; when they all fail, the papers keep
+        # their listing data only rather than aborting the crawl
+        for i in range(self.num_retries + 1):
+            self.rate_limiter.wait()
+            try:
+                with metrics.timer('arxiv_query'):
+                    return self._query(id_list)
+            except ReplayMiss:
+                raise
+            except Exception as e:
+                metrics.incr('arxiv_query_failures')
+                if i == self.num_retries:
+                    logger.error(f'arXiv API query failed ({e}), giving up on {len(id_list)} ids')
+                    break
+                logger.warning(f'arXiv API query failed ({e}), retry {i + 1}/{self.num_retries}')
+                time.sleep(2 ** i)
+        return []
+
+    def fetch(self, id_list):
+        infos = {}
+        for arxiv_info in self.query(id_list):
+            infos[normalize_id(arxiv_info['id'])] = arxiv_info
+        if self.cache is not None:
+            for arxiv_id, arxiv_info in infos.items():
+                self.cache.put(arxiv_id, arxiv_info)
+        logger.info(f'fetched {len(infos)}/{len(id_list)} entries from arXiv API')
+        return infos
+
+    def attach(self, papers, infos):
+        for paper in papers:
+            arxiv_info = infos.get(normalize_id(paper['id']))
+            if arxiv_info is None:
+                logger.warning(f'no metadata for {paper["id"]}')
+                paper['summary'] = ''
+                paper['detail'] = None
+                continue
+            paper['summary'] = arxiv_info['summary'].strip()
+            paper['detail'] = arxiv_info
+        return papers
+
+    def enrich(self, papers, callback=None):
+        '''
+        Attaches the metadata to `papers` (in place). If given, `callback` is
+        called with every group of papers as soon as they are enriched.
+        '''
+        papers_by_id = {}
+        for paper in papers:
+            papers_by_id.setdefault(normalize_id(paper['id']), []).append(paper)
+
+        infos = {}
+        missing = []
+        for arxiv_id in papers_by_id:
+            arxiv_info = self.cache.get(arxiv_id) if self.cache is not None else None
+            if arxiv_info is not None:
+                infos[arxiv_id] = arxiv_info
+            else:
+                missing.append(arxiv_id)
+        if self.cache is not None:
+            metrics.cache('metadata', hits=len(infos), misses=len(missing))
+        logger.info(f'{len(infos)} cached, {len(missing)} to fetch')
+
+        def done(ids, chunk_infos):
+            chunk_papers = [paper for arxiv_id in ids for paper in papers_by_id[arxiv_id]]
+            self.attach(chunk_papers, chunk_infos)
+            if callback is not None and chunk_papers:
+                callback(chunk_papers)
+
+        done(list(infos), infos)
+
+        chunks = [missing[i:i + self.chunk_size]
+                  for i in range(0, len(missing), self.chunk_size)]
+        if chunks:
+            num_workers = max(1, min(self.num_workers, len(chunks)))
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                futures = {executor.submit(self.fetch, chunk): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    done(futures[future], future.result())
+        return papers
@@ -0,0 +1,233 @@
+'''
+HTTP fetch layer of the crawler.
+
+HttpFetcher does plain GETs through a pooled session. CachingFetcher puts
+an on-disk ResponseCache in front of another fetcher: cached responses are
+revalidated with If-None-Match / If-Modified-Since, or, in replay mode,
+served as they are without any network access.
+'''
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+from dx.metrics import metrics
+
+
+MODES = ('revalidate', 'replay')
+
+# response headers kept in the cache
+CACHED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+
+class ReplayMiss(LookupError):
+    pass
+
+
+class Response:
+    '''
+    The parts of a response the crawler uses, whether it comes from the
+    network or from the cache.
+    '''
+
+    __slots__ = ('url', 'status_code', 'headers', 'content', 'from_cache')
+
+    def __init__(self, url, status_code, headers, content, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        # lower-cased names
+        self.headers = headers
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def encoding(self):
+        for param in self.headers.get('content-type', '').split(';')[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'charset' and value:
+                return value.strip('"')
+        return 'utf-8'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+
+class HttpFetcher:
+    '''
+    GETs through one pooled session, with at most `max_per_host`
+    concurrent requests per host.
+    '''
+
+    def __init__(self, num_workers=4, max_per_host=4):
+        self.max_per_host = max_per_host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(1, num_workers),
+                              pool_maxsize=max(1, max_per_host))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_semaphores[host]
+
+    def get(self, url, headers=None):
+        host = urlparse(url).netloc
+        with self._host_semaphore(url):
+            with metrics.timer('http_request', host=host):
+                r = self.session.get(url, headers=headers)
+        metrics.incr('http_requests', host=host, status=r.status_code)
+        metrics.incr('http_response_bytes', len(r.content), host=host)
+        return Response(url, r.status_code,
+                        {name.lower(): value for name, value in r.headers.items()},
+                        r.content)
+
+
+class ResponseCache:
+    '''
+    Persistent SQLite cache of successful responses keyed by url. The
+    bodies take at most `max_bytes` in total; the least recently used
+    ones are evicted first.
+    '''
+
+    def __init__(self, path, max_bytes=512 << 20):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                used INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used)')
+        self._clock, self.total_bytes = self.conn.execute(
+            'SELECT COALESCE(MAX(used), 0), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, url):
+        with self._lock, self.conn:
+            row = self.conn.execute('SELECT headers, content FROM responses WHERE url = ?',
+                                    (url,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET used = ? WHERE url = ?',
+                              (self._tick(), url))
+        return Response(url, 200, json.loads(row[0]), row[1], from_cache=True)
+
+    def put(self, response):
+        headers = {name: response.headers[name] for name in CACHED_HEADERS
+                   if name in response.headers}
+        size = len(response.content)
+        if size > self.max_bytes:
+            return
+        with self._lock, self.conn:
+            row = self.conn.execute('SELECT size FROM responses WHERE url = ?',
+                                    (response.url,)).fetchone()
+            if row is not None:
+                self.total_bytes -= row[0]
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (url, headers, content, size, used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (response.url, json.dumps(headers), response.content, size, self._tick()))
+            self.total_bytes += size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        evicted = []
+        for url, size in self.conn.execute('SELECT url, size FROM responses ORDER BY used'):
+            if self.total_bytes <= self.max_bytes:
+                break
+            evicted.append((url,))
+            self.total_bytes -= size
+        self.conn.executemany('DELETE FROM responses WHERE url = ?', evicted)
+        logger.info(f'evicted {len(evicted)} responses from {self.path}')
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CachingFetcher:
+    '''
+    `fetcher` behind a ResponseCache.
+
+    In 'revalidate' mode a cached response is sent back to the server
+    with its validators and reused on 304 Not Modified. In 'replay' mode
+    only cached responses are served, and a url missing from the cache
+    raises ReplayMiss.
+    '''
+
+    def __init__(self, cache, fetcher=None, mode='revalidate'):
+        assert(mode in MODES)
+        self.cache = cache
+        self.fetcher = fetcher
+        self.mode = mode
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+        if name == 'misses':
+            metrics.cache('http', misses=1)
+        else:
+            metrics.cache('http', hits=1)
+
+    def get(self, url, headers=None):
+        cached = self.cache.get(url)
+        if self.mode == 'replay':
+            if cached is None:
+                raise ReplayMiss(url)
+            self._count('hits')
+            return cached
+
+        headers = dict(headers or {})
+        if cached is not None:
+            if 'etag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['etag']
+            if 'last-modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['last-modified']
+        response = self.fetcher.get(url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self._count('revalidated')
+            return cached
+        self._count('misses')
+        if response.status_code == 200:
+            self.cache.put(response)
+        return response
+
+    def stats(self):
+        total = self.hits + self.revalidated + self.misses
+        ratio = (self.hits + self.revalidated) / total if total else 0.0
+        return (f'{self.hits} replayed, {self.revalidated} not modified, '
+                f'{self.misses} downloaded ({ratio:.1%} from the cache)')
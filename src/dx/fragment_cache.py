@@ -0,0 +1,87 @@
+import json
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from dx.metrics import metrics
+
+
+def content_key(*parts):
+    '''
+    Hash of everything a rendered section depends on.
+    '''
+    text = json.dumps(parts, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class FragmentCache:
+    '''
+    Persistent SQLite cache of rendered sections keyed by content_key().
+    At most `max_entries` sections are kept; the least recently used ones
+    are evicted first.
+    '''
+
+    def __init__(self, path, max_entries=10000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS fragments (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                used INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS fragments_used ON fragments (used)')
+        self._clock = self.conn.execute('SELECT MAX(used) FROM fragments').fetchone()[0] or 0
+        self.hits = 0
+        self.misses = 0
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, keys):
+        result = {}
+        keys = list(dict.fromkeys(keys))
+        with self._lock, self.conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f'SELECT key, text FROM fragments WHERE key IN ({", ".join("?" * len(chunk))})',
+                    chunk)
+                result.update(dict(rows))
+            self.conn.executemany('UPDATE fragments SET used = ? WHERE key = ?',
+                                  [(self._tick(), key) for key in result])
+        self.hits += len(result)
+        self.misses += len(keys) - len(result)
+        metrics.cache('fragments', hits=len(result), misses=len(keys) - len(result))
+        return result
+
+    def put_many(self, items):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO fragments (key, text, used) VALUES (?, ?, ?)',
+                [(key, text, self._tick()) for key, text in items])
+            num_entries = self.conn.execute('SELECT COUNT(*) FROM fragments').fetchone()[0]
+            if num_entries > self.max_entries:
+                self.conn.execute(
+                    'DELETE FROM fragments WHERE key IN '
+                    '(SELECT key FROM fragments ORDER BY used LIMIT ?)',
+                    (num_entries - self.max_entries,))
+
+    def stats(self):
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        return f'{self.hits} hits, {self.misses} misses ({ratio:.1%} reused)'
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
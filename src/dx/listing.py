@@ -0,0 +1,321 @@
+import re
+from html import escape
+from html.parser import HTMLParser
+
+
+PARSERS = ('bs4', 'stream')
+
+r_subject = re.compile(r'.+ \((?P<subject>.+)\)')
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+FIELDS = ('list-title', 'list-authors', 'list-comments', 'list-subjects')
+
+# '<small>[ total of 1234 entries: <a ...>1-25</a> | ... ]</small>'
+r_total = re.compile(r'total of (?P<total>\d+) entries')
+
+
+def entry_id(links):
+    return links['Abstract'].split('/')[-1]
+
+
+def primary_subject(paper):
+    s = r_subject.search(paper['subjects'][0])
+    return s.group('subject') if s else paper['subjects'][0]
+
+
+def listing_total(text):
+    # number of entries of the whole listing, None if the page has no such header
+    s = r_total.search(text)
+    return int(s.group('total')) if s else None
+
+
+def in_category(tag, cat):
+    # 'cs.LG' is in 'cs' and in 'cs.LG'
+    return tag == cat or tag.startswith(cat + '.')
+
+
+def parse_listing(text, parser='bs4', chunk_size=1 << 16, skip=None):
+    '''
+    Parse an arXiv listing page (/list/{cat}/pastweek).
+
+    Yields (header, entries) for every day section of the page, where
+    header is the text of the <h3> and entries iterates over dicts with
+    'links', 'id', 'title', 'authors', 'comments' and 'subjects'.
+
+    Entries whose id satisfies `skip` are not parsed any further and come
+    as {'links', 'id', 'skipped': True}.
+    '''
+    if parser == 'bs4':
+        return parse_listing_bs4(text, skip=skip)
+    elif parser == 'stream':
+        return parse_listing_stream(text, chunk_size=chunk_size, skip=skip)
+    raise ValueError(f'unknown parser: {parser}')
+
+
+def parse_listing_bs4(text, skip=None):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(text, 'lxml')
+    h3s = soup.find_all('h3')
+    dls = soup.find_all('dl')
+    for h3, dl in zip(h3s, dls):
+        # entries are parsed lazily so that skipped sections cost nothing
+        yield h3.text, parse_entries_bs4(dl, skip=skip)
+
+
+def parse_entries_bs4(dl, skip=None):
+    dts = dl.find_all('dt')
+    dds = dl.find_all('dd')
+    assert(len(dts) == len(dds))
+    for dt, dd in zip(dts, dds):
+        info = {}
+
+        # links
+        links = {}
+        for a in dt.span.find_all('a'):
+            title = a['title']
+            href = 'https://arxiv.org' + a['href']
+            links[title] = href
+        info['links'] = links
+
+        info['id'] = entry_id(info['links'])
+        if skip is not None and skip(info['id']):
+            info['skipped'] = True
+            yield info
+            continue
+
+        # title
+        div = dd.div.find('div', class_='list-title')
+        div.find('span', class_='descriptor').extract()
+        title = div.text.strip()
+        info['title'] = title
+
+        # authors
+        div = dd.div.find('div', class_='list-authors')
+        div.find('span', class_='descriptor').extract()
+        authors = []
+        for a in div.find_all('a'):
+            authors.append(a.text)
+        info['authors'] = authors
+
+        # comments
+        div = dd.div.find('div', class_='list-comments')
+        if div is not None:
+            div.find('span', class_='descriptor').extract()
+            comments = ''.join([str(_).strip() for _ in div.contents
+                                if str(_).strip()])
+            info['comments'] = comments
+        else:
+            info['comments'] = None
+
+        # subjects
+        div = dd.div.find('div', class_='list-subjects')
+        div.find('span', class_='descriptor').extract()
+        subjects = [_.strip() for _
+                    in div.text.strip().split(';')]
+        info['subjects'] = subjects
+
+        yield info
+
+
+def parse_listing_stream(text, chunk_size=1 << 16, skip=None):
+    if isinstance(text, str):
+        chunks = (text[i:i + chunk_size]
+                  for i in range(0, len(text), chunk_size))
+    else:
+        chunks = text
+    parser = ListingParser(skip=skip)
+    for chunk in chunks:
+        parser.feed(chunk)
+        while parser.sections:
+            yield parser.sections.pop(0)
+    parser.close()
+    while parser.sections:
+        yield parser.sections.pop(0)
+
+
+class ListingParser(HTMLParser):
+    '''
+    Single pass, event driven parser for arXiv listing pages.
+
+    Completed day sections are appended to `sections` as soon as their
+    </dl> is seen, so only one section is held in memory at a time.
+    '''
+
+    def __init__(self, skip=None):
+        super().__init__(convert_charrefs=True)
+        self.skip = skip
+        self.sections = []
+        self._text = []
+        self._header = None
+        self._in_h3 = False
+        self._entries = None
+        self._entry = None
+        self._in_dt = False
+        self._dt_span_depth = 0
+        self._dt_span_done = False
+        self._link = None
+        self._field = None
+        self._field_depth = 0
+        self._descriptor_depth = 0
+        self._field_text = []
+        self._author = None
+        self._piece = None
+        self._piece_depth = 0
+        self._pieces = []
+
+    # text is buffered so that a run of characters split across feeds
+    # (or charrefs) is handled as a single string
+    def handle_data(self, data):
+        self._text.append(data)
+
+    def _flush(self):
+        if not self._text:
+            return
+        data = ''.join(self._text)
+        self._text = []
+        if self._in_h3:
+            self._header.append(data)
+        if self._link is not None:
+            return
+        if self._field is None or self._descriptor_depth:
+            return
+        self._field_text.append(data)
+        if self._author is not None:
+            self._author.append(data)
+        if self._field == 'list-comments':
+            if self._piece is not None:
+                self._piece.append(escape(data, quote=False))
+            elif data.strip():
+                self._pieces.append(data.strip())
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag == 'h3':
+            self._in_h3 = True
+            self._header = []
+        elif tag == 'dl':
+            self._entries = []
+        elif tag == 'dt' and self._entries is not None:
+            self._entry = {'links': {}}
+            self._in_dt = True
+            self._dt_span_depth = 0
+            self._dt_span_done = False
+        elif self._in_dt:
+            if tag == 'span' and not self._dt_span_done:
+                self._dt_span_depth += 1
+            elif tag == 'a' and self._dt_span_depth and 'title' in attrs:
+                self._entry['links'][attrs['title']] = 'https://arxiv.org' + attrs['href']
+        elif self._field is not None:
+            if self._descriptor_depth:
+                if tag == 'span':
+                    self._descriptor_depth += 1
+                return
+            if tag == 'span' and 'descriptor' in classes:
+                self._descriptor_depth = 1
+                return
+            if tag == 'div':
+                self._field_depth += 1
+            if self._field == 'list-authors' and tag == 'a':
+                self._author = []
+            if self._field == 'list-comments':
+                if self._piece is None:
+                    self._piece = [self.get_starttag_text()]
+                    self._piece_depth = 0
+                else:
+                    self._piece.append(self.get_starttag_text())
+                if tag not in VOID_ELEMENTS:
+                    self._piece_depth += 1
+                else:
+                    self._end_piece()
+        elif self._entry is not None and not self._entry.get('skipped') and tag == 'div':
+            for field in FIELDS:
+                if field in classes:
+                    self._field = field
+                    self._field_depth = 1
+                    self._field_text = []
+                    self._pieces = []
+                    break
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def _end_piece(self):
+        if self._piece_depth == 0:
+            piece = ''.join(self._piece).strip()
+            if piece:
+                self._pieces.append(piece)
+            self._piece = None
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag == 'h3' and self._in_h3:
+            self._in_h3 = False
+            self._header = ''.join(self._header)
+        elif tag == 'dl' and self._entries is not None:
+            self.sections.append((self._header, self._entries))
+            self._entries = None
+            self._entry = None
+        elif self._in_dt:
+            if tag == 'dt':
+                self._in_dt = False
+                entry = self._entry
+                if self.skip is not None and self.skip(entry_id(entry['links'])):
+                    entry['skipped'] = True
+            elif tag == 'span' and self._dt_span_depth:
+                self._dt_span_depth -= 1
+                if self._dt_span_depth == 0:
+                    self._dt_span_done = True
+        elif self._field is not None:
+            if self._descriptor_depth:
+                if tag == 'span':
+                    self._descriptor_depth -= 1
+                return
+            if self._field == 'list-comments' and self._piece is not None:
+                self._piece.append(f'</{tag}>')
+                self._piece_depth -= 1
+                self._end_piece()
+            if tag == 'a' and self._author is not None:
+                self._entry.setdefault('authors', []).append(''.join(self._author))
+                self._author = None
+            if tag == 'div':
+                self._field_depth -= 1
+                if self._field_depth == 0:
+                    self._end_field()
+        elif tag == 'dd' and self._entry is not None:
+            self._end_entry()
+
+    def _end_field(self):
+        text = ''.join(self._field_text)
+        entry = self._entry
+        if self._field == 'list-title':
+            entry['title'] = text.strip()
+        elif self._field == 'list-authors':
+            entry.setdefault('authors', [])
+        elif self._field == 'list-comments':
+            entry['comments'] = ''.join(self._pieces)
+        elif self._field == 'list-subjects':
+            entry['subjects'] = [_.strip() for _ in text.strip().split(';')]
+        self._field = None
+
+    def _end_entry(self):
+        entry = self._entry
+        info = {}
+        info['links'] = entry['links']
+        info['id'] = entry_id(info['links'])
+        if entry.get('skipped'):
+            info['skipped'] = True
+            self._entries.append(info)
+            self._entry = None
+            return
+        info['title'] = entry['title']
+        info['authors'] = entry.get('authors', [])
+        info['comments'] = entry.get('comments')
+        info['subjects'] = entry['subjects']
+        self._entries.append(info)
+        self._entry = None
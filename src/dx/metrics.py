@@ -0,0 +1,230 @@
+'''
+Lightweight instrumentation shared by the tools: counters, timers
+(histograms of seconds) and cache hit ratios, recorded in the process-wide
+`metrics` registry and exported as JSON or as a Prometheus textfile.
+
+    from dx.metrics import metrics
+    with metrics.timer('listing_parse', parser='stream'):
+        ...
+    metrics.incr('http_response_bytes', len(content), host=host)
+    metrics.cache('fragments', hits=10, misses=2)
+'''
+
+import bisect
+import functools
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# upper bounds (seconds) of the histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PREFIX = 'dx_'
+
+
+def label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def label_string(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join([f'{name}="{value}"' for name, value in pairs]) + '}'
+
+
+class Histogram:
+
+    __slots__ = ('counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum, 'min': self.min, 'max': self.max,
+                'mean': self.sum / self.count if self.count else None,
+                'buckets': dict(zip([str(_) for _ in BUCKETS] + ['+Inf'], self.counts))}
+
+
+class Metrics:
+    '''
+    Registry of counters and histograms, each identified by a name and
+    labels. Thread-safe; recording costs a lock and a dict lookup.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def clear(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def incr(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        '''
+        Observes the seconds spent in the block in the histogram
+        `{name}_seconds`.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name + '_seconds', time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        '''
+        Decorator timing every call of a function like timer().
+        '''
+        def decorate(f):
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return f(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def cache(self, name, hits=0, misses=0):
+        if hits:
+            self.incr('cache_requests', hits, cache=name, result='hit')
+        if misses:
+            self.incr('cache_requests', misses, cache=name, result='miss')
+
+    def cache_ratios(self):
+        totals = {}
+        for (name, key), value in self.counters.items():
+            if name != 'cache_requests':
+                continue
+            labels = dict(key)
+            hits, total = totals.get(labels['cache'], (0, 0))
+            totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0),
+                                       total + value)
+        return {cache: hits / total for cache, (hits, total) in totals.items() if total}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'counters': [{'name': name, 'labels': dict(key), 'value': value}
+                             for (name, key), value in sorted(self.counters.items())],
+                'histograms': [{'name': name, 'labels': dict(key), **histogram.to_dict()}
+                               for (name, key), histogram in sorted(self.histograms.items())],
+                'cache_hit_ratios': self.cache_ratios(),
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            typed = set([])
+            for (name, key), value in sorted(self.counters.items()):
+                metric = f'{PREFIX}{name}_total'
+                if metric not in typed:
+                    lines.append(f'# TYPE {metric} counter')
+                    typed.add(metric)
+                lines.append(f'{metric}{label_string(key)} {value}')
+            for (name, key), histogram in sorted(self.histograms.items()):
+                metric = PREFIX + name
+                if metric not in typed:
+                    lines.append(f'# TYPE {metric} histogram')
+                    typed.add(metric)
+                cumulative = 0
+                for bound, count in zip(list(BUCKETS) + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{label_string(key, [("le", bound)])} '
+                                 f'{cumulative}')
+                lines.append(f'{metric}_sum{label_string(key)} {histogram.sum}')
+                lines.append(f'{metric}_count{label_string(key)} {histogram.count}')
+            ratios = self.cache_ratios()
+            if ratios:
+                lines.append(f'# TYPE {PREFIX}cache_hit_ratio gauge')
+                for cache, ratio in sorted(ratios.items()):
+                    lines.append(f'{PREFIX}cache_hit_ratio{{cache="{cache}"}} {ratio}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        '''
+        Writes a Prometheus textfile if `path` ends with .prom, JSON
+        otherwise. The file is replaced atomically, as the node exporter's
+        textfile collector expects.
+        '''
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == '.prom':
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.to_dict(), indent=1)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(text)
+        os.replace(tmp_path, path)
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(path=None, num_lines=30):
+    '''
+    Runs the block under cProfile if `path` is given, then saves the
+    stats to `path` (for pstats or snakeviz) and prints the top functions
+    by cumulative time. Only the calling thread is profiled.
+    '''
+    if path is None:
+        yield
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(num_lines)
+        print(out.getvalue())
+
+
+@contextmanager
+def instrumented(metrics_file=None, profile_file=None):
+    '''
+    What the tools wrap their work in: the optional profile, then the
+    metrics written to `metrics_file` (if given) even if the work failed.
+    '''
+    try:
+        with profiled(profile_file):
+            yield metrics
+    finally:
+        if metrics_file is not None:
+            metrics.write(metrics_file)
@@ -0,0 +1,322 @@
+'''
+Bulk harvesting of arXiv through OAI-PMH (https://arxiv.org/help/oa).
+
+ListRecords is queried by set and date range, following resumption
+tokens, and every response is parsed in one streaming pass. Records come
+with their abstract, so no separate arXiv API call is needed, and are
+turned into the same paper dicts as the listing pages.
+'''
+
+import io
+import time
+import datetime
+import threading
+from concurrent.futures import Future
+import xml.etree.ElementTree as ET
+from urllib.parse import urlencode
+from loguru import logger
+from dx.crawler import Crawler
+from dx.ratelimit import RateLimiter
+from dx.dates import listing_date
+from dx.listing import in_category
+from dx.metrics import metrics
+
+
+OAI_URL = 'http://export.arxiv.org/oai2'
+
+NS_OAI = '{http://www.openarchives.org/OAI/2.0/}'
+NS_ARXIV = '{http://arxiv.org/OAI/arXiv/}'
+
+# archives whose OAI set is 'physics:{archive}'
+PHYSICS_ARCHIVES = {'astro-ph', 'cond-mat', 'gr-qc', 'hep-ex', 'hep-lat', 'hep-ph',
+                    'hep-th', 'math-ph', 'nlin', 'nucl-ex', 'nucl-th', 'physics',
+                    'quant-ph'}
+
+# names shown in the listing pages, as in 'Machine Learning (cs.LG)';
+# other categories are shown by their code
+CATEGORY_NAMES = {
+    'cs.AI': 'Artificial Intelligence',
+    'cs.AR': 'Hardware Architecture',
+    'cs.CC': 'Computational Complexity',
+    'cs.CE': 'Computational Engineering, Finance, and Science',
+    'cs.CG': 'Computational Geometry',
+    'cs.CL': 'Computation and Language',
+    'cs.CR': 'Cryptography and Security',
+    'cs.CV': 'Computer Vision and Pattern Recognition',
+    'cs.CY': 'Computers and Society',
+    'cs.DB': 'Databases',
+    'cs.DC': 'Distributed, Parallel, and Cluster Computing',
+    'cs.DL': 'Digital Libraries',
+    'cs.DM': 'Discrete Mathematics',
+    'cs.DS': 'Data Structures and Algorithms',
+    'cs.ET': 'Emerging Technologies',
+    'cs.FL': 'Formal Languages and Automata Theory',
+    'cs.GL': 'General Literature',
+    'cs.GR': 'Graphics',
+    'cs.GT': 'Computer Science and Game Theory',
+    'cs.HC': 'Human-Computer Interaction',
+    'cs.IR': 'Information Retrieval',
+    'cs.IT': 'Information Theory',
+    'cs.LG': 'Machine Learning',
+    'cs.LO': 'Logic in Computer Science',
+    'cs.MA': 'Multiagent Systems',
+    'cs.MM': 'Multimedia',
+    'cs.MS': 'Mathematical Software',
+    'cs.NA': 'Numerical Analysis',
+    'cs.NE': 'Neural and Evolutionary Computing',
+    'cs.NI': 'Networking and Internet Architecture',
+    'cs.OH': 'Other Computer Science',
+    'cs.OS': 'Operating Systems',
+    'cs.PF': 'Performance',
+    'cs.PL': 'Programming Languages',
+    'cs.RO': 'Robotics',
+    'cs.SC': 'Symbolic Computation',
+    'cs.SD': 'Sound',
+    'cs.SE': 'Software Engineering',
+    'cs.SI': 'Social and Information Networks',
+    'cs.SY': 'Systems and Control',
+    'stat.AP': 'Applications',
+    'stat.CO': 'Computation',
+    'stat.ME': 'Methodology',
+    'stat.ML': 'Machine Learning',
+    'stat.OT': 'Other Statistics',
+    'stat.TH': 'Statistics Theory',
+    'eess.AS': 'Audio and Speech Processing',
+    'eess.IV': 'Image and Video Processing',
+    'eess.SP': 'Signal Processing',
+    'eess.SY': 'Systems and Control',
+    'math.NA': 'Numerical Analysis',
+    'math.OC': 'Optimization and Control',
+    'math.PR': 'Probability',
+    'math.ST': 'Statistics Theory',
+    'quant-ph': 'Quantum Physics',
+}
+
+
+def oai_set(target):
+    # 'stat.ML' -> 'stat', 'hep-th' -> 'physics:hep-th'
+    archive = target.split('.')[0]
+    if archive in PHYSICS_ARCHIVES:
+        return 'physics:' + archive
+    return archive
+
+
+def subject_name(category):
+    return f'{CATEGORY_NAMES.get(category, category)} ({category})'
+
+
+def clean(text):
+    return ' '.join(text.split()) if text is not None else None
+
+
+def parse_records(content):
+    '''
+    Parse a ListRecords response. Returns the (datestamp, metadata)
+    of its records, where metadata maps the fields of the arXiv format
+    to their text ('authors' to a list of names), and the resumption
+    token (None on the last page).
+    '''
+    records = []
+    token = None
+    for _, elem in ET.iterparse(io.BytesIO(content)):
+        if elem.tag == NS_OAI + 'record':
+            header = elem.find(NS_OAI + 'header')
+            metadata = elem.find(f'{NS_OAI}metadata/{NS_ARXIV}arXiv')
+            # deleted records have no metadata
+            if header.get('status') != 'deleted' and metadata is not None:
+                records.append((header.findtext(NS_OAI + 'datestamp'),
+                                parse_metadata(metadata)))
+            elem.clear()
+        elif elem.tag == NS_OAI + 'resumptionToken':
+            token = elem.text or None
+        elif elem.tag == NS_OAI + 'error':
+            if elem.get('code') != 'noRecordsMatch':
+                raise ValueError(f'OAI-PMH error {elem.get("code")}: {elem.text}')
+    return records, token
+
+
+def parse_metadata(elem):
+    metadata = {}
+    for child in elem:
+        name = child.tag[len(NS_ARXIV):]
+        if name == 'authors':
+            metadata['authors'] = [
+                ' '.join(filter(None, [author.findtext(NS_ARXIV + 'forenames'),
+                                       author.findtext(NS_ARXIV + 'keyname'),
+                                       author.findtext(NS_ARXIV + 'suffix')]))
+                for author in child]
+        else:
+            metadata[name] = clean(child.text)
+    return metadata
+
+
+def announced_date(metadata):
+    '''
+    The date a record's latest version was listed on. OAI-PMH does not
+    give it (the datestamp is the last change of the record), so it is
+    taken as the weekday after the version was submitted ('updated', or
+    'created' for the first version), ignoring the daily cut-off time and
+    holidays.
+    '''
+    date = datetime.datetime.strptime(metadata.get('updated') or metadata['created'],
+                                      '%Y-%m-%d')
+    date += datetime.timedelta(days=1)
+    while date.weekday() >= 5:
+        date += datetime.timedelta(days=1)
+    return date
+
+
+def to_paper(metadata):
+    '''
+    Paper dict, as crawled from the listing pages and enriched, of a record,
+    dated with announced_date().
+    '''
+    arxiv_id = metadata['id']
+    return {'date': listing_date(announced_date(metadata)),
+            'links': {'Abstract': f'https://arxiv.org/abs/{arxiv_id}',
+                      'Download PDF': f'https://arxiv.org/pdf/{arxiv_id}'},
+            'id': arxiv_id,
+            'title': metadata['title'],
+            'authors': metadata.get('authors', []),
+            'comments': metadata.get('comments'),
+            'subjects': [subject_name(_) for _ in metadata['categories'].split()],
+            'summary': metadata.get('abstract') or '',
+            'detail': metadata}
+
+
+class OAICrawler(Crawler):
+    '''
+    Crawler harvesting the papers of every target from OAI-PMH instead of
+    the listing pages, e.g. for windows older than the past week.
+
+    Records are those of the target's set updated within the window,
+    restricted to the target's categories and to the versions announced
+    within the window (other records only had their metadata changed).
+    Every set is harvested once per crawl and shared by its targets (e.g.
+    cs.LG and cs.CV). A new version is dated by its own announcement, so a
+    paper first met in the window is kept even if it is not its first
+    version; as in the listing pages, papers first seen before the window
+    are tagged 'replacement' and left out unless keep_known.
+    '''
+
+    def __init__(self, base_url=OAI_URL, interval=3.0, num_retries=5, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+        self.rate_limiter = RateLimiter(interval)
+        self.num_retries = num_retries
+        # set -> Future of its records, for the running crawl
+        self._harvests = {}
+        self._harvests_lock = threading.Lock()
+
+    def target_url(self, target):
+        return self.base_url
+
+    def default_enricher(self):
+        return None
+
+    def enrich(self, papers, callback=None):
+        # records come with their abstract already
+        if callback is not None and papers:
+            callback(papers)
+
+    def fetch(self, params):
+        url = self.base_url + '?' + urlencode(params)
+        for i in range(self.num_retries):
+            self.rate_limiter.wait()
+            logger.info(f'processing from {url}')
+            response = self.get(url)
+            if response.status_code == 200:
+                return response.content
+            # flow control: come back after Retry-After seconds
+            retry_after = response.headers.get('retry-after', '')
+            delay = int(retry_after) if retry_after.isdigit() else 2 ** i
+            logger.warning(f'HTTP {response.status_code}, retry {i + 1}/{self.num_retries} '
+                           f'in {delay} s')
+            time.sleep(delay)
+        raise IOError(f'failed to fetch {url}')
+
+    def harvest(self, set_spec, start_date, end_date):
+        '''
+        Yields the (datestamp, metadata) of the records of `set_spec`
+        updated within [start_date, end_date).
+        '''
+        params = {'verb': 'ListRecords',
+                  'metadataPrefix': 'arXiv',
+                  'set': set_spec,
+                  'from': start_date.strftime('%Y-%m-%d'),
+                  'until': (end_date - datetime.timedelta(days=1)).strftime('%Y-%m-%d')}
+        while True:
+            text = self.fetch(params)
+            with metrics.timer('oai_parse'):
+                records, token = parse_records(text)
+            yield from records
+            if token is None:
+                break
+            params = {'verb': 'ListRecords', 'resumptionToken': token}
+
+    def set_records(self, set_spec, start_date, end_date):
+        '''
+        The records of harvest(), harvested by the first target of the set.
+        '''
+        with self._harvests_lock:
+            future = self._harvests.get(set_spec)
+            first = future is None
+            if first:
+                future = self._harvests[set_spec] = Future()
+        if first:
+            try:
+                future.set_result(list(self.harvest(set_spec, start_date, end_date)))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def crawl_recent(self, *args, **kwargs):
+        self._harvests = {}
+        try:
+            return super().crawl_recent(*args, **kwargs)
+        finally:
+            self._harvests = {}
+
+    def crawl_category(self, cat, url, start_date, end_date,
+                       num_shows=512, prefetch=1, parser='stream'):
+        set_spec = oai_set(cat)
+        logger.info(f'new target {cat} ({url}, set {set_spec})')
+        checkpoint = self.checkpoint
+        known = set([])
+        if checkpoint is not None:
+            progress = checkpoint.progress(cat)
+            if progress['done']:
+                logger.info(f'[{cat}] already crawled, {len(progress["papers"])} entries')
+                return progress['papers']
+            known = checkpoint.seen(cat)
+        start = start_date.strftime('%Y-%m-%d')
+
+        records = []
+        num_known = 0
+        for _, metadata in self.set_records(set_spec, start_date, end_date):
+            categories = metadata['categories'].split()
+            if not any([in_category(_, cat) for _ in categories]):
+                continue
+            if metadata['id'] in known:
+                continue
+            # versions announced before the window were crawled then
+            date = announced_date(metadata)
+            if not start_date <= date < end_date:
+                continue
+            info = to_paper(metadata)
+            info['status'] = self.status(info, cat, start)
+            if info['status'] == 'replacement' and not self.keep_known:
+                num_known += 1
+                continue
+            records.append((date, info))
+        # newest first, as in the listing pages
+        records.sort(key=lambda _: (_[0], _[1]['id']), reverse=True)
+        papers = [info for _, info in records]
+        if checkpoint is not None:
+            checkpoint.page_done(cat, 0, papers, done=True)
+        metrics.incr('papers_listed', len(papers), category=cat)
+        if num_known:
+            metrics.incr('papers_skipped', num_known, category=cat)
+            logger.info(f'[{cat}] skipped {num_known} replaced entries')
+        logger.info(f'[{cat}] {len(papers)} entries')
+        return papers
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from dx.ratelimit import RateLimiter
+from dx.metrics import metrics
+
+
+TWITTER_CREDENTIALS = ('TWITTER_CONSUMER_KEY', 'TWITTER_CONSUMER_SECRET',
+                       'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_SECRET')
+
+
+def has_twitter_credentials():
+    return all([_ in os.environ for _ in TWITTER_CREDENTIALS])
+
+
+def twitter_api():
+    '''
+    twitter.Api from the TWITTER_* environment variables, or None if they
+    are not available.
+    '''
+    try:
+        import twitter
+        return twitter.Api(consumer_key=os.environ['TWITTER_CONSUMER_KEY'],
+                           consumer_secret=os.environ['TWITTER_CONSUMER_SECRET'],
+                           access_token_key=os.environ['TWITTER_ACCESS_TOKEN'],
+                           access_token_secret=os.environ['TWITTER_ACCESS_SECRET'])
+    except Exception as e:
+        logger.warning(f'twitter api is not available: {e!r}')
+        return None
+
+
+class OEmbedCache:
+    '''
+    Persistent SQLite cache of oEmbed html keyed by tweet url.
+    '''
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS oembeds (
+                url TEXT PRIMARY KEY,
+                html TEXT NOT NULL
+            )
+        ''')
+
+    def get_many(self, urls):
+        result = {}
+        urls = list(urls)
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self.conn.execute(
+                    f'SELECT url, html FROM oembeds WHERE url IN ({", ".join("?" * len(chunk))})',
+                    chunk)
+                result.update(dict(rows))
+        return result
+
+    def put(self, url, html):
+        with self._lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO oembeds (url, html) VALUES (?, ?)',
+                              (url, html))
+
+
+class OEmbedResolver:
+    '''
+    Resolves the oEmbed html of many tweets before rendering: cached urls
+    are served from the cache, the others are requested concurrently with
+    at least `interval` seconds between two requests. Urls which cannot be
+    resolved are left out of the result.
+    '''
+
+    def __init__(self, api, cache=None, num_workers=4, interval=0.2, make_api=None):
+        self._api = api
+        # or a function making the api (or None), only called once a tweet
+        # is not in the cache
+        self.make_api = make_api
+        self._api_lock = threading.Lock()
+        self.cache = cache
+        self.num_workers = num_workers
+        self.rate_limiter = RateLimiter(interval)
+
+    @property
+    def has_api(self):
+        # whether tweets can be requested, without making the api
+        return self._api is not None or self.make_api is not None
+
+    @property
+    def api(self):
+        with self._api_lock:
+            if self.make_api is not None:
+                self._api = self.make_api()
+                self.make_api = None
+            return self._api
+
+    def fetch(self, url):
+        self.rate_limiter.wait()
+        try:
+            with metrics.timer('oembed_request'):
+                html = self.api.GetStatusOembed(url=url)['html']
+        except Exception as e:
+            metrics.incr('oembed_failures')
+            logger.warning(f'oembed failed for {url}: {e!r}')
+            return None
+        if self.cache is not None:
+            self.cache.put(url, html)
+        return html
+
+    def resolve(self, urls):
+        urls = list(dict.fromkeys(urls))
+        result = self.cache.get_many(urls) if self.cache is not None else {}
+        missing = [url for url in urls if url not in result]
+        if self.cache is not None:
+            metrics.cache('oembed', hits=len(result), misses=len(missing))
+        logger.info(f'oembed: {len(result)} cached, {len(missing)} to fetch')
+        if missing and self.api is not None:
+            with ThreadPoolExecutor(max_workers=max(1, self.num_workers)) as executor:
+                for url, html in zip(missing, executor.map(self.fetch, missing)):
+                    if html is not None:
+                        result[url] = html
+        return result
@@ -0,0 +1,57 @@
+import time
+import threading
+
+
+class RateLimiter:
+    '''
+    Spaces out calls so that at most one call starts every `interval` seconds,
+    shared by all the threads using the limiter.
+    '''
+
+    def __init__(self, interval=0.0):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class AdaptiveRateController(RateLimiter):
+    '''
+    RateLimiter whose rate adapts to the remote service with AIMD: the rate
+    (calls per second) grows by `increase` after every success and is
+    multiplied by `decrease` after every failure (e.g. throttling),
+    within [1 / max_interval, 1 / min_interval].
+    '''
+
+    def __init__(self, interval=0.1, min_interval=0.01, max_interval=60.0,
+                 increase=0.1, decrease=0.5):
+        super().__init__(min(max_interval, max(min_interval, interval)))
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.increase = increase
+        self.decrease = decrease
+
+    @property
+    def rate(self):
+        return 1.0 / max(self.interval, 1e-6)
+
+    def _set_rate(self, rate):
+        interval = 1.0 / rate if rate > 0 else self.max_interval
+        self.interval = min(self.max_interval, max(self.min_interval, interval))
+
+    def success(self):
+        with self._lock:
+            self._set_rate(self.rate + self.increase)
+
+    def failure(self):
+        with self._lock:
+            self._set_rate(self.rate * self.decrease)
+            # the next call waits for the new, longer interval
+            self._next = max(self._next, time.monotonic() + self.interval)
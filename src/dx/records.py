@@ -0,0 +1,132 @@
+'''
+Compact in-memory records for rendering.
+
+Crawled papers are nested dicts carrying the full arXiv metadata and every
+twint field of every tweet. Paper and Tweet keep only what the writers
+read; they can be indexed like the dicts they are built from
+(`paper['title']`, `tweet['likes_count']`) so the writers work with both.
+'''
+
+import sys
+from dx.dataio import iter_records
+
+
+class Record:
+    __slots__ = ()
+
+    # key of the JSON shape -> attribute
+    fields = {}
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.fields[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def get(self, key, default=None):
+        return self[key] if key in self.fields else default
+
+    def keys(self):
+        return self.fields.keys()
+
+    def to_dict(self):
+        return {key: getattr(self, attr) for key, attr in self.fields.items()}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.id!r})'
+
+
+class Tweet(Record):
+    __slots__ = ('id', 'name', 'username', 'datestamp', 'timestamp', 'link', 'tweet',
+                 'retweets', 'likes')
+
+    fields = {'id': 'id',
+              'name': 'name',
+              'username': 'username',
+              'datestamp': 'datestamp',
+              'timestamp': 'timestamp',
+              'link': 'link',
+              'tweet': 'tweet',
+              'retweets_count': 'retweets',
+              'likes_count': 'likes'}
+
+    def __init__(self, id, name, username, datestamp, timestamp, link, tweet,
+                 retweets=0, likes=0):
+        self.id = id
+        self.name = name
+        self.username = username
+        self.datestamp = sys.intern(datestamp)
+        self.timestamp = timestamp
+        self.link = link
+        self.tweet = tweet
+        self.retweets = int(retweets)
+        self.likes = int(likes)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['id'], d['name'], d['username'], d['datestamp'], d['timestamp'],
+                   d['link'], d['tweet'], d['retweets_count'], d['likes_count'])
+
+
+class Paper(Record):
+    __slots__ = ('id', 'date', 'title', 'authors', 'subjects', 'summary',
+                 'abs_url', 'pdf_url', 'tweets')
+
+    fields = {'date': 'date',
+              'links': 'links',
+              'id': 'id',
+              'title': 'title',
+              'authors': 'authors',
+              'subjects': 'subjects',
+              'summary': 'summary',
+              'tweets': 'tweets'}
+
+    def __init__(self, id, date, title, authors, subjects, summary, abs_url,
+                 pdf_url=None, tweets=()):
+        self.id = id
+        self.date = sys.intern(date) if date is not None else None
+        self.title = title
+        self.authors = tuple(authors)
+        self.subjects = tuple(sys.intern(_) for _ in subjects)
+        self.summary = summary
+        self.abs_url = abs_url
+        self.pdf_url = pdf_url
+        self.tweets = tuple(tweets)
+
+    @property
+    def links(self):
+        links = {'Abstract': self.abs_url}
+        if self.pdf_url is not None:
+            links['Download PDF'] = self.pdf_url
+        return links
+
+    @classmethod
+    def from_dict(cls, d):
+        links = d['links']
+        return cls(d['id'], d.get('date'), d['title'], d['authors'], d['subjects'],
+                   d.get('summary', ''), links['Abstract'], links.get('Download PDF'),
+                   [Tweet.from_dict(_) for _ in d.get('tweets', [])])
+
+    def to_dict(self):
+        d = super().to_dict()
+        d['authors'] = list(self.authors)
+        d['subjects'] = list(self.subjects)
+        d['tweets'] = [tweet.to_dict() for tweet in self.tweets]
+        return d
+
+
+def from_data(data):
+    return {'meta': data['meta'],
+            'papers': [Paper.from_dict(paper) for paper in data['papers']]}
+
+
+def load(path):
+    '''
+    Like dx.dataio.load, but every paper is converted to a Paper as soon
+    as it is read.
+    '''
+    meta, papers = iter_records(path)
+    return {'meta': meta, 'papers': [Paper.from_dict(paper) for paper in papers]}
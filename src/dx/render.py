@@ -0,0 +1,129 @@
+'''
+Markdown rendering.
+
+The per-paper pieces every output shows (title, authors, links, subjects,
+abstract) are formatted once into PaperFragments by a Renderer and shared
+by the writers, which fill the templates below and write the result
+through a BufferedOutput. With a FragmentCache, the Renderer also keeps
+whole rendered sections across runs so that unchanged ones are reused.
+'''
+
+from dx.classify import parse_subject
+
+
+# templates of the daily digest
+DAILY_HEADER = '# {count} Papers ({since} ~ {until})\n\n'.format
+DAILY_TIER = '## {count} {name} Papers\n'.format
+DAILY_CLUSTER = '## {count} Papers on {label}\n'.format
+DAILY_PAPER = ('\n### {f.title}\n{f.authors}\nabs: {f.abs_url}\n{pdf}{f.tag_line}\n'
+               '```\n{f.abstract}\n```\n{duplicates}\n\n').format
+DAILY_PDF = 'pdf: {}\n'.format
+DAILY_DUPLICATES = 'near-duplicates: {}\n'.format
+
+# stands for the time of rendering in cached sections, which is filled in
+# when they are written
+NOW = '\x00now\x00'
+
+# templates of the twitter highlight
+HIGHLIGHT_HEADER = '# Twitter Hot Papers ({date})\n'.format
+HIGHLIGHT_TITLE = '\n# {no}. {f.title}\n'.format
+# (the section templates are plain strings, part of the fragment cache key)
+HIGHLIGHT_PAPER = ('{f.authors}\n'
+                   ':arrows_clockwise: {retweets}    :heart: {likes}   ({now})\n'
+                   ':link: abs: {f.abs_url}\n{pdf}\n{f.subject_links}\n\n'
+                   '> {f.abstract}\n\n\n\n{tweets}\n\n')
+HIGHLIGHT_PDF = ':link: pdf: {}\n'.format
+
+# templates of the blog post
+BLOG_HEADER = '''---
+title: Hot Papers {date}
+date: {now}
+template: "post"
+draft: false
+slug: "hot-papers-{date}"
+category: "arXiv"
+tags:
+  - "arXiv"
+  - "Twitter"
+  - "Machine Learning"
+  - "Computer Science"
+description: "Hot papers {date}"
+socialImage: "/media/flying-marine.jpg"
+
+---
+'''.format
+BLOG_TITLE = '\n# {no}. {f.title}\n'.format
+BLOG_PAPER = ('\n{f.authors}\n\n'
+              '- retweets: {retweets}, favorites: {likes} ({now})\n\n'
+              '- links: [abs]({f.abs_url}){pdf}\n- {f.subject_links}\n\n'
+              '{f.abstract}\n\n{tweets}\n\n')
+BLOG_PDF = ' | [pdf]({})'.format
+
+SUBJECT_LINK = '[{0}](https://arxiv.org/list/{0}/recent)'.format
+
+
+class PaperFragments:
+
+    __slots__ = ('title', 'authors', 'abs_url', 'pdf_url', 'tags', 'tag_line',
+                 'subject_links', 'abstract')
+
+    def __init__(self, paper):
+        links = paper['links']
+        self.title = paper['title']
+        self.authors = ', '.join(paper['authors'])
+        self.abs_url = links['Abstract']
+        self.pdf_url = links.get('Download PDF')
+        self.tags = [parse_subject(_) for _ in paper['subjects']]
+        self.tag_line = ' | '.join(self.tags)
+        self.subject_links = ' | '.join([SUBJECT_LINK(_) for _ in self.tags])
+        self.abstract = paper['summary'].replace('\n', ' ')
+
+
+class Renderer:
+    '''
+    Formats the fragments of a paper the first time it is rendered; pass
+    the same Renderer to several writers to share them.
+    '''
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._fragments = {}
+
+    def fragments(self, paper):
+        fragments = self._fragments.get(paper['id'])
+        if fragments is None:
+            fragments = self._fragments[paper['id']] = PaperFragments(paper)
+        return fragments
+
+
+class BufferedOutput:
+    '''
+    Collects rendered strings and writes them to `path` in large blocks.
+    '''
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.fout = open(path, 'w')
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.size = 0
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.fout.write(''.join(self.buffer))
+        self.buffer = []
+        self.size = 0
+
+    def close(self):
+        self.flush()
+        self.fout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,112 @@
+import datetime
+import numpy as np
+
+
+class LinearScore:
+    '''
+    Score of a tweet: retweet_weight * retweets + like_weight * likes,
+    optionally halved every `half_life` days since the tweet was posted.
+    The default is the plain retweets + likes.
+    '''
+
+    def __init__(self, retweet_weight=1, like_weight=1, half_life=None):
+        self.retweet_weight = retweet_weight
+        self.like_weight = like_weight
+        self.half_life = half_life
+
+    @property
+    def uses_age(self):
+        return bool(self.half_life)
+
+    def __call__(self, retweets, likes, ages=None):
+        scores = self.retweet_weight * retweets + self.like_weight * likes
+        if self.half_life:
+            scores = scores * np.exp2(-ages / self.half_life)
+        return scores
+
+
+def tweet_ages(tweets, now=None):
+    '''
+    Ages of the tweets in days at `now` (never negative).
+    '''
+    if now is None:
+        now = datetime.datetime.now()
+    posted = np.array([tweet['datestamp'] + 'T' + tweet['timestamp'] for tweet in tweets],
+                      dtype='datetime64[s]')
+    ages = (np.datetime64(now, 's') - posted) / np.timedelta64(1, 'D')
+    return np.maximum(ages, 0.0)
+
+
+def top_k(scores, candidates, k=None):
+    '''
+    Candidate indices ordered by score, highest first; ties are ordered by
+    decreasing index, as list(reversed(sorted(...))) does.
+    Only the k best are fully sorted when k is given.
+    '''
+    candidates = np.asarray(candidates, dtype=np.int64)
+    if k is not None and k < len(candidates):
+        if k <= 0:
+            return candidates[:0]
+        values = scores[candidates]
+        kth = values[np.argpartition(-values, k - 1)[k - 1]]
+        # keep every tie of the k-th score so that the tie order is exact
+        candidates = candidates[values >= kth]
+    order = np.lexsort((-candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+class ScoreEngine:
+    '''
+    Engagement counts of all the tweets of `papers` converted to arrays once.
+
+    Tweet i of paper p is at flat index offsets[p] + i; paper_scores,
+    total_retweets and total_likes are indexed by paper.
+    '''
+
+    def __init__(self, papers, formula=None, now=None):
+        self.papers = papers
+        self.formula = formula if formula is not None else LinearScore()
+        counts = np.fromiter((len(paper['tweets']) for paper in papers),
+                             dtype=np.int64, count=len(papers))
+        self.offsets = np.zeros(len(papers) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.tweets = [tweet for paper in papers for tweet in paper['tweets']]
+        num_tweets = len(self.tweets)
+        self.retweets = np.fromiter((int(tweet['retweets_count']) for tweet in self.tweets),
+                                    dtype=np.int64, count=num_tweets)
+        self.likes = np.fromiter((int(tweet['likes_count']) for tweet in self.tweets),
+                                 dtype=np.int64, count=num_tweets)
+        ages = None
+        if getattr(self.formula, 'uses_age', False):
+            ages = tweet_ages(self.tweets, now=now)
+        self.tweet_scores = np.asarray(self.formula(self.retweets, self.likes, ages))
+
+        owners = np.repeat(np.arange(len(papers)), counts)
+        self.paper_scores = self._per_paper(owners, self.tweet_scores)
+        self.total_retweets = self._per_paper(owners, self.retweets)
+        self.total_likes = self._per_paper(owners, self.likes)
+
+    def _per_paper(self, owners, values):
+        totals = np.bincount(owners, weights=values, minlength=len(self.papers))
+        if np.issubdtype(values.dtype, np.integer):
+            totals = totals.astype(np.int64)
+        return totals
+
+    def top_papers(self, threshold=None, k=None, mask=None):
+        '''
+        Indices of the papers scoring at least `threshold` (and selected by
+        the boolean `mask`), best first.
+        '''
+        selected = np.ones(len(self.papers), dtype=bool)
+        if threshold is not None:
+            selected &= self.paper_scores >= threshold
+        if mask is not None:
+            selected &= np.asarray(mask, dtype=bool)
+        return top_k(self.paper_scores, np.flatnonzero(selected), k)
+
+    def top_tweets(self, index, k=None):
+        '''
+        Flat indices of the tweets of paper `index`, best first.
+        '''
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return top_k(self.tweet_scores, np.arange(start, end), k)
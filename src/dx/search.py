@@ -0,0 +1,362 @@
+'''
+Full-text search over crawled papers.
+
+An index is a directory of flat .npy arrays which are opened memory-mapped,
+so opening an index reads nothing but the array headers:
+
+- terms, terms_blob: the sorted 'field:token' keys (offsets into utf-8 bytes)
+- postings: offsets of the postings of every key
+- post_docs, post_tfs: document number and term frequency of every posting
+- pos_offsets, positions: token positions of every posting
+- lengths: number of tokens of every document and field
+- dates: announcement date of every document (proleptic ordinal)
+- ids, ids_blob, titles, titles_blob: arXiv id and title of every document
+
+Documents are only ever appended: update_index() merges the postings of new
+papers into the existing arrays without reading the old papers again.
+'''
+
+import re
+import math
+import json
+import shutil
+import bisect
+import datetime
+from pathlib import Path
+import numpy as np
+from dx.dates import announced_date, to_iso
+from dx.scoring import top_k
+from dx.metrics import metrics
+
+
+FIELDS = ('title', 'abstract', 'authors', 'subjects')
+
+FIELD_NAMES = {'title': 'title', 'abstract': 'abstract', 'summary': 'abstract',
+               'author': 'authors', 'authors': 'authors',
+               'subject': 'subjects', 'subjects': 'subjects'}
+
+# BM25 weight of a match in each field
+FIELD_WEIGHTS = np.array([2.0, 1.0, 1.0, 0.5])
+
+# 'cs.LG' and '3.5' are kept as single tokens
+r_token = re.compile(r'\w+(?:\.\w+)*')
+
+r_clause = re.compile(r'(?:(?P<field>\w+):)?(?:"(?P<phrase>[^"]*)"?|(?P<term>\S+))')
+
+
+def tokenize(text):
+    return r_token.findall(text.lower())
+
+
+def field_texts(paper):
+    # texts of the authors and subjects are indexed one after another, with
+    # a gap so that a phrase does not match across two of them
+    yield 'title', [paper['title']]
+    yield 'abstract', [paper.get('summary') or '']
+    yield 'authors', list(paper['authors'])
+    yield 'subjects', list(paper['subjects'])
+
+
+def to_ordinal(date):
+    return datetime.datetime.strptime(to_iso(date), '%Y-%m-%d').toordinal()
+
+
+class StringArray:
+    '''
+    Read-only list of strings stored as utf-8 bytes and offsets.
+    '''
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @staticmethod
+    def build(strings):
+        data = [_.encode('utf-8') for _ in strings]
+        offsets = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum([len(_) for _ in data], out=offsets[1:])
+        blob = np.frombuffer(b''.join(data), dtype=np.uint8)
+        return offsets, blob
+
+
+def load_array(path, name):
+    array = np.load(path / f'{name}.npy', mmap_mode='r')
+    return array if array.size else np.load(path / f'{name}.npy')
+
+
+class SearchIndex:
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'meta.json') as fin:
+            self.meta = json.load(fin)
+        arrays = {}
+        for name in ('terms', 'terms_blob', 'postings', 'post_docs', 'post_tfs',
+                     'pos_offsets', 'positions', 'lengths', 'dates',
+                     'ids', 'ids_blob', 'titles', 'titles_blob'):
+            arrays[name] = load_array(self.path, name)
+        self.arrays = arrays
+        self.terms = StringArray(arrays['terms'], arrays['terms_blob'])
+        self.ids = StringArray(arrays['ids'], arrays['ids_blob'])
+        self.titles = StringArray(arrays['titles'], arrays['titles_blob'])
+        self.postings = arrays['postings']
+        self.post_docs = arrays['post_docs']
+        self.post_tfs = arrays['post_tfs']
+        self.pos_offsets = arrays['pos_offsets']
+        self.positions = arrays['positions']
+        self.lengths = arrays['lengths']
+        self.dates = arrays['dates']
+        self.avg_lengths = np.maximum(np.array(self.meta['avg_lengths']), 1.0)
+
+    @staticmethod
+    def exists(path):
+        return (Path(path) / 'meta.json').exists()
+
+    def __len__(self):
+        return len(self.dates)
+
+    def lookup(self, key):
+        i = bisect.bisect_left(self.terms, key)
+        if i < len(self.terms) and self.terms[i] == key:
+            return int(self.postings[i]), int(self.postings[i + 1])
+        return None
+
+    def doc(self, i):
+        return {'id': self.ids[i],
+                'title': self.titles[i],
+                'date': datetime.date.fromordinal(int(self.dates[i])).isoformat()}
+
+    def bm25(self, field, token):
+        '''
+        Documents containing `token` in `field` and their BM25 scores.
+        '''
+        span = self.lookup(f'{field}:{token}')
+        if span is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        start, end = span
+        docs = np.asarray(self.post_docs[start:end], dtype=np.int64)
+        tfs = np.asarray(self.post_tfs[start:end], dtype=np.float64)
+        f = FIELDS.index(field)
+        idf = math.log(1 + (len(self) - len(docs) + 0.5) / (len(docs) + 0.5))
+        norm = 1 - self.b + self.b * self.lengths[docs, f] / self.avg_lengths[f]
+        scores = FIELD_WEIGHTS[f] * idf * tfs * (self.k1 + 1) / (tfs + self.k1 * norm)
+        return docs, scores
+
+    def phrase_docs(self, field, tokens):
+        '''
+        Documents containing the consecutive `tokens` in `field`.
+        '''
+        matches = None
+        for i, token in enumerate(tokens):
+            span = self.lookup(f'{field}:{token}')
+            if span is None:
+                return np.zeros(0, dtype=np.int64)
+            start, end = span
+            offsets = np.asarray(self.pos_offsets[start:end + 1])
+            docs = np.repeat(np.asarray(self.post_docs[start:end], dtype=np.int64),
+                             np.diff(offsets))
+            positions = np.asarray(self.positions[offsets[0]:offsets[-1]], dtype=np.int64)
+            # (document, position of the first token of the phrase), sorted
+            # as postings are sorted by document and positions ascending
+            keys = (docs << 32) + positions - i + len(tokens)
+            if matches is None:
+                matches = keys
+            else:
+                found = np.searchsorted(keys, matches).clip(max=len(keys) - 1)
+                matches = matches[keys[found] == matches]
+            if len(matches) == 0:
+                break
+        return np.unique(matches >> 32)
+
+    @metrics.timed('search')
+    def search(self, query, k=10, since=None, until=None, require_all=True):
+        '''
+        Papers matching `query`, best first, as [(doc, score)].
+
+        A query is a list of clauses: `word`, `"a phrase"`, or either
+        prefixed by a field (`title:`, `abstract:`, `author:`, `subject:`) to
+        only match in that field. By default every clause has to match;
+        with require_all=False any one of them does. `since` (inclusive)
+        and `until` (exclusive) are dates as YYYY/MM/DD or YYYY-MM-DD.
+        '''
+        scores = np.zeros(len(self))
+        matched = np.zeros(len(self), dtype=np.int32)
+        clauses = parse_query(query)
+        for fields, tokens, phrase in clauses:
+            hit = np.zeros(len(self), dtype=bool)
+            for field in fields:
+                if phrase:
+                    docs = self.phrase_docs(field, tokens)
+                    in_phrase = np.zeros(len(self), dtype=bool)
+                    in_phrase[docs] = True
+                    for token in tokens:
+                        token_docs, token_scores = self.bm25(field, token)
+                        scores += in_phrase * np.bincount(token_docs, token_scores,
+                                                          minlength=len(self))
+                else:
+                    docs, token_scores = self.bm25(field, tokens[0])
+                    scores += np.bincount(docs, token_scores, minlength=len(self))
+                hit[docs] = True
+            matched += hit
+
+        if require_all:
+            selected = (matched == len(clauses)) & (len(clauses) > 0)
+        else:
+            selected = matched > 0
+        if since is not None:
+            selected &= self.dates >= to_ordinal(since)
+        if until is not None:
+            selected &= self.dates < to_ordinal(until)
+        candidates = np.flatnonzero(selected)
+        return [(int(doc), float(scores[doc])) for doc in top_k(scores, candidates, k)]
+
+
+def parse_query(query):
+    '''
+    Returns [(fields, tokens, phrase)] for the clauses of `query`.
+    '''
+    clauses = []
+    for m in r_clause.finditer(query):
+        field = m.group('field')
+        if field is not None and field.lower() not in FIELD_NAMES:
+            # not a field, e.g. 'arXiv:2011.01234'
+            text = m.group(0)
+            fields = FIELDS
+        else:
+            text = m.group('phrase') if m.group('phrase') is not None else m.group('term')
+            fields = FIELDS if field is None else (FIELD_NAMES[field.lower()],)
+        tokens = tokenize(text)
+        if tokens:
+            # 'state-of-the-art' is matched as a phrase as well
+            clauses.append((fields, tokens, len(tokens) > 1))
+    return clauses
+
+
+def index_papers(papers, first_doc=0):
+    '''
+    Postings of `papers` numbered from `first_doc`, as (keys, docs, tfs,
+    positions per posting, lengths).
+    '''
+    keys, docs, tfs, positions = [], [], [], []
+    lengths = np.zeros((len(papers), len(FIELDS)), dtype=np.int32)
+    for i, paper in enumerate(papers):
+        for f, (field, texts) in enumerate(field_texts(paper)):
+            token_positions = {}
+            position = 0
+            for text in texts:
+                for token in tokenize(text):
+                    token_positions.setdefault(token, []).append(position)
+                    position += 1
+                position += 1
+            lengths[i, f] = sum([len(_) for _ in token_positions.values()])
+            for token, token_pos in token_positions.items():
+                keys.append(f'{field}:{token}')
+                docs.append(first_doc + i)
+                tfs.append(len(token_pos))
+                positions.append(token_pos)
+    return keys, docs, tfs, positions, lengths
+
+
+@metrics.timed('index_update')
+def update_index(path, papers):
+    '''
+    Adds the papers not in the index at `path` yet (creating it if needed)
+    and returns the number of papers added.
+    '''
+    path = Path(path)
+    old = SearchIndex(path) if SearchIndex.exists(path) else None
+    known = set(old.ids) if old is not None else set([])
+    new_papers = []
+    for paper in papers:
+        if paper['id'] not in known:
+            known.add(paper['id'])
+            new_papers.append(paper)
+    if not new_papers:
+        return 0
+
+    num_old = len(old) if old is not None else 0
+    keys, docs, tfs, positions, lengths = index_papers(new_papers, first_doc=num_old)
+    pos_counts = np.array([len(_) for _ in positions], dtype=np.int64)
+    positions = np.fromiter((p for _ in positions for p in _), dtype=np.int32,
+                            count=int(pos_counts.sum()))
+    docs = np.array(docs, dtype=np.int32)
+    tfs = np.array(tfs, dtype=np.int32)
+    dates = np.array([to_ordinal(announced_date(paper)) for paper in new_papers],
+                     dtype=np.int32)
+    ids = [paper['id'] for paper in new_papers]
+    titles = [paper['title'] for paper in new_papers]
+
+    if old is not None:
+        old_terms = list(old.terms)
+        old_keys = np.repeat(np.arange(len(old_terms)), np.diff(old.postings))
+        terms = sorted(set(old_terms) | set(keys))
+        rank = {term: i for i, term in enumerate(terms)}
+        term_ranks = np.concatenate([np.array([rank[_] for _ in old_terms])[old_keys],
+                                     np.array([rank[_] for _ in keys], dtype=np.int64)])
+        docs = np.concatenate([old.post_docs, docs])
+        tfs = np.concatenate([old.post_tfs, tfs])
+        pos_counts = np.concatenate([np.diff(old.pos_offsets), pos_counts])
+        positions = np.concatenate([old.positions, positions])
+        lengths = np.concatenate([old.lengths, lengths])
+        dates = np.concatenate([old.dates, dates])
+        ids = list(old.ids) + ids
+        titles = list(old.titles) + titles
+    else:
+        terms = sorted(set(keys))
+        rank = {term: i for i, term in enumerate(terms)}
+        term_ranks = np.array([rank[_] for _ in keys], dtype=np.int64)
+
+    # postings sorted by key, then document
+    order = np.lexsort((docs, term_ranks))
+    starts = np.cumsum(pos_counts) - pos_counts
+    counts = pos_counts[order]
+    new_starts = np.cumsum(counts) - counts
+    gather = np.repeat(starts[order] - new_starts, counts) + np.arange(int(counts.sum()))
+    pos_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(counts, out=pos_offsets[1:])
+    postings = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ranks, minlength=len(terms)), out=postings[1:])
+
+    arrays = {'postings': postings,
+              'post_docs': docs[order].astype(np.int32),
+              'post_tfs': tfs[order].astype(np.int32),
+              'pos_offsets': pos_offsets,
+              'positions': positions[gather].astype(np.int32),
+              'lengths': lengths.astype(np.int32),
+              'dates': dates.astype(np.int32)}
+    for name, strings in (('terms', terms), ('ids', ids), ('titles', titles)):
+        arrays[name], arrays[name + '_blob'] = StringArray.build(strings)
+    meta = {'num_docs': len(dates),
+            'avg_lengths': arrays['lengths'].mean(axis=0).tolist()}
+    del old
+
+    # written next to the index and swapped in, so that a failure leaves
+    # the old index intact
+    tmp_path = path.with_name(path.name + '.tmp')
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(tmp_path / f'{name}.npy', array)
+    with open(tmp_path / 'meta.json', 'w') as fout:
+        json.dump(meta, fout)
+    if path.exists():
+        old_path = path.with_name(path.name + '.old')
+        path.rename(old_path)
+        tmp_path.rename(path)
+        shutil.rmtree(old_path)
+    else:
+        tmp_path.rename(path)
+    return len(new_papers)
@@ -0,0 +1,88 @@
+import json
+import sqlite3
+from pathlib import Path
+from dx.dates import announced_date, to_iso
+from dx.listing import primary_subject
+
+
+class PaperStore:
+    '''
+    Local SQLite store of crawled papers keyed by arXiv id and indexed by
+    announcement date and primary subject.
+    '''
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS papers (
+                id TEXT PRIMARY KEY,
+                date TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS papers_date ON papers (date);
+            CREATE INDEX IF NOT EXISTS papers_subject_date ON papers (subject, date);
+        ''')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def upsert(self, papers):
+        rows = [(paper['id'], announced_date(paper), primary_subject(paper),
+                 json.dumps(paper))
+                for paper in papers]
+        with self.conn:
+            self.conn.executemany('''
+                INSERT INTO papers (id, date, subject, data) VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    date = excluded.date,
+                    subject = excluded.subject,
+                    data = excluded.data
+            ''', rows)
+        return len(rows)
+
+    def get(self, arxiv_id):
+        row = self.conn.execute('SELECT data FROM papers WHERE id = ?',
+                                (arxiv_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, since=None, until=None, subjects=None):
+        '''
+        Papers announced in [since, until), newest first, optionally limited
+        to the given primary subjects (e.g. ['cs.LG', 'stat.ML']).
+        '''
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append('date >= ?')
+            params.append(to_iso(since))
+        if until is not None:
+            conditions.append('date < ?')
+            params.append(to_iso(until))
+        if subjects:
+            conditions.append(f'subject IN ({", ".join("?" * len(subjects))})')
+            params.extend(subjects)
+        sql = 'SELECT data FROM papers'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY date DESC, rowid'
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def load(self, since, until, subjects=None):
+        '''
+        Same as query() but in the {'meta', 'papers'} shape of crawl_recent.
+        '''
+        since = to_iso(since)
+        until = to_iso(until)
+        metadata = {'since': since.replace('-', '/'),
+                    'until': until.replace('-', '/')}
+        return {'meta': metadata,
+                'papers': self.query(since, until, subjects)}
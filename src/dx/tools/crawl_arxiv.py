@@ -0,0 +1,154 @@
+import argparse
+import datetime
+from pathlib import Path
+from loguru import logger
+from dx.listing import PARSERS
+from dx.store import PaperStore
+from dx.checkpoint import CrawlCheckpoint
+from dx.fetch import HttpFetcher, ResponseCache, CachingFetcher
+from dx.dataio import dump
+from dx.metrics import instrumented
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Crawl arXiv')
+    parser.add_argument('--targets', nargs='+', default=['cs', 'stat.ML'],
+                        type=str)
+    parser.add_argument('--since', type=int, default=0)
+    parser.add_argument('--until', type=int, default=0)
+    parser.add_argument('--source', choices=['listing', 'oai'], default='listing',
+                        help='scrape the listing pages (past week only), or harvest '
+                        'OAI-PMH records (any window, abstracts included)')
+    parser.add_argument('--oai_url', type=str, default=None,
+                        help='default: dx.oai.OAI_URL')
+    parser.add_argument('--oai_interval', type=float, default=3.0,
+                        help='min seconds between two OAI-PMH requests')
+    parser.add_argument('--num_workers', type=int, default=4,
+                        help='number of categories crawled concurrently')
+    parser.add_argument('--max_per_host', type=int, default=4,
+                        help='max concurrent connections per host')
+    parser.add_argument('--num_shows', type=int, default=512,
+                        help='number of entries per listing page')
+    parser.add_argument('--prefetch', type=int, default=1,
+                        help='number of listing pages fetched ahead of parsing')
+    parser.add_argument('--parser', choices=PARSERS, default='stream',
+                        help='listing page parser')
+    parser.add_argument('--chunk_size', type=int, default=100,
+                        help='number of ids per arXiv API request')
+    parser.add_argument('--enrich_workers', type=int, default=2,
+                        help='number of concurrent arXiv API requests')
+    parser.add_argument('--enrich_interval', type=float, default=3.0,
+                        help='min seconds between two arXiv API requests')
+    parser.add_argument('--metadata_cache', type=Path,
+                        default='result/cache/metadata',
+                        help='directory of cached arXiv API metadata')
+    parser.add_argument('--store', type=Path, default=None,
+                        help='SQLite paper store to upsert the crawled papers into')
+    parser.add_argument('--checkpoint', type=Path, default=None,
+                        help='crawl incrementally, keeping the crawl state in this file '
+                        '(requires --store)')
+    parser.add_argument('--http_cache', type=Path, default=None,
+                        help='keep the downloaded listing pages and API responses in this '
+                        'SQLite file, and revalidate them instead of downloading them again')
+    parser.add_argument('--http_cache_size', type=int, default=512,
+                        help='max size of the cached responses (MB)')
+    parser.add_argument('--replay', action='store_true',
+                        help='with --http_cache, serve the cached responses only, offline')
+    parser.add_argument('--today', type=str, default=None,
+                        help='YYYY/MM/DD the window is relative to (default: the current date)')
+    parser.add_argument('--dedup', type=Path, default=None,
+                        help='skip the papers already crawled in previous runs, '
+                        'recorded in this SQLite file')
+    parser.add_argument('--keep_known', action='store_true',
+                        help="with --dedup, keep the papers of previous runs (tagged 'replacement')")
+    parser.add_argument('--index', type=Path, default=None,
+                        help='add the crawled papers to this search index')
+    parser.add_argument('--drop_detail', action='store_true',
+                        help="don't keep the full arXiv API response in paper['detail']")
+    parser.add_argument('-o', '--output_file', type=Path,
+                        default='result/papers.json',
+                        help='.json or .jsonl, optionally with .gz or .zst')
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help='write per-stage timers and counters here '
+                        '(.prom: Prometheus textfile, otherwise JSON)')
+    parser.add_argument('--profile', type=Path, default=None,
+                        help='run under cProfile and save the stats here')
+    args = parser.parse_args()
+    assert(args.since >= args.until)
+    assert(not args.replay or args.http_cache is not None)
+    if args.checkpoint is not None and args.store is None:
+        # the papers of previous crawls are read back from the store
+        parser.error('--checkpoint requires --store')
+    return args
+
+
+def main(args):
+    logger.info(args)
+
+    fetcher = HttpFetcher(num_workers=args.num_workers, max_per_host=args.max_per_host)
+    if args.http_cache is not None:
+        fetcher = CachingFetcher(ResponseCache(args.http_cache,
+                                               max_bytes=args.http_cache_size << 20),
+                                 fetcher=fetcher,
+                                 mode='replay' if args.replay else 'revalidate')
+    store = PaperStore(args.store) if args.store is not None else None
+    checkpoint = (CrawlCheckpoint(args.checkpoint)
+                  if args.checkpoint is not None else None)
+    dedup = None
+    if args.dedup is not None:
+        # numpy is only imported for --dedup
+        from dx.dedup import DedupIndex
+        dedup = DedupIndex(args.dedup)
+    kwargs = dict(num_workers=args.num_workers,
+                  max_per_host=args.max_per_host,
+                  store=store,
+                  checkpoint=checkpoint,
+                  dedup=dedup,
+                  keep_known=args.keep_known,
+                  fetcher=fetcher)
+    # only the modules of the selected source are imported (the arXiv API
+    # client is not needed for OAI-PMH)
+    if args.source == 'oai':
+        from dx.oai import OAICrawler, OAI_URL
+        crawler = OAICrawler(base_url=args.oai_url if args.oai_url is not None else OAI_URL,
+                             interval=0 if args.replay else args.oai_interval,
+                             **kwargs)
+    else:
+        from dx.crawler import Crawler
+        from dx.enrich import Enricher
+        enricher = Enricher(chunk_size=args.chunk_size,
+                            num_workers=args.enrich_workers,
+                            interval=0 if args.replay else args.enrich_interval,
+                            cache_dir=args.metadata_cache,
+                            fetcher=fetcher)
+        crawler = Crawler(enricher=enricher, **kwargs)
+    papers = crawler.crawl_recent(targets=args.targets,
+                                  since=args.since,
+                                  until=args.until,
+                                  num_shows=args.num_shows,
+                                  prefetch=args.prefetch,
+                                  parser=args.parser,
+                                  today=(datetime.datetime.strptime(args.today, '%Y/%m/%d')
+                                         if args.today is not None else None))
+    if args.http_cache is not None:
+        logger.info(f'http cache: {fetcher.stats()}')
+
+    if args.drop_detail:
+        for paper in papers['papers']:
+            paper.pop('detail', None)
+
+    logger.info(f'saving {str(args.output_file)}')
+    dump(papers, args.output_file)
+
+    if args.index is not None:
+        from dx.search import update_index
+        num_added = update_index(args.index, papers['papers'])
+        logger.info(f'{num_added} papers added to {args.index}')
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    with instrumented(args.metrics, args.profile):
+        main(args)
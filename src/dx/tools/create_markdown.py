@@ -0,0 +1,183 @@
+from pathlib import Path
+import click
+from loguru import logger
+from dx.store import PaperStore
+from dx.records import load, from_data
+from dx.classify import load_tiers
+from dx.render import Renderer
+from dx.fragment_cache import FragmentCache
+from dx.writers import (DailyArxivWriter, TwitterHighlightWriter, HotPaperBlogWriter,
+                        make_oembed_resolver, make_formula, blog_output_file)
+from dx.metrics import instrumented
+
+
+def hot_paper_options(command):
+    options = [
+        click.option('-p', '--paper_score_threshold', default=50, type=int),
+        click.option('-t', '--tweet_score_threshold', default=25, type=int),
+        click.option('--oembed_cache', default='result/cache/oembed.db', type=Path),
+        click.option('--retweet_weight', default=1.0, type=float),
+        click.option('--like_weight', default=1.0, type=float),
+        click.option('--half_life', default=0.0, type=float,
+                     help='halve tweet scores every this many days since posted (0: no decay)'),
+        click.option('--fragment_cache', default='result/cache/fragments.db', type=Path,
+                     help='reuse the sections of papers whose tweets have not changed'),
+        click.option('--fragment_cache_size', default=10000, type=int,
+                     help='max number of cached sections'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def daily_options(command):
+    options = [
+        click.option('--tiers', default=None, type=Path,
+                     help='JSON file of the sections to sort papers into '
+                     '(default: high/middle/low priority)'),
+        click.option('--cluster', is_flag=True,
+                     help='group papers by topic instead, folding near-duplicates'),
+        click.option('--num_clusters', default=None, type=int,
+                     help='number of topics (default: one per 30 papers)'),
+        click.option('--duplicate_threshold', default=0.8, type=float,
+                     help='estimated Jaccard similarity of near-duplicate abstracts'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def make_daily_writer(tiers, cluster, num_clusters, duplicate_threshold, renderer=None):
+    clusterer = None
+    if cluster:
+        # scipy is only imported for --cluster
+        from dx.cluster import PaperClusterer
+        clusterer = PaperClusterer(num_clusters=num_clusters,
+                                   duplicate_threshold=duplicate_threshold)
+    return DailyArxivWriter(tiers=load_tiers(tiers) if tiers is not None else None,
+                            renderer=renderer, clusterer=clusterer)
+
+
+def make_resolver(oembed_cache):
+    # the credentials may come from .env, only needed by the twitter commands
+    try:
+        import dotenv
+        dotenv.load_dotenv()
+    except Exception:
+        print('skpped loading environment variables from .env')
+    return make_oembed_resolver(oembed_cache)
+
+
+def make_renderer(fragment_cache, fragment_cache_size):
+    cache = FragmentCache(fragment_cache, max_entries=fragment_cache_size)
+    return Renderer(cache=cache)
+
+
+def report(renderer):
+    logger.info(f'fragment cache: {renderer.cache.stats()}')
+    renderer.cache.close()
+
+
+@click.group()
+@click.option('--metrics', default=None, type=Path,
+              help='write per-stage timers and counters here (.prom: Prometheus textfile, '
+              'otherwise JSON)')
+@click.option('--profile', default=None, type=Path,
+              help='run under cProfile and save the stats here')
+@click.pass_context
+def cli(ctx, metrics, profile):
+    ctx.with_resource(instrumented(metrics, profile))
+
+
+@cli.command('twitter_highlight')
+@click.option('-i', '--input_file', default='result/papers_with_tweets.json', type=Path)
+@click.option('-o', '--output_file', default='result/twitter_highlights.md', type=Path)
+@hot_paper_options
+def twitter_highlight(input_file, output_file, paper_score_threshold, tweet_score_threshold,
+                      oembed_cache, retweet_weight, like_weight, half_life,
+                      fragment_cache, fragment_cache_size):
+    data = load(input_file)
+    renderer = make_renderer(fragment_cache, fragment_cache_size)
+    writer = TwitterHighlightWriter(paper_score_threshold=paper_score_threshold,
+                                    tweet_score_threshold=tweet_score_threshold,
+                                    resolver=make_resolver(oembed_cache),
+                                    formula=make_formula(retweet_weight, like_weight, half_life),
+                                    renderer=renderer)
+    writer.save_markdown(data, output_file)
+    report(renderer)
+
+
+@cli.command('blog')
+@click.option('-i', '--input_file', default='result/papers_with_tweets.json', type=Path)
+@click.option('-o', '--output_dir', default='result', type=Path)
+@hot_paper_options
+def blog(input_file, output_dir, paper_score_threshold, tweet_score_threshold, oembed_cache,
+         retweet_weight, like_weight, half_life, fragment_cache, fragment_cache_size):
+    data = load(input_file)
+    if len(data['papers']) == 0:
+        return
+    renderer = make_renderer(fragment_cache, fragment_cache_size)
+    writer = HotPaperBlogWriter(paper_score_threshold=paper_score_threshold,
+                                tweet_score_threshold=tweet_score_threshold,
+                                resolver=make_resolver(oembed_cache),
+                                formula=make_formula(retweet_weight, like_weight, half_life),
+                                renderer=renderer)
+
+    output_file = blog_output_file(data['meta'], output_dir)
+    writer.save_markdown(data, output_file)
+    report(renderer)
+
+
+@cli.command('daily_arxiv')
+@click.option('-i', '--input_file', default='result/papers.json', type=Path)
+@click.option('-o', '--output_file', default='result/daily_arxiv.md', type=Path)
+@click.option('--store', default=None, type=Path,
+              help='read papers from this SQLite paper store instead of input_file')
+@click.option('--since', default=None, type=str, help='YYYY/MM/DD (inclusive, with --store)')
+@click.option('--until', default=None, type=str, help='YYYY/MM/DD (exclusive, with --store)')
+@daily_options
+def daily_arxiv(input_file, output_file, store, since, until, tiers, cluster, num_clusters,
+                duplicate_threshold):
+    if store is not None:
+        assert(since is not None and until is not None)
+        with PaperStore(store) as paper_store:
+            data = from_data(paper_store.load(since, until))
+    else:
+        data = load(input_file)
+    writer = make_daily_writer(tiers, cluster, num_clusters, duplicate_threshold)
+    writer.save_markdown(data, output_file)
+
+
+@cli.command('render-all')
+@click.option('-i', '--input_file', default='result/papers_with_tweets.json', type=Path)
+@click.option('-o', '--output_dir', default='result', type=Path)
+@hot_paper_options
+@daily_options
+def render_all(input_file, output_dir, paper_score_threshold, tweet_score_threshold,
+               oembed_cache, retweet_weight, like_weight, half_life,
+               fragment_cache, fragment_cache_size, tiers, cluster, num_clusters,
+               duplicate_threshold):
+    '''daily_arxiv, twitter_highlight and blog from a single load of input_file'''
+    data = load(input_file)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # the formatted title, authors, links and abstract of a paper are shared
+    renderer = make_renderer(fragment_cache, fragment_cache_size)
+    writer = make_daily_writer(tiers, cluster, num_clusters, duplicate_threshold,
+                               renderer=renderer)
+    writer.save_markdown(data, output_dir / 'daily_arxiv.md')
+    resolver = make_resolver(oembed_cache)
+    formula = make_formula(retweet_weight, like_weight, half_life)
+    writer = TwitterHighlightWriter(paper_score_threshold=paper_score_threshold,
+                                    tweet_score_threshold=tweet_score_threshold,
+                                    resolver=resolver, formula=formula, renderer=renderer)
+    writer.save_markdown(data, output_dir / 'twitter_highlights.md')
+    if len(data['papers']) > 0:
+        writer = HotPaperBlogWriter(paper_score_threshold=paper_score_threshold,
+                                    tweet_score_threshold=tweet_score_threshold,
+                                    resolver=resolver, formula=formula, renderer=renderer)
+        writer.save_markdown(data, blog_output_file(data['meta'], output_dir))
+    report(renderer)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,213 @@
+import argparse
+import datetime
+import queue
+import threading
+from pathlib import Path
+from loguru import logger
+from dx.crawler import Crawler
+from dx.listing import PARSERS
+from dx.enrich import Enricher
+from dx.ratelimit import AdaptiveRateController
+from dx.tweets import TweetSearcher
+from dx.tweet_cache import TweetCache
+from dx.dataio import dump
+from dx.records import from_data
+from dx.render import Renderer
+from dx.fragment_cache import FragmentCache
+from dx.writers import (DailyArxivWriter, TwitterHighlightWriter, HotPaperBlogWriter,
+                        make_oembed_resolver, blog_output_file)
+from dx.metrics import instrumented
+
+
+OUTPUTS = ('daily_arxiv', 'twitter_highlight', 'blog')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Crawl arXiv, search Twitter and write markdown in one go')
+    parser.add_argument('--targets', nargs='+', default=['cs', 'stat.ML'],
+                        type=str)
+    parser.add_argument('--since', type=int, default=0)
+    parser.add_argument('--until', type=int, default=0)
+    parser.add_argument('--outputs', nargs='+', choices=OUTPUTS, default=list(OUTPUTS))
+    # crawl stage
+    parser.add_argument('--num_workers', type=int, default=4,
+                        help='number of categories crawled concurrently')
+    parser.add_argument('--prefetch', type=int, default=1)
+    parser.add_argument('--parser', choices=PARSERS, default='stream')
+    parser.add_argument('--enrich_workers', type=int, default=2)
+    parser.add_argument('--metadata_cache', type=Path, default='result/cache/metadata')
+    # search stage
+    parser.add_argument('--search_workers', type=int, default=4,
+                        help='number of concurrent tweet searches')
+    parser.add_argument('--batch_size', type=int, default=64,
+                        help='number of papers handed to the tweet search at a time')
+    parser.add_argument('--queue_size', type=int, default=1024,
+                        help='max papers waiting for the tweet search')
+    parser.add_argument('--max_query_length', type=int, default=0)
+    parser.add_argument('--tweet_cache', type=Path, default=None)
+    parser.add_argument('-s', '--sleep', type=float, default=0.1)
+    # render stage
+    parser.add_argument('--oembed_cache', type=Path, default='result/cache/oembed.db')
+    parser.add_argument('--fragment_cache', type=Path, default='result/cache/fragments.db')
+    parser.add_argument('--fragment_cache_size', type=int, default=10000)
+    parser.add_argument('-p', '--paper_score_threshold', default=50, type=int)
+    parser.add_argument('-t', '--tweet_score_threshold', default=25, type=int)
+    parser.add_argument('-o', '--output_dir', type=Path, default='result')
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help='write per-stage timers and counters here '
+                        '(.prom: Prometheus textfile, otherwise JSON)')
+    parser.add_argument('--profile', type=Path, default=None,
+                        help='run under cProfile and save the stats here')
+    args = parser.parse_args()
+    assert(args.since >= args.until)
+    return args
+
+
+class Pipeline:
+    '''
+    Runs the crawl and the tweet search concurrently: enriched papers are
+    put on a bounded queue (the crawl blocks while it is full) and searched
+    in batches while the crawl goes on. The first error in any stage stops
+    both stages and is raised from run().
+    '''
+
+    _done = object()
+
+    def __init__(self, crawler, searcher, batch_size=64, queue_size=1024):
+        self.crawler = crawler
+        self.searcher = searcher
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop = threading.Event()
+        self.errors = []
+
+    def put(self, item):
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError('pipeline stopped')
+
+    def crawl(self, crawl_args, result):
+        try:
+            def on_papers(papers):
+                for paper in papers:
+                    self.put(paper)
+            result.update(self.crawler.crawl_recent(on_papers=on_papers, **crawl_args))
+            self.put(self._done)
+        except Exception as e:
+            self.fail('crawl', e)
+
+    def search(self):
+        try:
+            batch = []
+            while not self.stop.is_set():
+                try:
+                    item = self.queue.get(timeout=0.5)
+                except queue.Empty:
+                    item = None
+                if item is self._done:
+                    break
+                if item is not None:
+                    batch.append(item)
+                # search as soon as a batch is full, or when the crawl is idle
+                if batch and (len(batch) >= self.batch_size or item is None):
+                    self.searcher.search_all(batch)
+                    batch = []
+            if batch and not self.stop.is_set():
+                self.searcher.search_all(batch)
+        except Exception as e:
+            self.fail('search', e)
+
+    def drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def fail(self, stage, e):
+        if self.stop.is_set():
+            return
+        logger.exception(f'{stage} stage failed')
+        self.errors.append(e)
+        self.stop.set()
+
+    def run(self, **crawl_args):
+        result = {}
+        threads = [threading.Thread(target=self.crawl, args=(crawl_args, result),
+                                    name='crawl'),
+                   threading.Thread(target=self.search, name='search')]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            # the crawl may be blocked on the full queue: stop both stages,
+            # and let it return
+            logger.warning('interrupted, stopping the pipeline')
+            self.stop.set()
+            self.drain()
+            for thread in threads:
+                thread.join()
+            raise
+        if self.errors:
+            raise self.errors[0]
+        return result
+
+
+def main(args):
+    logger.info(args)
+
+    enricher = Enricher(num_workers=args.enrich_workers,
+                        cache_dir=args.metadata_cache)
+    crawler = Crawler(num_workers=args.num_workers, enricher=enricher)
+    cache = TweetCache(args.tweet_cache) if args.tweet_cache is not None else None
+    searcher = TweetSearcher(num_workers=args.search_workers,
+                             controller=AdaptiveRateController(interval=args.sleep),
+                             max_query_length=args.max_query_length,
+                             cache=cache)
+    pipeline = Pipeline(crawler, searcher,
+                        batch_size=args.batch_size,
+                        queue_size=args.queue_size)
+    data = pipeline.run(targets=args.targets,
+                        since=args.since,
+                        until=args.until,
+                        prefetch=args.prefetch,
+                        parser=args.parser)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    dump(data, args.output_dir / 'papers_with_tweets.json')
+    # the writers only need the compact records
+    data = from_data(data)
+
+    renderer = Renderer(cache=FragmentCache(args.fragment_cache,
+                                            max_entries=args.fragment_cache_size))
+    if 'daily_arxiv' in args.outputs:
+        DailyArxivWriter(renderer=renderer).save_markdown(data, args.output_dir / 'daily_arxiv.md')
+    if 'twitter_highlight' in args.outputs or 'blog' in args.outputs:
+        resolver = make_oembed_resolver(args.oembed_cache)
+    if 'twitter_highlight' in args.outputs:
+        writer = TwitterHighlightWriter(paper_score_threshold=args.paper_score_threshold,
+                                        tweet_score_threshold=args.tweet_score_threshold,
+                                        resolver=resolver,
+                                        renderer=renderer)
+        writer.save_markdown(data, args.output_dir / 'twitter_highlights.md')
+    if 'blog' in args.outputs and len(data['papers']) > 0:
+        writer = HotPaperBlogWriter(paper_score_threshold=args.paper_score_threshold,
+                                    tweet_score_threshold=args.tweet_score_threshold,
+                                    resolver=resolver,
+                                    renderer=renderer)
+        writer.save_markdown(data, blog_output_file(data['meta'], args.output_dir))
+    logger.info(f'fragment cache: {renderer.cache.stats()}')
+    logger.info(f'finished at {datetime.datetime.now()}')
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    with instrumented(args.metrics, args.profile):
+        main(args)
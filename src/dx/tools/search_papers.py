@@ -0,0 +1,83 @@
+import argparse
+import time
+from pathlib import Path
+from loguru import logger
+from dx.dataio import iter_records
+from dx.store import PaperStore
+from dx.search import SearchIndex, update_index
+from dx.metrics import instrumented
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Full-text search over the crawled papers')
+    parser.add_argument('--index', type=Path, default='result/index',
+                        help='directory of the search index')
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help='write per-stage timers and counters here '
+                        '(.prom: Prometheus textfile, otherwise JSON)')
+    parser.add_argument('--profile', type=Path, default=None,
+                        help='run under cProfile and save the stats here')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    index_parser = subparsers.add_parser('index', help='add crawled papers to the index')
+    index_parser.add_argument('-i', '--input_files', nargs='*', type=Path, default=[],
+                              help='crawl results (.json or .jsonl, optionally compressed)')
+    index_parser.add_argument('--store', type=Path, default=None,
+                              help='also index the papers of this SQLite paper store')
+
+    search_parser = subparsers.add_parser('search', help='search the index')
+    search_parser.add_argument('query', nargs='+', type=str,
+                               help='words, "phrases", field:word or field:"phrase" '
+                               '(fields: title, abstract, author, subject)')
+    search_parser.add_argument('--since', type=str, default=None,
+                               help='YYYY/MM/DD (inclusive)')
+    search_parser.add_argument('--until', type=str, default=None,
+                               help='YYYY/MM/DD (exclusive)')
+    search_parser.add_argument('-k', '--topk', type=int, default=20)
+    search_parser.add_argument('--any', action='store_true',
+                               help='match papers with any of the clauses instead of all')
+    args = parser.parse_args()
+    return args
+
+
+def index(args):
+    total = 0
+    for input_file in args.input_files:
+        _, papers = iter_records(input_file)
+        num_added = update_index(args.index, papers)
+        logger.info(f'{input_file}: {num_added} papers added')
+        total += num_added
+    if args.store is not None:
+        with PaperStore(args.store) as store:
+            num_added = update_index(args.index, store.query())
+        logger.info(f'{args.store}: {num_added} papers added')
+        total += num_added
+    logger.info(f'{total} papers added to {args.index}')
+
+
+def search(args):
+    start = time.perf_counter()
+    search_index = SearchIndex(args.index)
+    results = search_index.search(' '.join(args.query), k=args.topk,
+                                  since=args.since, until=args.until,
+                                  require_all=not args.any)
+    elapsed = time.perf_counter() - start
+    for rank, (doc, score) in enumerate(results, 1):
+        info = search_index.doc(doc)
+        print(f'{rank:3d}. {score:6.2f}  {info["date"]}  {info["id"]:<16} {info["title"]}')
+    logger.info(f'{len(results)} results from {len(search_index)} papers in {elapsed * 1e3:.1f} ms')
+
+
+def main(args):
+    if args.command == 'index':
+        index(args)
+    else:
+        search(args)
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    with instrumented(args.metrics, args.profile):
+        main(args)
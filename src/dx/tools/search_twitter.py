@@ -0,0 +1,87 @@
+import argparse
+import datetime
+from pathlib import Path
+from loguru import logger
+from dx.ratelimit import AdaptiveRateController
+from dx.tweets import TweetSearcher, TwintBackend, LocalBackend
+from dx.tweet_cache import TweetCache
+from dx.dataio import iter_records, RecordWriter
+from dx.metrics import instrumented
+
+
+def parse_args():
+    parser = argparse.ArgumentParser('Search Twitter')
+    parser.add_argument('-i', '--input_file', type=Path,
+                        default='result/papers.json',
+                        help='.json or .jsonl, optionally with .gz or .zst')
+    parser.add_argument('-o', '--output_file', type=Path,
+                        default='result/papers_with_tweets.json',
+                        help='.json or .jsonl, optionally with .gz or .zst')
+    parser.add_argument('-s', '--sleep', type=float,
+                        default=0.1,
+                        help='initial interval between two searches')
+    parser.add_argument('--min_sleep', type=float, default=0.01)
+    parser.add_argument('--max_sleep', type=float, default=60.0)
+    parser.add_argument('-n', '--num_workers', type=int, default=4,
+                        help='number of concurrent searches')
+    parser.add_argument('--limit', type=int, default=100,
+                        help='max tweets per paper')
+    parser.add_argument('--max_query_length', type=int, default=0,
+                        help='pack several papers into OR queries of at most '
+                        'this many characters (0: one query per paper)')
+    parser.add_argument('--backend', choices=['twint', 'local'], default='twint')
+    parser.add_argument('--tweets_file', type=Path, default=None,
+                        help='tweets searched by the local backend (JSON list)')
+    parser.add_argument('--tweet_cache', type=Path, default=None,
+                        help='SQLite tweet cache; cached papers are only searched for newer tweets')
+    parser.add_argument('--refresh_days', type=float, default=3.0,
+                        help='engagement counts are refreshed for tweets younger than this')
+    parser.add_argument('--chunk_size', type=int, default=1000,
+                        help='number of papers read, searched and written at a time')
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help='write per-stage timers and counters here '
+                        '(.prom: Prometheus textfile, otherwise JSON)')
+    parser.add_argument('--profile', type=Path, default=None,
+                        help='run under cProfile and save the stats here')
+    args = parser.parse_args()
+    return args
+
+
+def main(args):
+
+    controller = AdaptiveRateController(interval=args.sleep,
+                                        min_interval=args.min_sleep,
+                                        max_interval=args.max_sleep)
+    cache = TweetCache(args.tweet_cache) if args.tweet_cache is not None else None
+    if args.backend == 'local':
+        backend = LocalBackend.load(args.tweets_file)
+    else:
+        backend = TwintBackend()
+    searcher = TweetSearcher(num_workers=args.num_workers,
+                             limit=args.limit,
+                             controller=controller,
+                             backend=backend,
+                             max_query_length=args.max_query_length,
+                             cache=cache,
+                             refresh_age=datetime.timedelta(days=args.refresh_days))
+
+    meta, papers = iter_records(args.input_file)
+    with RecordWriter(args.output_file, meta) as writer:
+        chunk = []
+        for paper in papers:
+            chunk.append(paper)
+            if len(chunk) >= args.chunk_size:
+                for searched in searcher.search_all(chunk):
+                    writer.write(searched)
+                chunk = []
+        if chunk:
+            for searched in searcher.search_all(chunk):
+                writer.write(searched)
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+    logger.info(args)
+    with instrumented(args.metrics, args.profile):
+        main(args)
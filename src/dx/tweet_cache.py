@@ -0,0 +1,92 @@
+import json
+import sqlite3
+import datetime
+import threading
+from pathlib import Path
+
+
+def created_at(tweet):
+    return tweet['datestamp'] + ' ' + tweet['timestamp']
+
+
+class TweetCache:
+    '''
+    Persistent SQLite cache of the tweets found for each paper, with the
+    creation time of the newest one, so that later searches only ask for
+    newer tweets.
+    '''
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS tweets (
+                arxiv_id TEXT NOT NULL,
+                tweet_id TEXT NOT NULL,
+                created TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (arxiv_id, tweet_id)
+            );
+            CREATE TABLE IF NOT EXISTS searches (
+                arxiv_id TEXT PRIMARY KEY,
+                newest TEXT,
+                searched TEXT NOT NULL
+            );
+        ''')
+
+    def close(self):
+        self.conn.close()
+
+    def since(self, arxiv_id, refresh_age):
+        '''
+        Time from which tweets of the paper have to be searched again: the
+        newest cached tweet, or earlier so that the engagement counts of the
+        tweets younger than `refresh_age` are refreshed. None if the paper
+        was never searched.
+        '''
+        with self._lock:
+            row = self.conn.execute('SELECT newest, searched FROM searches WHERE arxiv_id = ?',
+                                    (arxiv_id,)).fetchone()
+        if row is None:
+            return None
+        newest, _ = row
+        refresh_from = (datetime.datetime.now() - refresh_age).strftime('%Y-%m-%d %H:%M:%S')
+        if newest is None:
+            return refresh_from
+        return min(newest, refresh_from)
+
+    def merge(self, arxiv_id, tweets):
+        '''
+        Adds the found tweets (updating the counts of the known ones) and
+        returns all the cached tweets of the paper, newest first.
+        '''
+        rows = [(arxiv_id, str(tweet['id']), created_at(tweet), json.dumps(tweet))
+                for tweet in tweets]
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock, self.conn:
+            self.conn.executemany('''
+                INSERT INTO tweets (arxiv_id, tweet_id, created, data) VALUES (?, ?, ?, ?)
+                ON CONFLICT(arxiv_id, tweet_id) DO UPDATE SET data = excluded.data
+            ''', rows)
+            self.conn.execute('''
+                INSERT INTO searches (arxiv_id, newest, searched)
+                SELECT ?, MAX(created), ? FROM tweets WHERE arxiv_id = ?
+                ON CONFLICT(arxiv_id) DO UPDATE SET
+                    newest = excluded.newest,
+                    searched = excluded.searched
+            ''', (arxiv_id, now, arxiv_id))
+            return self._tweets(arxiv_id)
+
+    def tweets(self, arxiv_id):
+        '''
+        The cached tweets of the paper, newest first.
+        '''
+        with self._lock:
+            return self._tweets(arxiv_id)
+
+    def _tweets(self, arxiv_id):
+        return [json.loads(row[0]) for row in self.conn.execute(
+            'SELECT data FROM tweets WHERE arxiv_id = ? ORDER BY created DESC, tweet_id DESC',
+            (arxiv_id,))]
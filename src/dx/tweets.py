@@ -0,0 +1,259 @@
+import re
+import json
+import time
+import asyncio
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from loguru import logger
+from dx.ratelimit import AdaptiveRateController
+from dx.tweet_cache import created_at
+from dx.metrics import metrics
+
+
+class TwintBackend:
+
+    def search(self, query, limit=100, since=None):
+        import twint
+        # twint runs its own asyncio loop, which worker threads do not have
+        try:
+            asyncio.get_event_loop()
+        except RuntimeError:
+            asyncio.set_event_loop(asyncio.new_event_loop())
+        tweets = []
+        config = twint.Config()
+        config.Search = query
+        config.limit = limit
+        if since is not None:
+            config.Since = since
+        config.Store_object = True
+        config.Hide_output = True
+        config.Store_object_tweets_list = tweets
+        twint.run.Search(config)
+        return [vars(tweet) for tweet in tweets]
+
+
+class LocalBackend:
+    '''
+    Offline stand-in for Twitter search over a list of tweet dicts (in the
+    shape of twint's tweets), understanding the queries built here:
+    `url:arxiv url:{id}` and `url:arxiv (url:{id} OR url:{id} ...)`.
+    '''
+
+    r_url = re.compile(r'url:(\S+?)(?=[\s)]|$)')
+
+    def __init__(self, tweets):
+        self.tweets = tweets
+
+    @classmethod
+    def load(cls, path):
+        return cls(json.load(open(path)))
+
+    def search(self, query, limit=100, since=None):
+        terms = self.r_url.findall(query)
+        required, alternatives = terms[0], terms[1:]
+        result = []
+        for tweet in self.tweets:
+            text = tweet['tweet']
+            if required not in text:
+                continue
+            if since is not None and created_at(tweet) < since:
+                continue
+            if alternatives and not any([_ in text for _ in alternatives]):
+                continue
+            result.append(tweet)
+            if len(result) >= limit:
+                break
+        return result
+
+
+class IdMatcher:
+    '''
+    Finds which of many arXiv ids a tweet cites, with one compiled regex.
+    '''
+
+    def __init__(self, arxiv_ids):
+        ids = sorted(set(arxiv_ids), key=len, reverse=True)
+        self.pattern = re.compile(r'(?<![\w.])('
+                                  + '|'.join([re.escape(_) for _ in ids])
+                                  + r')(?:v\d+)?(?!\d)')
+
+    def match(self, text):
+        return set(self.pattern.findall(text))
+
+
+def build_queries(arxiv_ids, max_query_length=512):
+    '''
+    Packs ids into as few `url:arxiv (url:A OR url:B ...)` queries as the
+    query length budget allows. Yields (query, ids).
+    '''
+    batch = []
+    length = 0
+    for arxiv_id in arxiv_ids:
+        term = f'url:{arxiv_id}'
+        if batch and len('url:arxiv ()') + length + len(' OR ') + len(term) > max_query_length:
+            yield make_query(batch), batch
+            batch = []
+            length = 0
+        length += len(term) if not batch else len(' OR ') + len(term)
+        batch.append(arxiv_id)
+    if batch:
+        yield make_query(batch), batch
+
+
+def make_query(arxiv_ids):
+    if len(arxiv_ids) == 1:
+        return f'url:arxiv url:{arxiv_ids[0]}'
+    return 'url:arxiv (' + ' OR '.join([f'url:{_}' for _ in arxiv_ids]) + ')'
+
+
+def search_tweets(arxiv_id, limit=100, backend=None, since=None):
+    backend = backend if backend is not None else TwintBackend()
+    result = backend.search(make_query([arxiv_id]), limit=limit, since=since)
+    result = [t for t in result if 'arxiv' in t['tweet'] and str(arxiv_id) in t['tweet']]
+    return result
+
+
+def search_tweets_batch(arxiv_ids, limit=100, backend=None, since=None):
+    '''
+    Searches the tweets of several papers with a single query and routes
+    every returned tweet to each of the papers it cites.
+    '''
+    backend = backend if backend is not None else TwintBackend()
+    result = {arxiv_id: [] for arxiv_id in arxiv_ids}
+    matcher = IdMatcher(arxiv_ids)
+    seen = set([])
+    for tweet in backend.search(make_query(arxiv_ids), limit=limit * len(arxiv_ids),
+                                since=since):
+        if 'arxiv' not in tweet['tweet'] or tweet['id'] in seen:
+            continue
+        seen.add(tweet['id'])
+        for arxiv_id in matcher.match(tweet['tweet']):
+            result[arxiv_id].append(tweet)
+    return result
+
+
+class TweetSearcher:
+    '''
+    Searches the tweets of many papers with `num_workers` concurrent
+    searches, paced by an AdaptiveRateController which backs off when
+    searches fail and speeds up again while they succeed.
+
+    With `max_query_length`, ids are packed into OR queries of at most that
+    many characters and the tweets are demultiplexed locally.
+
+    With a TweetCache, papers searched before are only searched for tweets
+    newer than the cached ones (or younger than `refresh_age`, to refresh
+    their counts), and the results are merged into the cache.
+    '''
+
+    def __init__(self,
+                 num_workers=4,
+                 limit=100,
+                 num_retries=3,
+                 controller=None,
+                 backend=None,
+                 max_query_length=None,
+                 cache=None,
+                 refresh_age=datetime.timedelta(days=3)):
+        self.num_workers = num_workers
+        self.limit = limit
+        self.num_retries = num_retries
+        self.controller = controller if controller is not None else AdaptiveRateController()
+        self.backend = backend if backend is not None else TwintBackend()
+        self.max_query_length = max_query_length
+        self.cache = cache
+        self.refresh_age = refresh_age
+
+    def _retry(self, name, func, *args):
+        for i in range(self.num_retries + 1):
+            self.controller.wait()
+            try:
+                with metrics.timer('tweet_search'):
+                    result = func(*args)
+            except Exception as e:
+                metrics.incr('tweet_search_failures')
+                self.controller.failure()
+                logger.warning(f'search failed for {name} ({e}), '
+                               f'retry {i + 1}/{self.num_retries}, '
+                               f'interval {self.controller.interval:.2f}s')
+                continue
+            self.controller.success()
+            return result
+        logger.error(f'giving up searching tweets for {name}')
+        return None
+
+    # search() and search_batch() return {arxiv_id: tweets}, with None as
+    # the tweets of the papers whose search failed (unlike [], no tweets)
+
+    def search(self, arxiv_id, since=None):
+        return {arxiv_id: self._retry(arxiv_id, search_tweets, arxiv_id, self.limit,
+                                      self.backend, since)}
+
+    def search_batch(self, arxiv_ids, since=None):
+        result = self._retry(f'{arxiv_ids[0]} and {len(arxiv_ids) - 1} more',
+                             search_tweets_batch, arxiv_ids, self.limit, self.backend, since)
+        return result if result is not None else {arxiv_id: None for arxiv_id in arxiv_ids}
+
+    def make_tasks(self, arxiv_ids):
+        if self.cache is None:
+            groups = [(None, arxiv_ids)]
+        else:
+            # papers are grouped by the day their search starts from, so
+            # that a batch asks for at most one extra day of tweets
+            groups = {}
+            for arxiv_id in arxiv_ids:
+                since = self.cache.since(arxiv_id, self.refresh_age)
+                key = since[:10] if since is not None else None
+                group_since, ids = groups.get(key, (since, []))
+                if since is not None:
+                    group_since = min(group_since, since)
+                ids.append(arxiv_id)
+                groups[key] = (group_since, ids)
+            groups = list(groups.values())
+        tasks = []
+        for since, ids in groups:
+            if self.max_query_length:
+                tasks.extend([(self.search_batch, batch, since)
+                              for _, batch in build_queries(ids, self.max_query_length)])
+            else:
+                tasks.extend([(self.search, arxiv_id, since) for arxiv_id in ids])
+        return tasks
+
+    def search_all(self, papers):
+        start = time.monotonic()
+        num_tweets = 0
+        arxiv_ids = list(dict.fromkeys([paper['id'] for paper in papers]))
+        tasks = self.make_tasks(arxiv_ids)
+        logger.info(f'{len(tasks)} queries for {len(arxiv_ids)} papers')
+        num_failed = 0
+        papers_by_id = {}
+        for paper in papers:
+            papers_by_id.setdefault(paper['id'], []).append(paper)
+        with ThreadPoolExecutor(max_workers=max(1, self.num_workers)) as executor:
+            futures = [executor.submit(func, arg, since) for func, arg, since in tasks]
+            # tqdm is only imported for an actual search, not by `dx search -h`
+            # or `dx pipeline -h` (see benchmarks/bench_startup.py)
+            from tqdm import tqdm
+            progress = tqdm(total=len(papers))
+            for future in as_completed(futures):
+                for arxiv_id, tweets in future.result().items():
+                    if tweets is None:
+                        # not recorded as searched: searched in full next time
+                        num_failed += 1
+                        tweets = self.cache.tweets(arxiv_id) if self.cache is not None else []
+                    else:
+                        num_tweets += len(tweets)
+                        if self.cache is not None:
+                            tweets = self.cache.merge(arxiv_id, tweets)
+                    for paper in papers_by_id[arxiv_id]:
+                        paper['tweets'] = tweets
+                        progress.update()
+                    progress.set_postfix(id=arxiv_id, tweets=len(tweets),
+                                         interval=f'{self.controller.interval:.2f}s')
+            progress.close()
+        metrics.incr('tweets_found', num_tweets)
+        if num_failed:
+            logger.warning(f'search failed for {num_failed} papers')
+        logger.info(f'{num_tweets} new tweets for {len(papers)} papers '
+                    f'in {time.monotonic() - start:.1f}s')
+        return papers
@@ -0,0 +1,311 @@
+import sys
+import datetime
+from abc import ABC, abstractmethod
+from pathlib import Path
+from loguru import logger
+from dx.oembed import OEmbedCache, OEmbedResolver, twitter_api, has_twitter_credentials
+from dx.classify import Classifier, default_tiers
+from dx.fragment_cache import content_key
+from dx.metrics import metrics
+from dx.render import (Renderer, BufferedOutput, NOW,
+                       DAILY_HEADER, DAILY_TIER, DAILY_CLUSTER, DAILY_PAPER, DAILY_PDF,
+                       DAILY_DUPLICATES,
+                       HIGHLIGHT_HEADER, HIGHLIGHT_TITLE, HIGHLIGHT_PAPER, HIGHLIGHT_PDF,
+                       BLOG_HEADER, BLOG_TITLE, BLOG_PAPER, BLOG_PDF)
+
+
+FAVORITE_TAGS = ['cs.CV', 'cs.CL', 'cs.LG', 'cs.DS', 'cs.IR', 'cs.NE', 'stat.ML']
+UNFAVORITE_TAGS = ['cs.CR', 'cs.IT', 'cs.LO', 'cs.NI', 'cs.PL', 'cs.RO', 'cs.SE']
+
+# fields of a tweet shown in a section
+TWEET_KEYS = ('link', 'name', 'username', 'datestamp', 'timestamp', 'tweet',
+              'retweets_count', 'likes_count')
+
+
+def plain_tweet_string(tweet):
+    user_name = tweet['name']
+    screen_name = tweet['username']
+    created_at = tweet['datestamp'] + ' ' + tweet['timestamp']
+    tweet_link = tweet['link']
+    text = tweet['tweet']
+    lines = []
+    for line in text.split('\n'):
+        if line.startswith('#'):
+            line = '\\' + line
+        lines.append('> ' + line)
+    text = '\n'.join(lines)
+    return f'''
+**{user_name} @{screen_name}  {created_at}**
+{tweet_link}
+
+{text}
+
+
+            '''
+
+
+def progress(iterable):
+    # no progress bar (nor tqdm import) when the output is not a terminal
+    if not sys.stderr.isatty():
+        return iterable
+    from tqdm import tqdm
+    return tqdm(iterable)
+
+
+def make_oembed_resolver(oembed_cache=None):
+    # the twitter.Api client is made on the first tweet not in the cache
+    make_api = twitter_api
+    if not has_twitter_credentials():
+        logger.warning('twitter api is not available: no TWITTER_* credentials')
+        make_api = None
+    cache = OEmbedCache(oembed_cache) if oembed_cache is not None else None
+    return OEmbedResolver(None, cache=cache, make_api=make_api)
+
+
+def make_formula(retweet_weight=1, like_weight=1, half_life=0):
+    from dx.scoring import LinearScore
+    return LinearScore(retweet_weight, like_weight, half_life=half_life or None)
+
+
+def blog_output_file(metadata, output_dir):
+    start_date, end_date = date_range(metadata, '%Y-%m-%d')
+    if start_date == end_date:
+        date_str = start_date
+    else:
+        date_str = start_date + '-' + end_date
+    return Path(output_dir / f'{date_str}---Hot-Papers.md')
+
+
+def date_range(metadata, date_format):
+    # 'until' is exclusive, the last day shown is the day before
+    start_date = datetime.datetime.strptime(metadata['since'], '%Y/%m/%d')
+    end_date = (datetime.datetime.strptime(metadata['until'], '%Y/%m/%d')
+                - datetime.timedelta(days=1))
+    return start_date.strftime(date_format), end_date.strftime(date_format)
+
+
+class DailyArxivWriter:
+    '''
+    All the papers, in tiers by primary subject, or grouped by topic when a
+    clusterer (dx.cluster.PaperClusterer) is given.
+    '''
+
+    def __init__(self,
+                 favorite_tags=FAVORITE_TAGS,
+                 unfavorite_tags=['cs.AR'] + UNFAVORITE_TAGS,
+                 tiers=None,
+                 renderer=None,
+                 clusterer=None
+                 ):
+        assert(len(set(favorite_tags) & set(unfavorite_tags)) == 0)
+        self.favorite_tags = favorite_tags[:]
+        self.unfavorite_tags = unfavorite_tags[:]
+        if tiers is None:
+            tiers = default_tiers(self.favorite_tags, self.unfavorite_tags)
+        self.classifier = Classifier(tiers)
+        self.renderer = renderer if renderer is not None else Renderer()
+        self.clusterer = clusterer
+
+    def render_paper(self, paper, duplicates=()):
+        f = self.renderer.fragments(paper)
+        pdf = DAILY_PDF(f.pdf_url) if f.pdf_url else ''
+        if duplicates:
+            duplicates = DAILY_DUPLICATES(' | '.join([_['links']['Abstract'] for _ in duplicates]))
+        else:
+            duplicates = ''
+        return DAILY_PAPER(f=f, pdf=pdf, duplicates=duplicates)
+
+    @metrics.timed('render', output='daily_arxiv')
+    def save_markdown(self, data, result_file):
+
+        metadata = data['meta']
+        papers = data['papers']
+
+        with BufferedOutput(result_file) as fout:
+            fout.write(DAILY_HEADER(count=len(papers),
+                                    since=metadata['since'], until=metadata['until']))
+            if self.clusterer is not None:
+                # the same papers as in the tiers
+                if self.classifier.require_pdf:
+                    papers = [paper for paper in papers if 'Download PDF' in paper['links']]
+                for cluster in self.clusterer.cluster(papers):
+                    fout.write(DAILY_CLUSTER(count=len(cluster.papers), label=cluster.label))
+                    for paper in progress(cluster.papers):
+                        fout.write(self.render_paper(paper,
+                                                     cluster.duplicates.get(paper['id'])))
+                return
+
+            for tier, tier_papers in self.classifier.classify(papers):
+                fout.write(DAILY_TIER(count=len(tier_papers), name=tier.name))
+                if tier.show_tags:
+                    fout.write(' | '.join(sorted(tier.tags)) + '\n')
+
+                for paper, _ in progress(tier_papers):
+                    fout.write(self.render_paper(paper))
+
+
+class HotPaperWriter(ABC):
+    '''
+    Papers with enough engagement on Twitter, best first, each followed
+    by its top tweets.
+    '''
+
+    def __init__(self,
+                 favorite_tags=FAVORITE_TAGS + ['cs.AR'],
+                 unfavorite_tags=UNFAVORITE_TAGS,
+                 paper_score_threshold=50,
+                 tweet_score_threshold=25,
+                 resolver=None,
+                 formula=None,
+                 renderer=None
+                 ):
+        assert(len(set(favorite_tags) & set(unfavorite_tags)) == 0)
+        self.favorite_tags = favorite_tags[:]
+        self.unfavorite_tags = unfavorite_tags[:]
+        self.paper_score_threshold = paper_score_threshold
+        self.tweet_score_threshold = tweet_score_threshold
+        self.resolver = resolver if resolver is not None else make_oembed_resolver()
+        self.formula = formula
+        self.renderer = renderer if renderer is not None else Renderer()
+        self.oembeds = {}
+
+    def get_tweet_string(self, tweet):
+        html = self.oembeds.get(tweet['link'])
+        if html is None:
+            return plain_tweet_string(tweet)
+        return html
+
+    @abstractmethod
+    def keep_tweet(self, rank, score, min_tweet_topk):
+        '''
+        Whether the tweet at `rank` (0 is the best) with `score` is shown.
+        '''
+
+    def select_tweets(self, engine, index, min_tweet_topk, max_tweet_topk):
+        tweets = []
+        for i, j in enumerate(engine.top_tweets(index, max_tweet_topk)):
+            if self.keep_tweet(i, engine.tweet_scores[j], min_tweet_topk):
+                tweets.append(engine.tweets[j])
+        return tweets
+
+    def hot_papers(self, papers, min_tweet_topk, max_tweet_topk):
+        '''
+        Returns the engine and [(index, tweets)] of the papers to write.
+        '''
+        from dx.scoring import ScoreEngine
+        engine = ScoreEngine(papers, formula=self.formula)
+        has_pdf = [('Download PDF' in p['links']) for p in papers]
+        favorites = [(index, self.select_tweets(engine, index, min_tweet_topk, max_tweet_topk))
+                     for index in engine.top_papers(self.paper_score_threshold, mask=has_pdf)]
+        return engine, favorites
+
+    def tweet_block(self, tweets):
+        return ''.join([self.get_tweet_string(tweet) + '\n' for tweet in tweets])
+
+    def section_key(self, template, f, engine, index, tweets):
+        # `now` is left out: sections are cached with NOW in its place
+        return content_key(template, NOW, [getattr(f, _) for _ in f.__slots__],
+                           int(engine.total_retweets[index]), int(engine.total_likes[index]),
+                           [[tweet[_] for _ in TWEET_KEYS] for tweet in tweets],
+                           self.paper_score_threshold, self.tweet_score_threshold,
+                           self.resolver.has_api)
+
+    def render_sections(self, papers, engine, favorites, template, pdf_template):
+        '''
+        Returns the rendered sections (without their numbered title) of
+        the favorites. With a fragment cache, the sections rendered before
+        with the same content are reused and only the tweets of the others
+        are resolved.
+        '''
+        cache = self.renderer.cache
+        keys = [self.section_key(template, self.renderer.fragments(papers[index]),
+                                 engine, index, tweets)
+                for index, tweets in favorites]
+        cached = cache.get_many(keys) if cache is not None else {}
+
+        # resolve the oEmbed html of all the tweets to be written at once
+        self.oembeds = self.resolver.resolve(
+            [tweet['link'] for key, (_, tweets) in zip(keys, favorites)
+             if key not in cached for tweet in tweets])
+
+        now = datetime.datetime.now().strftime('%m/%d/%Y %H:%M:%S')
+        sections = []
+        rendered = []
+        for key, (index, tweets) in zip(keys, favorites):
+            text = cached.get(key)
+            if text is None:
+                f = self.renderer.fragments(papers[index])
+                text = template.format(f=f, now=NOW,
+                                       pdf=pdf_template(f.pdf_url) if f.pdf_url else '',
+                                       retweets=engine.total_retweets[index],
+                                       likes=engine.total_likes[index],
+                                       tweets=self.tweet_block(tweets))
+                # sections with tweets that fell back to plain text are
+                # rendered again next time
+                if not self.resolver.has_api or all([tweet['link'] in self.oembeds
+                                                     for tweet in tweets]):
+                    rendered.append((key, text))
+            sections.append((index, text.replace(NOW, now)))
+        if cache is not None:
+            cache.put_many(rendered)
+            logger.info(f'sections: {len(cached)} reused, {len(keys) - len(cached)} rendered')
+        return sections
+
+
+class TwitterHighlightWriter(HotPaperWriter):
+
+    def __init__(self, tweet_score_threshold=20, **kwargs):
+        super().__init__(tweet_score_threshold=tweet_score_threshold, **kwargs)
+
+    def keep_tweet(self, rank, score, min_tweet_topk):
+        return rank < min_tweet_topk or score > self.tweet_score_threshold
+
+    @metrics.timed('render', output='twitter_highlight')
+    def save_markdown(self, data, result_file, min_tweet_topk=2, max_tweet_topk=10):
+
+        metadata = data['meta']
+        papers = data['papers']
+
+        engine, favorites = self.hot_papers(papers, min_tweet_topk, max_tweet_topk)
+        sections = self.render_sections(papers, engine, favorites,
+                                        HIGHLIGHT_PAPER, HIGHLIGHT_PDF)
+
+        with BufferedOutput(result_file) as fout:
+            start_date = metadata['since']
+            _, end_date = date_range(metadata, '%Y/%m/%d')
+            if start_date == end_date:
+                fout.write(HIGHLIGHT_HEADER(date=start_date))
+            else:
+                fout.write(HIGHLIGHT_HEADER(date=f'{start_date} ~ {end_date}'))
+
+            for no, (index, text) in enumerate(progress(sections), 1):
+                fout.write(HIGHLIGHT_TITLE(no=no, f=self.renderer.fragments(papers[index])))
+                fout.write(text)
+
+
+class HotPaperBlogWriter(HotPaperWriter):
+
+    def keep_tweet(self, rank, score, min_tweet_topk):
+        return rank + 1 < min_tweet_topk or score >= self.tweet_score_threshold
+
+    @metrics.timed('render', output='blog')
+    def save_markdown(self, data, result_file, min_tweet_topk=1, max_tweet_topk=10):
+
+        metadata = data['meta']
+        papers = data['papers']
+
+        engine, favorites = self.hot_papers(papers, min_tweet_topk, max_tweet_topk)
+        sections = self.render_sections(papers, engine, favorites, BLOG_PAPER, BLOG_PDF)
+
+        with BufferedOutput(result_file) as fout:
+            start_date, end_date = date_range(metadata, '%Y-%m-%d')
+            if start_date == end_date:
+                date_str = start_date
+            else:
+                date_str = start_date + ' - ' + end_date
+            fout.write(BLOG_HEADER(date=date_str,
+                                   now=datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%ZZ')))
+
+            for no, (index, text) in enumerate(progress(sections), 1):
+                fout.write(BLOG_TITLE(no=no, f=self.renderer.fragments(papers[index])))
+                fout.write(text)
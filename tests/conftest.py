@@ -0,0 +1,66 @@
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qsl
+import pytest
+
+# run from the checkout, as with PYTHONPATH=src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+
+
+class RecordedServer:
+    '''
+    Local HTTP server replaying recorded responses: `routes` maps
+    (path, frozenset of the query items) to a file of tests/data. Other
+    requests get a 404. The requests are kept in `requests`.
+    '''
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                key = (url.path, frozenset(parse_qsl(url.query)))
+                server.requests.append(key)
+                name = server.routes.get(key)
+                if name is None:
+                    self.send_error(404)
+                    return
+                content = (DATA_DIR / name).read_bytes()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/xml' if name.endswith('.xml')
+                                 else 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def recorded_server():
+    servers = []
+
+    def start(routes):
+        servers.append(RecordedServer(routes))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.close()
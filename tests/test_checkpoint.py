@@ -0,0 +1,47 @@
+import json
+import datetime
+from dx.checkpoint import CrawlCheckpoint
+
+
+META = {'since': '2020/11/05', 'until': '2020/11/07'}
+
+
+def paper(arxiv_id, date='Fri, 06 Nov 2020'):
+    return {'id': arxiv_id, 'date': date}
+
+
+def test_progress_is_logged_per_page(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'checkpoint.json')
+    assert not checkpoint.begin(META, 2)
+    papers = [paper('2011.00001'), paper('2011.00002')]
+    checkpoint.page_done('cs.LG', 2, papers)
+    papers = papers + [paper('2011.00003', 'Thu, 05 Nov 2020')]
+    checkpoint.page_done('cs.LG', 4, papers)
+    # every line holds the papers of its page only
+    lines = [json.loads(_) for _ in open(checkpoint.log_path)]
+    assert [len(_['papers']) for _ in lines] == [2, 1]
+
+    # an interrupted crawl resumes from the last page
+    resumed = CrawlCheckpoint(tmp_path / 'checkpoint.json')
+    assert resumed.begin(META, 2)
+    assert resumed.progress('cs.LG') == {'skip': 4, 'papers': papers, 'done': False}
+    assert resumed.progress('stat.ML') == {'skip': 0, 'papers': [], 'done': False}
+
+    resumed.commit(datetime.datetime(2020, 11, 5), datetime.datetime(2020, 11, 7))
+    assert not resumed.log_path.exists()
+    assert CrawlCheckpoint(tmp_path / 'checkpoint.json').seen('cs.LG') == set(
+        [_['id'] for _ in papers])
+
+
+def test_truncated_log_line(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / 'checkpoint.json')
+    checkpoint.begin(META, 2)
+    checkpoint.page_done('cs.LG', 2, [paper('2011.00001')])
+    with open(checkpoint.log_path, 'a') as fout:
+        fout.write('{"cat": "cs.LG", "skip": 4, "pap')
+    resumed = CrawlCheckpoint(tmp_path / 'checkpoint.json')
+    assert resumed.progress('cs.LG')['skip'] == 2
+    resumed.page_done('cs.LG', 4, [paper('2011.00001'), paper('2011.00002')])
+    resumed = CrawlCheckpoint(tmp_path / 'checkpoint.json')
+    assert resumed.progress('cs.LG')['skip'] == 4
+    assert len(resumed.progress('cs.LG')['papers']) == 2
@@ -0,0 +1,21 @@
+import numpy as np
+from dx.cluster import tokenize_all, minhash_signatures, near_duplicates
+
+
+def groups_of(texts):
+    docs, tokens = tokenize_all(texts)
+    return near_duplicates(minhash_signatures(docs, len(tokens)))
+
+
+def test_near_duplicates():
+    text = ('we study the convergence of stochastic gradient descent on overparameterized '
+            'neural networks and show linear rates under mild assumptions')
+    texts = [text, 'an unrelated paper about graph coloring heuristics for sparse graphs',
+             text.replace('assumptions', 'conditions'), text]
+    assert groups_of(texts) == [[0, 2, 3]]
+
+
+def test_short_documents_are_not_duplicates():
+    assert groups_of(['', '', 'Untitled', 'Untitled', 'a b']) == []
+    docs = [np.zeros(0, dtype=np.int64)] * 4
+    assert near_duplicates(minhash_signatures(docs, 1)) == []
@@ -0,0 +1,138 @@
+import datetime
+from urllib.parse import urlparse, parse_qs
+from dx import crawler as crawler_module
+from dx.crawler import Crawler
+from dx.fetch import Response
+
+
+TODAY = datetime.datetime(2020, 11, 6)
+
+
+def listing_page(papers, total):
+    out = ['<html><body><div id="dlpage">',
+           f'<small>[ total of {total} entries: ... ]</small>\n']
+    date = None
+    for arxiv_id, day in papers:
+        if day != date:
+            if date is not None:
+                out.append('</dl>\n')
+            date = day
+            out.append(f'<h3>{day}</h3>\n<dl>\n')
+        out.append(f'<dt><span class="list-identifier"><a href="/abs/{arxiv_id}" '
+                   f'title="Abstract">arXiv:{arxiv_id}</a></span></dt>\n'
+                   '<dd><div class="meta">\n'
+                   '<div class="list-title mathjax"><span class="descriptor">Title:</span> '
+                   f'Paper {arxiv_id}</div>\n'
+                   '<div class="list-authors"><span class="descriptor">Authors:</span> '
+                   '<a href="/a/doe_j_1">Jane Doe</a></div>\n'
+                   '<div class="list-subjects"><span class="descriptor">Subjects:</span> '
+                   '<span class="primary-subject">Machine Learning (cs.LG)</span></div>\n'
+                   '</div></dd>\n')
+    if date is not None:
+        out.append('</dl>\n')
+    out.append('</div></body></html>')
+    return ''.join(out)
+
+
+class ListingFetcher:
+    # /list/cs.LG/pastweek of `papers` [(id, day)], newest first
+
+    def __init__(self, papers):
+        self.papers = papers
+        self.skips = []
+
+    def get(self, url, headers=None):
+        query = {key: int(values[0]) for key, values in parse_qs(urlparse(url).query).items()}
+        skip = query.get('skip', 0)
+        self.skips.append(skip)
+        text = listing_page(self.papers[skip:skip + query['show']], len(self.papers))
+        return Response(url, 200, {'content-type': 'text/html; charset=utf-8'},
+                        text.encode('utf-8'))
+
+
+class PassThroughEnricher:
+
+    def enrich(self, papers, callback=None):
+        if callback is not None and papers:
+            callback(papers)
+
+
+def make_papers(num_per_day, days):
+    papers = []
+    for i, day in enumerate(days):
+        papers.extend([(f'2011.{i}{j:04d}', day) for j in range(num_per_day)])
+    return papers
+
+
+DAYS = ['Fri, 6 Nov 2020', 'Thu, 5 Nov 2020', 'Wed, 4 Nov 2020', 'Tue, 3 Nov 2020']
+
+
+def crawl(papers, since, num_shows, prefetch=1):
+    fetcher = ListingFetcher(papers)
+    crawler = Crawler(enricher=PassThroughEnricher(), fetcher=fetcher)
+    data = crawler.crawl_recent(targets=['cs.LG'], since=since, num_shows=num_shows,
+                                prefetch=prefetch, today=TODAY)
+    return [paper['id'] for paper in data['papers']], fetcher.skips
+
+
+def test_no_request_past_the_listing():
+    papers = make_papers(3, DAYS)
+    ids, skips = crawl(papers, since=10, num_shows=5)
+    assert ids == [arxiv_id for arxiv_id, _ in papers]
+    # the third page is not full, so it is the last one
+    assert skips == [0, 5, 10]
+
+
+def test_no_request_past_a_full_last_page():
+    papers = make_papers(4, DAYS[:2])
+    ids, skips = crawl(papers, since=10, num_shows=4)
+    assert ids == [arxiv_id for arxiv_id, _ in papers]
+    # 'total of 8 entries': the second page is full, and still the last one
+    assert skips == [0, 4]
+
+
+def test_listing_without_total(monkeypatch):
+    # without the header, the crawl goes on until a page is empty
+    monkeypatch.setattr(crawler_module, 'listing_total', lambda text: None)
+    papers = make_papers(4, DAYS[:2])
+    ids, skips = crawl(papers, since=10, num_shows=4)
+    assert ids == [arxiv_id for arxiv_id, _ in papers]
+    assert skips == [0, 4, 8]
+
+
+def test_no_request_past_the_window():
+    papers = make_papers(3, DAYS)
+    expected = [arxiv_id for arxiv_id, day in papers if day in DAYS[:2]]
+    for prefetch in (0, 1):
+        ids, skips = crawl(papers, since=1, num_shows=4, prefetch=prefetch)
+        assert ids == expected
+        # the second page reaches Wed, before the window
+        assert skips == [0, 4]
+    # deeper prefetch requests at most prefetch - 1 pages past the window
+    ids, skips = crawl(papers, since=1, num_shows=4, prefetch=2)
+    assert ids == expected
+    assert skips == [0, 4, 8]
+
+
+def test_incremental_crawl_keeps_known_papers(tmp_path):
+    from dx.checkpoint import CrawlCheckpoint
+    from dx.store import PaperStore
+    papers = make_papers(3, DAYS)
+    checkpoint = CrawlCheckpoint(tmp_path / 'checkpoint.json')
+    store = PaperStore(tmp_path / 'papers.db')
+
+    def crawl_incremental(since):
+        fetcher = ListingFetcher(papers)
+        crawler = Crawler(enricher=PassThroughEnricher(), fetcher=fetcher,
+                          checkpoint=checkpoint, store=store)
+        data = crawler.crawl_recent(targets=['cs.LG'], since=since, num_shows=512, today=TODAY)
+        return [paper['id'] for paper in data['papers']]
+
+    first = crawl_incremental(since=1)
+    assert first == [arxiv_id for arxiv_id, day in papers if day in DAYS[:2]]
+    # the same window again: nothing new, all read back from the store
+    assert crawl_incremental(since=1) == first
+    # a wider window: Wed is new, Fri and Thu are known
+    ids = crawl_incremental(since=2)
+    assert sorted(ids) == sorted([arxiv_id for arxiv_id, day in papers if day in DAYS[:3]])
+    assert len(ids) == len(set(ids))
@@ -0,0 +1,70 @@
+from dx import enrich
+from dx.enrich import Enricher
+
+
+class FailingFetcher:
+
+    def __init__(self):
+        self.num_requests = 0
+
+    def get(self, url, headers=None):
+        self.num_requests += 1
+        raise IOError('HTTP 503')
+
+
+class CountingLimiter:
+
+    def __init__(self):
+        self.num_waits = 0
+
+    def wait(self):
+        self.num_waits += 1
+
+
+def test_failed_query_keeps_listing_data(monkeypatch):
+    monkeypatch.setattr(enrich.time, 'sleep', lambda seconds: None)
+    fetcher = FailingFetcher()
+    enricher = Enricher(num_retries=2, fetcher=fetcher)
+    enricher.rate_limiter = CountingLimiter()
+    papers = [{'id': '2011.02001', 'title': 'Sparse Attention'}]
+    enriched = []
+    enricher.enrich(papers, callback=enriched.extend)
+
+    # every attempt, the last one included, waits for the rate limiter
+    assert fetcher.num_requests == 3
+    assert enricher.rate_limiter.num_waits == 3
+    assert enriched == papers
+    assert papers[0]['title'] == 'Sparse Attention'
+    assert papers[0]['summary'] == '' and papers[0]['detail'] is None
+
+
+def test_query_parses_the_api_feed(monkeypatch, recorded_server):
+    server = recorded_server({
+        ('/api/query', frozenset({('id_list', '2011.02001,2011.02002,2011.09999'),
+                                  ('start', '0'), ('max_results', '3'),
+                                  ('sortBy', 'relevance'),
+                                  ('sortOrder', 'descending')})): 'api_query.xml',
+    })
+    monkeypatch.setattr(enrich, 'API_URL', f'{server.url}/api/query')
+    enricher = Enricher(interval=0.0)
+    papers = [{'id': '2011.02001'}, {'id': '2011.02002v1'}, {'id': '2011.09999'}]
+    enricher.enrich(papers)
+
+    # one request for the chunk; the id unknown to the API gets no metadata
+    assert len(server.requests) == 1
+    assert papers[0]['summary'].startswith('We propose a sparse attention')
+    assert papers[1]['summary'] == 'A short study of message passing.'
+    assert papers[2]['summary'] == '' and papers[2]['detail'] is None
+
+    # the fields of arxiv.query (0.5), as in the existing metadata caches
+    detail = papers[0]['detail']
+    assert detail['authors'] == ['Ada Lovelace', 'Alan Turing']
+    assert detail['pdf_url'] == 'http://arxiv.org/pdf/2011.02001v2'
+    assert detail['arxiv_url'] == 'http://arxiv.org/abs/2011.02001v2'
+    assert detail['arxiv_comment'] == '12 pages, 4 figures'
+    assert detail['journal_reference'] == 'NeurIPS 2020'
+    assert detail['doi'] == '10.1000/sparse.2020'
+    assert detail['affiliation'] == 'None'
+    assert detail['arxiv_primary_category']['term'] == 'cs.LG'
+    assert papers[1]['detail']['arxiv_comment'] is None
+    assert papers[1]['detail']['doi'] is None
@@ -0,0 +1,142 @@
+import datetime
+from dx.crawler import Crawler
+from dx.oai import OAICrawler, parse_records, to_paper, oai_set, announced_date
+from dx.listing import in_category
+from conftest import DATA_DIR
+
+
+TODAY = datetime.datetime(2020, 11, 6)
+
+# the window of since=2, until=0: 2020-11-04 ~ 2020-11-06
+OAI_ROUTES = {
+    ('/oai2', frozenset({('verb', 'ListRecords'), ('metadataPrefix', 'arXiv'), ('set', 'cs'),
+                         ('from', '2020-11-04'), ('until', '2020-11-06')})): 'oai_cs_1.xml',
+    ('/oai2', frozenset({('verb', 'ListRecords'),
+                         ('resumptionToken', '6960524|1001')})): 'oai_cs_2.xml',
+}
+
+LISTING_ROUTES = {
+    ('/list/cs.LG/pastweek', frozenset({('show', '512')})): 'list_cs.LG.html',
+}
+
+
+class PassThroughEnricher:
+    # the listing entries as they are, without the arXiv API
+
+    def enrich(self, papers, callback=None):
+        if callback is not None and papers:
+            callback(papers)
+
+
+class LocalListingCrawler(Crawler):
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def target_url(self, target):
+        return f'{self.base_url}/list/{target}/pastweek'
+
+
+def test_parse_records():
+    records, token = parse_records((DATA_DIR / 'oai_cs_1.xml').read_bytes())
+    assert token == '6960524|1001'
+    assert [(datestamp, metadata['id']) for datestamp, metadata in records] == [
+        ('2020-11-06', '2011.02001'), ('2020-11-06', '2011.02002'), ('2020-11-05', '2011.02003')]
+
+    # the last page has an empty token, and its deleted record is left out
+    records, token = parse_records((DATA_DIR / 'oai_cs_2.xml').read_bytes())
+    assert token is None
+    assert [metadata['id'] for _, metadata in records] == ['2011.02004', '2010.09999']
+    assert records[1][1]['updated'] == '2020-11-03'
+
+
+def test_to_paper():
+    records, _ = parse_records((DATA_DIR / 'oai_cs_1.xml').read_bytes())
+    paper = to_paper(records[0][1])
+    assert paper['date'] == 'Fri, 06 Nov 2020'
+    assert paper['id'] == '2011.02001'
+    assert paper['links'] == {'Abstract': 'https://arxiv.org/abs/2011.02001',
+                              'Download PDF': 'https://arxiv.org/pdf/2011.02001'}
+    assert paper['title'] == 'Sparse Attention for Long Documents'
+    assert paper['authors'] == ['Jane Doe', 'John A. Smith Jr']
+    assert paper['comments'] == '12 pages, 4 figures'
+    assert paper['subjects'] == ['Machine Learning (cs.LG)', 'Computation and Language (cs.CL)']
+    assert paper['summary'] == 'We study sparse attention for long documents.'
+    assert to_paper(records[1][1])['comments'] is None
+
+
+def test_announced_date():
+    # the weekday after the latest version, not the datestamp of the record
+    records, _ = parse_records((DATA_DIR / 'oai_cs_2.xml').read_bytes())
+    revised = records[1][1]
+    assert revised['created'] == '2020-10-20'
+    assert to_paper(revised)['date'] == 'Wed, 04 Nov 2020'
+    assert announced_date({'created': '2020-11-06'}) == datetime.datetime(2020, 11, 9)
+    assert announced_date({'created': '2020-11-07'}) == datetime.datetime(2020, 11, 9)
+
+
+def test_oai_set():
+    assert oai_set('cs.LG') == 'cs'
+    assert oai_set('stat.ML') == 'stat'
+    assert oai_set('hep-th') == 'physics:hep-th'
+    assert in_category('cs.LG', 'cs') and in_category('cs.LG', 'cs.LG')
+    assert not in_category('cs.LGX', 'cs.LG') and not in_category('cs', 'cs.LG')
+
+
+def test_harvest(recorded_server):
+    server = recorded_server(OAI_ROUTES)
+    crawler = OAICrawler(base_url=server.url + '/oai2', interval=0)
+    data = crawler.crawl_recent(targets=['cs.LG'], since=2, today=TODAY)
+
+    # both pages were requested, with the window as from/until
+    assert server.requests == list(OAI_ROUTES)
+    assert data['meta'] == {'since': '2020/11/04', 'until': '2020/11/07'}
+    # cs.CV is not in cs.LG; the second version of 2010.09999, announced
+    # in the window, is kept as no previous crawl has seen the paper
+    papers = data['papers']
+    assert [paper['id'] for paper in papers] == ['2011.02001', '2011.02003', '2011.02004',
+                                                 '2010.09999']
+    assert [paper['status'] for paper in papers] == ['new', 'cross-list', 'new', 'new']
+
+
+def test_set_harvested_once(recorded_server):
+    server = recorded_server(OAI_ROUTES)
+    crawler = OAICrawler(base_url=server.url + '/oai2', interval=0)
+    data = crawler.crawl_recent(targets=['cs.LG', 'cs.CL'], since=2, today=TODAY)
+    # cs.LG and cs.CL share the pages of the cs set
+    assert server.requests == list(OAI_ROUTES)
+    assert [paper['id'] for paper in data['papers']] == ['2011.02001', '2011.02003',
+                                                         '2011.02004', '2010.09999']
+
+
+def test_harvest_known(recorded_server, tmp_path):
+    from dx.dedup import DedupIndex
+    server = recorded_server(OAI_ROUTES)
+    dedup = DedupIndex(tmp_path / 'dedup.db')
+    # the first version of 2010.09999 was crawled before
+    dedup.add_many([('2010.09999', '2020-10-21', 'cs.LG')])
+    papers = OAICrawler(base_url=server.url + '/oai2', interval=0, dedup=dedup).crawl_recent(
+        targets=['cs.LG'], since=2, today=TODAY)['papers']
+    assert [paper['id'] for paper in papers] == ['2011.02001', '2011.02003', '2011.02004']
+
+    crawler = OAICrawler(base_url=server.url + '/oai2', interval=0, dedup=dedup,
+                         keep_known=True)
+    papers = crawler.crawl_recent(targets=['cs.LG'], since=2, today=TODAY)['papers']
+    assert papers[-1]['id'] == '2010.09999'
+    assert papers[-1]['status'] == 'replacement'
+
+
+def test_same_papers_as_listing(recorded_server):
+    server = recorded_server({**OAI_ROUTES, **LISTING_ROUTES})
+    harvested = OAICrawler(base_url=server.url + '/oai2', interval=0).crawl_recent(
+        targets=['cs.LG'], since=2, today=TODAY)['papers']
+    listed = LocalListingCrawler(server.url, enricher=PassThroughEnricher()).crawl_recent(
+        targets=['cs.LG'], since=2, today=TODAY)['papers']
+
+    # the listing pages do not show new versions of older papers
+    harvested = [paper for paper in harvested if not paper['detail'].get('updated')]
+    assert [paper['id'] for paper in harvested] == [paper['id'] for paper in listed]
+    for oai_paper, listing_paper in zip(harvested, listed):
+        for key in ('date', 'title', 'authors', 'comments', 'subjects', 'status'):
+            assert oai_paper[key] == listing_paper[key], key
@@ -0,0 +1,53 @@
+import datetime
+from dx.ratelimit import AdaptiveRateController
+from dx.tweet_cache import TweetCache
+from dx.tweets import TweetSearcher, LocalBackend
+
+
+TWEET = {'id': 1, 'name': 'user', 'username': 'user',
+         'datestamp': '2020-09-01', 'timestamp': '12:00:00',
+         'link': 'https://twitter.com/user/status/1',
+         'tweet': 'our paper https://arxiv.org/abs/2009.00001',
+         'retweets_count': 1, 'likes_count': 2}
+
+
+class FailingBackend:
+
+    def search(self, query, limit=100, since=None):
+        raise RuntimeError('rate limited')
+
+
+def make_searcher(backend, cache, **kwargs):
+    controller = AdaptiveRateController(interval=0, min_interval=0)
+    return TweetSearcher(num_workers=1, num_retries=1, controller=controller,
+                         backend=backend, cache=cache, **kwargs)
+
+
+def test_failed_search_is_retried_in_full(tmp_path):
+    cache = TweetCache(tmp_path / 'tweets.db')
+    papers = make_searcher(FailingBackend(), cache).search_all([{'id': '2009.00001'}])
+    assert papers[0]['tweets'] == []
+    # not recorded as searched, so the next search is not limited to recent tweets
+    assert cache.since('2009.00001', datetime.timedelta(days=3)) is None
+
+    papers = make_searcher(LocalBackend([TWEET]), cache).search_all([{'id': '2009.00001'}])
+    assert [_['id'] for _ in papers[0]['tweets']] == [1]
+
+
+def test_failed_batch_keeps_cached_tweets(tmp_path):
+    cache = TweetCache(tmp_path / 'tweets.db')
+    make_searcher(LocalBackend([TWEET]), cache).search_all([{'id': '2009.00001'}])
+    since = cache.since('2009.00001', datetime.timedelta(days=3))
+
+    papers = make_searcher(FailingBackend(), cache, max_query_length=512).search_all(
+        [{'id': '2009.00001'}, {'id': '2009.00002'}])
+    assert [_['id'] for _ in papers[0]['tweets']] == [1]
+    assert papers[1]['tweets'] == []
+    assert cache.since('2009.00001', datetime.timedelta(days=3)) <= since
+    assert cache.since('2009.00002', datetime.timedelta(days=3)) is None
+
+
+def test_no_tweets_is_cached(tmp_path):
+    cache = TweetCache(tmp_path / 'tweets.db')
+    make_searcher(LocalBackend([]), cache).search_all([{'id': '2009.00001'}])
+    assert cache.since('2009.00001', datetime.timedelta(days=3)) is not None
@@ -0,0 +1,73 @@
+import re
+import datetime
+from dx.render import Renderer
+from dx.fragment_cache import FragmentCache
+from dx.writers import TwitterHighlightWriter, HotPaperBlogWriter
+from dx import writers
+
+
+class NoResolver:
+    has_api = False
+
+    def resolve(self, links):
+        return {}
+
+
+def make_data():
+    papers = []
+    for i in range(3):
+        tweets = [{'link': f'https://twitter.com/u/status/{i}{j}', 'name': 'User',
+                   'username': 'user', 'datestamp': '2020-11-06', 'timestamp': '10:00:00',
+                   'tweet': f'paper {i} tweet {j}', 'retweets_count': 100, 'likes_count': 100}
+                  for j in range(2)]
+        papers.append({'id': f'2011.0000{i}', 'title': f'Paper {i}', 'authors': ['Jane Doe'],
+                       'links': {'Abstract': f'https://arxiv.org/abs/2011.0000{i}',
+                                 'Download PDF': f'https://arxiv.org/pdf/2011.0000{i}'},
+                       'subjects': ['Machine Learning (cs.LG)'], 'summary': 'An abstract.',
+                       'date': 'Fri, 06 Nov 2020', 'tweets': tweets})
+    return {'meta': {'since': '2020/11/06', 'until': '2020/11/07'}, 'papers': papers}
+
+
+def fixed_time(now):
+
+    class FixedTime(datetime.datetime):
+
+        @classmethod
+        def now(cls, tz=None):
+            return now
+
+    return FixedTime
+
+
+def test_reused_sections_show_the_current_time(tmp_path, monkeypatch):
+    cache_path = tmp_path / 'fragments.db'
+    for writer_class in (TwitterHighlightWriter, HotPaperBlogWriter):
+        outputs = []
+        for now in (datetime.datetime(2020, 11, 7, 9), datetime.datetime(2020, 11, 8, 9)):
+            monkeypatch.setattr(writers.datetime, 'datetime', fixed_time(now))
+            renderer = Renderer(cache=FragmentCache(cache_path))
+            writer = writer_class(resolver=NoResolver(), renderer=renderer,
+                                  paper_score_threshold=0)
+            output_file = tmp_path / 'out.md'
+            writer.save_markdown(make_data(), output_file)
+            outputs.append(output_file.read_text())
+            renderer.cache.close()
+        assert renderer.cache.hits == 3
+        first, second = outputs
+        assert re.findall(r'11/07/2020 09:00:00', first)
+        assert not re.findall(r'11/07/2020', second)
+        assert len(re.findall(r'11/08/2020 09:00:00', second)) == 3
+        assert '\x00' not in second
+
+
+def test_clusters_leave_out_papers_without_pdf(tmp_path):
+    from dx.cluster import PaperClusterer
+    from dx.writers import DailyArxivWriter
+    data = make_data()
+    del data['papers'][1]['links']['Download PDF']
+    for clusterer in (None, PaperClusterer()):
+        output_file = tmp_path / 'daily.md'
+        DailyArxivWriter(clusterer=clusterer).save_markdown(data, output_file)
+        text = output_file.read_text()
+        assert '### Paper 0' in text and '### Paper 2' in text
+        assert '### Paper 1' not in text